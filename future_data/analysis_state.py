@@ -0,0 +1,288 @@
+"""
+Module for incremental re-analysis.
+
+Forecast models update a few times a day, but the report runs every hour.
+The analysis state remembers, per location, a hash of each day's input
+arrays together with the analyzed forecast and the rendered HTML table
+columns. On the next run only days whose inputs changed are re-rated and
+re-rendered; when nothing changed, analysis and rendering are lookups.
+
+Every day is analyzed independently (hour ratings, the daylight window and
+the day rating only look at that day), so reusing unchanged days gives the
+same results as a full analysis.
+
+The state is kept in memory (which survives Lambda warm invocations) and
+persisted between runs as an .npz file (arrays, loaded without pickle) with
+the hashes and rendered cells as JSON, in a directory only this user can
+write to.
+"""
+import hashlib
+import json
+import os
+import stat
+import threading
+import zipfile
+import numpy as np
+import calculations
+import data_analyzer
+import forecast_result
+
+# Private directory the analysis state is persisted in (Lambda can only write /tmp)
+ANALYSIS_STATE_DIR = os.environ.get("ANALYSIS_STATE_DIR", "/tmp/.analysis_state")
+ANALYSIS_STATE_PATH = os.path.join(ANALYSIS_STATE_DIR, "analysis_state.npz")
+
+# Bump when the analysis changes in a way the rule constants below do not capture
+ANALYSIS_STATE_VERSION = 2
+
+# Everything besides the input arrays that a day's results depend on
+_RULES = repr((
+    ANALYSIS_STATE_VERSION,
+    calculations.GOOD_WAVE_HEIGHT_MAX_FT,
+    calculations.GOOD_WIND_SPEED_MAX_MPH,
+    calculations.MEDIOCRE_WAVE_HEIGHT_MAX_FT,
+    calculations.MEDIOCRE_WIND_SPEED_MAX_MPH,
+    calculations.MEDIOCRE_WIND_GUST_MAX_MPH,
+    calculations.MIN_GOOD_DURATION_HOURS
+)).encode("utf-8")
+
+def day_hashes(seconds, columns, day_starts, salt=b""):
+    """
+    Hash the input arrays of each day.
+
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour
+        columns (dict): Hourly variable name to values over the same hours
+        day_starts (np.ndarray): Index of each day's first hour
+        salt (bytes): Extra bytes mixed into every hash (location, options)
+
+    Returns:
+        list: 16-byte digest per day
+    """
+    names = sorted(columns)
+    arrays = [np.ascontiguousarray(seconds)] + [np.ascontiguousarray(columns[name]) for name in names]
+    salt = salt + repr(names).encode("utf-8")
+    bounds = np.append(day_starts, len(seconds)).tolist()
+
+    hashes = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        digest = hashlib.blake2b(salt, digest_size=16)
+        for values in arrays:
+            digest.update(values[start:end].data)
+        hashes.append(digest.digest())
+    return hashes
+
+def _private_directory(path):
+    """
+    Create a directory only this user can write to, or check an existing one.
+
+    Raises:
+        OSError: if the directory is a symlink, owned by another user, or
+            writable by group or others
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+            or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise OSError(f"{path} is not a private directory owned by this user")
+
+# Per-day and per-hour LocationForecast arrays stored for every location
+_FORECAST_ARRAYS = (
+    "day_starts", "day_rating", "good_hours_count", "sunrise", "sunset",
+    "time", "rating", "run_start", "run_length", "run_rating"
+)
+
+def _encode_locations(locations):
+    """
+    Split the per-location state into arrays and a JSON document.
+
+    Returns:
+        dict: Array name to array for np.savez, including the JSON document
+            as 'meta'
+    """
+    arrays = {}
+    meta = []
+    for i, (name, entry) in enumerate(locations.items()):
+        forecast = entry["forecast"]
+        meta.append({
+            "name": name,
+            "hashes": {str(day): digest.hex() for day, digest in entry["hashes"].items()},
+            "dates": forecast.dates,
+            "metrics": list(forecast.metrics),
+            "columns": entry["columns"]
+        })
+        for field in _FORECAST_ARRAYS:
+            arrays[f"{i}.{field}"] = getattr(forecast, field)
+        for metric, values in forecast.metrics.items():
+            arrays[f"{i}.metric.{metric}"] = values
+    arrays["meta"] = np.array(json.dumps({"rules": _RULES.decode("utf-8"), "locations": meta}))
+    return arrays
+
+def _decode_locations(stored):
+    """
+    Rebuild the per-location state from a loaded .npz file.
+
+    Returns:
+        dict: Location name to state entry, empty when the rules changed
+    """
+    meta = json.loads(str(stored["meta"][()]))
+    if meta["rules"] != _RULES.decode("utf-8"):
+        return {}
+    locations = {}
+    for i, entry in enumerate(meta["locations"]):
+        arrays = {field: stored[f"{i}.{field}"] for field in _FORECAST_ARRAYS}
+        forecast = forecast_result.LocationForecast(
+            entry["dates"],
+            arrays["day_starts"],
+            arrays["day_rating"],
+            arrays["good_hours_count"],
+            arrays["sunrise"],
+            arrays["sunset"],
+            arrays["time"],
+            arrays["rating"],
+            {metric: stored[f"{i}.metric.{metric}"] for metric in entry["metrics"]},
+            (arrays["run_start"], arrays["run_length"], arrays["run_rating"])
+        )
+        locations[entry["name"]] = {
+            "hashes": {int(day): bytes.fromhex(digest) for day, digest in entry["hashes"].items()},
+            "forecast": forecast,
+            "columns": entry["columns"]
+        }
+    return locations
+
+class AnalysisState:
+    """
+    Per-location day hashes, analyzed forecasts and rendered table columns.
+
+    Args:
+        path (str): .npz file to load from and save to, inside a private
+            directory (None keeps the state in memory only)
+    """
+
+    def __init__(self, path=ANALYSIS_STATE_PATH):
+        self.path = path
+        self._locations = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.reused_days = 0
+        self.analyzed_days = 0
+        self._load()
+        self._saved_rendered = self._rendered_count()
+
+    def _load(self):
+        """Load the persisted state, ignoring a missing, corrupt or outdated file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            _private_directory(os.path.dirname(os.path.abspath(self.path)))
+            with np.load(self.path, allow_pickle=False) as stored:
+                self._locations = _decode_locations(stored)
+        except (OSError, ValueError, ImportError, EOFError, zipfile.BadZipFile, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable analysis state {self.path}: {e}")
+            self._locations = {}
+
+    def analyze(self, seconds, columns, location_info, daylight_window=None):
+        """
+        Analyze aligned hourly arrays, re-rating only days whose inputs changed.
+
+        Args:
+            seconds (np.ndarray): UTC epoch seconds per hour, in time order
+            columns (dict): Hourly variable name to values over the same hours
+            location_info (LocationInfo): Location information
+            daylight_window (tuple): Optional daylight window (see
+                data_analyzer.analyze_conditions)
+
+        Returns:
+            LocationForecast: Same results as data_analyzer.analyze_columns
+        """
+        day_numbers, day_starts = data_analyzer.split_days(seconds)
+        salt = repr((location_info.latitude, location_info.longitude, daylight_window)).encode("utf-8") + _RULES
+        hashes = dict(zip(day_numbers[day_starts].tolist(), day_hashes(seconds, columns, day_starts, salt)))
+
+        with self._lock:
+            previous = self._locations.get(location_info.name, {})
+        previous_hashes = previous.get("hashes", {})
+        changed = [day for day, digest in hashes.items() if previous_hashes.get(day) != digest]
+
+        if not changed and len(hashes) == len(previous_hashes):
+            forecast = previous["forecast"]
+        else:
+            # Unchanged days come from the previous forecast
+            changed_days = set(changed)
+            unchanged_dates = {
+                forecast_result.format_date(day) for day in hashes if day not in changed_days
+            }
+            parts = []
+            if previous.get("forecast") is not None and unchanged_dates:
+                old = previous["forecast"]
+                parts.append(old.select(np.array([date in unchanged_dates for date in old.dates], dtype=bool)))
+
+            # Changed days are analyzed on their rows only
+            if changed:
+                keep = np.isin(day_numbers, changed)
+                parts.append(data_analyzer.rate_columns(
+                    seconds[keep],
+                    {name: values[keep] for name, values in columns.items()},
+                    location_info,
+                    daylight_window
+                ))
+            forecast = forecast_result.LocationForecast.concat(parts)
+
+        # Rendered columns of changed or vanished days are stale
+        changed_dates = {forecast_result.format_date(day) for day in changed}
+        rendered = {
+            date: cells for date, cells in previous.get("columns", {}).items()
+            if date in forecast and date not in changed_dates
+        }
+
+        with self._lock:
+            self._locations[location_info.name] = {"hashes": hashes, "forecast": forecast, "columns": rendered}
+            self.reused_days += len(hashes) - len(changed)
+            self.analyzed_days += len(changed)
+            if changed or len(hashes) != len(previous_hashes):
+                self._dirty = True
+        return forecast
+
+    def column_caches(self):
+        """
+        Get the rendered table columns of every location.
+
+        Returns:
+            dict: Location name to a {date: column cells} dict that the
+                renderer reads and fills in (see
+                table_generation.render_location_table)
+        """
+        with self._lock:
+            return {name: entry["columns"] for name, entry in self._locations.items()}
+
+    def _rendered_count(self):
+        return sum(len(entry["columns"]) for entry in self._locations.values())
+
+    def save(self):
+        """Persist the state atomically if it changed since it was loaded."""
+        with self._lock:
+            # Columns rendered since the last save also count as a change
+            if not self.path or not (self._dirty or self._rendered_count() != self._saved_rendered):
+                return
+            arrays = _encode_locations(self._locations)
+            self._dirty = False
+            self._saved_rendered = self._rendered_count()
+        try:
+            _private_directory(os.path.dirname(os.path.abspath(self.path)))
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not save analysis state {self.path}: {e}")
+
+_state = None
+_state_lock = threading.Lock()
+
+def get_state():
+    """Return the shared analysis state, loading it on first use."""
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = AnalysisState()
+    return _state
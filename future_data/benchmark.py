@@ -0,0 +1,286 @@
+"""
+Offline benchmark for the forecast pipeline.
+
+Generates synthetic marine and weather DataFrames shaped like the fetcher's
+output, runs each pipeline stage on them and reports wall time and peak
+traced memory per stage. Results can be saved as a baseline JSON file and
+later runs compared against it to spot regressions. No network access is
+needed.
+
+Usage:
+    python benchmark.py --locations 200 --days 7
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Add the module directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import data_analyzer
+import solar
+import table_generation
+
+# A stage slower (or using more memory) than baseline * this factor is a regression
+REGRESSION_TOLERANCE = 1.25
+
+# Stages in pipeline order
+STAGES = (
+    "analyze_conditions",
+    "find_good_days",
+    "generate_html_tables",
+    "create_summary_table",
+    "export_to_excel"
+)
+
+def synthetic_locations(count, seed=0):
+    """
+    Generate location dictionaries scattered around Puerto Rico.
+
+    Args:
+        count (int): Number of locations
+        seed (int): Random seed
+
+    Returns:
+        list: Location data dictionaries
+    """
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(17.5, 18.8, count)
+    longitudes = rng.uniform(-67.5, -65.2, count)
+    return [
+        {
+            "name": f"Spot {i:05d}",
+            "region": "Puerto Rico",
+            "timezone": "America/Puerto_Rico",
+            "latitude": float(latitudes[i]),
+            "longitude": float(longitudes[i])
+        }
+        for i in range(count)
+    ]
+
+def _hours(start, days):
+    return pd.date_range(start=start, periods=24 * days, freq="h")
+
+def synthetic_marine_frame(rng, days, start="2025-06-01"):
+    """
+    Generate a marine DataFrame like data_fetcher.fetch_marine_data returns.
+
+    Wave heights follow a slow random walk so days mix GOOD, MEDIOCRE and
+    BAD hours instead of being uniformly noisy.
+
+    Args:
+        rng (np.random.Generator): Random generator
+        days (int): Number of forecast days
+        start (str): First UTC date
+
+    Returns:
+        pd.DataFrame: 'date', 'wave_height' (m) and 'wave_period' (s) columns
+    """
+    dates = _hours(pd.Timestamp(start, tz="UTC"), days)
+    wave_height = np.clip(0.9 + np.cumsum(rng.normal(0.0, 0.08, len(dates))), 0.1, 3.0)
+    return pd.DataFrame({
+        "date": dates,
+        "wave_height": wave_height.astype(np.float32),
+        "wave_period": rng.uniform(4.0, 12.0, len(dates)).astype(np.float32)
+    })
+
+def synthetic_weather_frame(rng, days, start="2025-06-01"):
+    """
+    Generate a weather DataFrame like data_fetcher.fetch_weather_data returns.
+
+    Args:
+        rng (np.random.Generator): Random generator
+        days (int): Number of forecast days
+        start (str): First UTC date
+
+    Returns:
+        pd.DataFrame: 'date', wind (km/h) and pass-through columns
+    """
+    dates = _hours(pd.Timestamp(start, tz="UTC"), days)
+    wind_speed = np.clip(18.0 + np.cumsum(rng.normal(0.0, 1.5, len(dates))), 0.0, 60.0)
+    return pd.DataFrame({
+        "date": dates,
+        "wind_speed_10m": wind_speed.astype(np.float32),
+        "wind_gusts_10m": (wind_speed * rng.uniform(1.1, 1.6, len(dates))).astype(np.float32),
+        "precipitation_probability": rng.integers(0, 100, len(dates)).astype(np.float32),
+        "visibility": rng.uniform(5000.0, 40000.0, len(dates)).astype(np.float32),
+        "rain": rng.exponential(0.2, len(dates)).astype(np.float32)
+    })
+
+def synthetic_inputs(location_count, days, seed=0):
+    """
+    Generate (location, marine_df, weather_df) inputs for the pipeline.
+
+    Args:
+        location_count (int): Number of locations
+        days (int): Number of forecast days
+        seed (int): Random seed
+
+    Returns:
+        list: (location_data, marine_df, weather_df) tuples
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        (location, synthetic_marine_frame(rng, days), synthetic_weather_frame(rng, days))
+        for location in synthetic_locations(location_count, seed)
+    ]
+
+def _stage_functions(inputs, excel_path):
+    """Build the stage callables; each stage consumes the previous stage's output."""
+    state = {}
+
+    def analyze():
+        state["all_results"] = {
+            location["name"]: data_analyzer.analyze_conditions(
+                marine_df, weather_df, data_analyzer.get_location_info(location)
+            )
+            for location, marine_df, weather_df in inputs
+        }
+
+    def good_days():
+        state["good_days_results"] = data_analyzer.find_good_days(state["all_results"])
+
+    def html():
+        table_generation.generate_html_tables(state["all_results"])
+
+    def summary():
+        table_generation.create_summary_table(state["good_days_results"])
+
+    def excel():
+        table_generation.export_to_excel(state["good_days_results"], excel_path)
+
+    return dict(zip(STAGES, (analyze, good_days, html, summary, excel)))
+
+def run_benchmark(location_count=100, days=7, repeat=3, seed=0):
+    """
+    Run every pipeline stage on synthetic inputs and measure it.
+
+    Each stage is timed `repeat` times (best time is reported) and then run
+    once more under tracemalloc to record its peak memory. Sunrise/sunset
+    times go to a throwaway in-memory table so runs are independent. The
+    Excel stage is skipped (with a notice) when xlsxwriter is not installed.
+
+    Args:
+        location_count (int): Number of synthetic locations
+        days (int): Number of forecast days per location
+        repeat (int): Number of timed runs per stage
+        seed (int): Random seed for the inputs
+
+    Returns:
+        dict: Run parameters and, per stage, 'seconds' and 'peak_mb'
+    """
+    inputs = synthetic_inputs(location_count, days, seed)
+    solar.set_table(solar.SolarTable(path=None))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stages = _stage_functions(inputs, os.path.join(tmp_dir, "benchmark.xlsx"))
+        if importlib.util.find_spec("xlsxwriter") is None:
+            print("xlsxwriter is not installed, skipping the export_to_excel stage")
+            del stages["export_to_excel"]
+        for stage, function in stages.items():
+            timings = []
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                function()
+                timings.append(time.perf_counter() - started)
+
+            tracemalloc.start()
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[stage] = {"seconds": min(timings), "peak_mb": peak / 2 ** 20}
+
+    return {
+        "locations": location_count,
+        "days": days,
+        "repeat": repeat,
+        "seed": seed,
+        "python": platform.python_version(),
+        "stages": results
+    }
+
+def compare_to_baseline(run, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Find stages that got slower or use more memory than the baseline.
+
+    Args:
+        run (dict): Result of run_benchmark
+        baseline (dict): Earlier result of run_benchmark
+        tolerance (float): Allowed ratio to the baseline
+
+    Returns:
+        list: (stage, metric, baseline_value, value) for every regression
+    """
+    regressions = []
+    for stage, measured in run["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if reference is None:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if measured[metric] > reference[metric] * tolerance:
+                regressions.append((stage, metric, reference[metric], measured[metric]))
+    return regressions
+
+def print_report(run, baseline=None):
+    """Print the per-stage results, with ratios to the baseline when given."""
+    print(f"\nPipeline benchmark: {run['locations']} locations x {run['days']} days "
+          f"(best of {run['repeat']}, Python {run['python']})")
+    print(f"{'Stage':<24}{'Time (ms)':>12}{'Peak (MB)':>12}{'vs baseline':>16}")
+    for stage, measured in run["stages"].items():
+        ratio = ""
+        reference = (baseline or {}).get("stages", {}).get(stage)
+        if reference:
+            ratio = (f"{measured['seconds'] / reference['seconds']:.2f}x / "
+                     f"{measured['peak_mb'] / max(reference['peak_mb'], 1e-9):.2f}x")
+        print(f"{stage:<24}{measured['seconds'] * 1000:>12.1f}{measured['peak_mb']:>12.2f}{ratio:>16}")
+
+def main(argv=None):
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Offline forecast pipeline benchmark")
+    parser.add_argument("--locations", type=int, default=100, help="number of synthetic locations")
+    parser.add_argument("--days", type=int, default=7, help="forecast days per location")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the inputs")
+    parser.add_argument("--baseline", help="baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", metavar="FILE", help="write this run as a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="allowed ratio to the baseline before a stage counts as a regression")
+    args = parser.parse_args(argv)
+
+    run = run_benchmark(args.locations, args.days, args.repeat, args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(run, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nBaseline saved: {args.save_baseline}")
+
+    if baseline:
+        if (baseline.get("locations"), baseline.get("days")) != (run["locations"], run["days"]):
+            print("\nWarning: baseline was recorded with a different input size")
+        regressions = compare_to_baseline(run, baseline, args.tolerance)
+        for stage, metric, reference, measured in regressions:
+            print(f"REGRESSION {stage} {metric}: {reference:.4g} -> {measured:.4g}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 Module for calculating boating conditions based on weather and marine data.
 Contains constants, conversions, and assessment logic.
 """
+import numpy as np
 
 # Constants for condition assessment
 GOOD_WAVE_HEIGHT_MAX_FT = 3.0  # in feet (converted from meters)
@@ -11,6 +12,18 @@ MEDIOCRE_WIND_SPEED_MAX_MPH = 18.0
 MEDIOCRE_WIND_GUST_MAX_MPH = 25.0
 MIN_GOOD_DURATION_HOURS = 3
 
+# Compact rating codes used by the array-based rating path
+RATING_BAD = 0
+RATING_MEDIOCRE = 1
+RATING_GOOD = 2
+RATING_LABELS = ("BAD", "MEDIOCRE", "GOOD")
+
+# Open-Meteo hourly variables the rating reads, per API
+REQUIRED_VARIABLES = {
+    "marine": ["wave_height", "wave_period"],
+    "weather": ["wind_speed_10m", "wind_gusts_10m"]
+}
+
 def convert_wave_height_to_feet(height_m):
     """Convert wave height from meters to feet."""
     return height_m * 3.28084
@@ -73,4 +86,62 @@ def determine_day_rating(hourly_assessments):
     else:
         day_rating = "MEDIOCRE"
         
-    return day_rating, good_hours_count 
\ No newline at end of file
+    return day_rating, good_hours_count 
+
+def assess_hour_conditions(wave_height_m, wave_period, wind_speed_kmh, wind_gust_kmh):
+    """
+    Assess the boating conditions for many hours at once.
+    
+    Array counterpart of assess_hour_condition: takes whole columns (of any
+    broadcastable shapes) in the API's native units and rates them in one
+    pass. The rules are defined once, as rating_profiles.DEFAULT_PROFILE
+    (built from the constants above), and evaluated from there.
+    
+    Args:
+        wave_height_m (array-like): Wave heights in meters
+        wave_period (array-like): Wave periods in seconds
+        wind_speed_kmh (array-like): Wind speeds in km/h
+        wind_gust_kmh (array-like): Wind gust speeds in km/h
+        
+    Returns:
+        np.ndarray: int8 rating codes (RATING_BAD, RATING_MEDIOCRE, RATING_GOOD)
+    """
+    # Imported here because rating_profiles builds on this module's constants
+    import rating_profiles
+    return rating_profiles.default_profile().rate(
+        wave_height_m, wave_period, wind_speed_kmh, wind_gust_kmh
+    )[0]
+
+def determine_day_ratings(rating_codes, day_starts):
+    """
+    Determine the overall rating of several days at once.
+    
+    Array counterpart of determine_day_rating. The hourly codes of all days
+    are stored back to back; `day_starts` holds the index of each day's
+    first hour. Every day must contain at least one hour. A 2-D array (one
+    row per rating profile) is reduced row by row.
+    
+    Args:
+        rating_codes (np.ndarray): Hourly rating codes (hours on the last axis)
+        day_starts (np.ndarray): Index of the first hour of each day
+        
+    Returns:
+        tuple: (day_rating_codes, good_hours_counts) as arrays, one entry per day
+    """
+    rating_codes = np.asarray(rating_codes)
+    day_starts = np.asarray(day_starts, dtype=np.intp)
+    if len(day_starts) == 0:
+        shape = rating_codes.shape[:-1] + (0,)
+        return np.empty(shape, dtype=np.int8), np.empty(shape, dtype=np.int64)
+    
+    hours_per_day = np.diff(np.append(day_starts, rating_codes.shape[-1]))
+    good_hours_counts = np.add.reduceat((rating_codes == RATING_GOOD).astype(np.int64), day_starts, axis=-1)
+    bad_hours_counts = np.add.reduceat((rating_codes == RATING_BAD).astype(np.int64), day_starts, axis=-1)
+    
+    day_rating_codes = np.where(
+        good_hours_counts >= MIN_GOOD_DURATION_HOURS,
+        RATING_GOOD,
+        np.where(bad_hours_counts == hours_per_day, RATING_BAD, RATING_MEDIOCRE)
+    ).astype(np.int8)
+    
+    return day_rating_codes, good_hours_counts
@@ -1,12 +1,110 @@
 """
 Module for analyzing weather and marine data and assessing boating conditions.
 """
+import numpy as np
 import pandas as pd
 from datetime import datetime
-import astral
-from astral.sun import sun
+from functools import lru_cache
 from astral import LocationInfo
 import calculations
+import forecast_result
+import solar
+import tracing
+
+# Open-Meteo hourly variables passed through to the results, per API
+REQUIRED_VARIABLES = {
+    "marine": [],
+    "weather": list(forecast_result.PASS_THROUGH_METRICS)
+}
+
+# Default daylight window as (hours before sunrise, hours after sunset)
+DAYLIGHT_WINDOW = (1, 0)
+
+def daylight_mask(seconds, sunrises, sunsets, daylight_window=DAYLIGHT_WINDOW):
+    """
+    Find the hours that fall inside the daylight window of their day.
+    
+    An hour is kept when it starts between sunrise minus the first window
+    value and sunset plus the second. When sunset falls on the next UTC day
+    (so the day's sunset comes before its sunrise), the window wraps around
+    UTC midnight.
+    
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour
+        sunrises (np.ndarray): Sunrise (UTC epoch seconds) of each hour's day
+        sunsets (np.ndarray): Sunset (UTC epoch seconds) of each hour's day
+        daylight_window (tuple): (hours before sunrise, hours after sunset)
+        
+    Returns:
+        np.ndarray: Boolean mask over hours
+    """
+    hours_before_sunrise, hours_after_sunset = daylight_window
+    after_start = seconds >= sunrises - int(hours_before_sunrise * 3600)
+    before_end = seconds <= sunsets + int(hours_after_sunset * 3600)
+    return np.where(sunsets >= sunrises, after_start & before_end, after_start | before_end)
+
+def split_days(seconds):
+    """
+    Split time ordered hours into UTC days.
+    
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour, in time order
+        
+    Returns:
+        tuple: (day_numbers, day_starts) where day_numbers holds the UTC day
+            of every hour and day_starts the index of each day's first hour
+    """
+    day_numbers = seconds // 86400
+    day_starts = np.flatnonzero(np.r_[True, day_numbers[1:] != day_numbers[:-1]])[:len(seconds)]
+    return day_numbers, day_starts
+
+def daylight_hours(seconds, day_starts, sunrises, sunsets, daylight_window):
+    """
+    Find the hours inside the daylight window, from per-day sunrise/sunset.
+    
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour, in time order
+        day_starts (np.ndarray): Index of each day's first hour
+        sunrises (np.ndarray): Sunrise (UTC epoch seconds) per day
+        sunsets (np.ndarray): Sunset (UTC epoch seconds) per day
+        daylight_window (tuple): (hours before sunrise, hours after sunset)
+        
+    Returns:
+        np.ndarray: Boolean mask over hours (see daylight_mask)
+    """
+    hours_per_day = np.diff(np.append(day_starts, len(seconds)))
+    return daylight_mask(
+        seconds,
+        np.repeat(sunrises, hours_per_day),
+        np.repeat(sunsets, hours_per_day),
+        daylight_window
+    )
+
+def trim_to_daylight(seconds, columns, sunrises, sunsets, daylight_window):
+    """
+    Drop the hours outside the daylight window, and the days left without hours.
+    
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour, in time order
+        columns (dict): Hourly variable name to values over the same hours
+        sunrises (np.ndarray): Sunrise (UTC epoch seconds) per day
+        sunsets (np.ndarray): Sunset (UTC epoch seconds) per day
+        daylight_window (tuple): (hours before sunrise, hours after sunset)
+        
+    Returns:
+        tuple: (seconds, columns, sunrises, sunsets) over the kept hours and days
+    """
+    if len(seconds) == 0:
+        return seconds, columns, sunrises, sunsets
+    _, day_starts = split_days(seconds)
+    keep = daylight_hours(seconds, day_starts, sunrises, sunsets, daylight_window)
+    kept_days = np.add.reduceat(keep.astype(np.int64), day_starts) > 0
+    return (
+        seconds[keep],
+        {name: values[keep] for name, values in columns.items()},
+        sunrises[kept_days],
+        sunsets[kept_days]
+    )
 
 def get_location_info(loc_data):
     """
@@ -18,18 +116,32 @@ def get_location_info(loc_data):
     Returns:
         LocationInfo: Astral location info object
     """
+    return _cached_location_info(
+        loc_data["name"],
+        loc_data["region"],
+        loc_data["timezone"],
+        loc_data["latitude"],
+        loc_data["longitude"]
+    )
+
+@lru_cache(maxsize=None)
+def _cached_location_info(name, region, timezone, latitude, longitude):
+    """Build (once per location) the astral LocationInfo for get_location_info."""
     return LocationInfo(
-        name=loc_data["name"],
-        region=loc_data["region"],
-        timezone=loc_data["timezone"],
-        latitude=loc_data["latitude"],
-        longitude=loc_data["longitude"]
+        name=name,
+        region=region,
+        timezone=timezone,
+        latitude=latitude,
+        longitude=longitude
     )
 
 def get_sunrise_sunset(date, location_info):
     """
     Get sunrise and sunset times for the given date and location.
     
+    Times come from the shared solar table, so each location-date is only
+    computed once.
+    
     Args:
         date (date): Date to get sunrise/sunset for
         location_info (LocationInfo): Astral location info
@@ -37,10 +149,65 @@ def get_sunrise_sunset(date, location_info):
     Returns:
         tuple: (sunrise, sunset) datetime objects
     """
-    s = sun(location_info.observer, date=date)
-    return s['sunrise'], s['sunset']
+    return solar.get_table().sunrise_sunset(location_info.latitude, location_info.longitude, date)
+
+def _epoch_seconds(df):
+    """Return a frame's 'date' column as UTC epoch seconds."""
+    return df['date'].values.astype('datetime64[s]').astype(np.int64)
+
+def _regular_step(seconds):
+    """Return the spacing of an evenly spaced time series, or None if it is irregular."""
+    if len(seconds) < 2:
+        return None
+    step = seconds[1] - seconds[0]
+    if step <= 0 or (np.diff(seconds) != step).any():
+        return None
+    return int(step)
+
+def align_frames(marine_df, weather_df):
+    """
+    Inner-join the marine and weather frames on their 'date' column.
+    
+    Both frames are regular hourly ranges, so the overlapping window is
+    computed once from their first and last timestamps and every column is
+    sliced to it; the slices are views, nothing is copied or hashed. Frames
+    that are not regular ranges on the same time grid fall back to pd.merge.
+    
+    Args:
+        marine_df (DataFrame): Marine forecast data
+        weather_df (DataFrame): Weather forecast data
+        
+    Returns:
+        tuple: (seconds, columns) where seconds holds the UTC epoch seconds of
+            the common hours and columns maps every other column name to its
+            values over those hours
+    """
+    marine_seconds = _epoch_seconds(marine_df)
+    weather_seconds = _epoch_seconds(weather_df)
+    step = _regular_step(marine_seconds)
+    
+    if (step is None or _regular_step(weather_seconds) != step
+            or (weather_seconds[0] - marine_seconds[0]) % step):
+        merged_df = pd.merge(marine_df, weather_df, on='date', how='inner')
+        columns = {name: merged_df[name].to_numpy() for name in merged_df.columns if name != 'date'}
+        return _epoch_seconds(merged_df), columns
+    
+    # Common window [start, end] and its position in each frame
+    start = max(marine_seconds[0], weather_seconds[0])
+    end = min(marine_seconds[-1], weather_seconds[-1])
+    count = max(0, (end - start) // step + 1)
+    
+    columns = {}
+    for df, df_seconds in ((marine_df, marine_seconds), (weather_df, weather_seconds)):
+        offset = (start - df_seconds[0]) // step
+        for name in df.columns:
+            if name != 'date':
+                columns[name] = df[name].to_numpy()[offset:offset + count]
+    
+    offset = (start - marine_seconds[0]) // step
+    return marine_seconds[offset:offset + count], columns
 
-def analyze_conditions(marine_df, weather_df, location_info):
+def analyze_conditions(marine_df, weather_df, location_info, daylight_window=None, state=None):
     """
     Analyze boating conditions from marine and weather data.
     
@@ -48,73 +215,175 @@ def analyze_conditions(marine_df, weather_df, location_info):
         marine_df (DataFrame): Marine forecast data
         weather_df (DataFrame): Weather forecast data
         location_info (LocationInfo): Location information
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset); when given, only hours inside that window are rated,
+            counted toward the day rating and kept in the results
+        state (AnalysisState): Optional analysis state; only days whose
+            inputs changed since the previous run are re-rated (see
+            analysis_state)
         
     Returns:
-        dict: Results dictionary with daily and hourly assessments
-    """
-    # Merge dataframes on datetime
-    merged_df = pd.merge(
-        marine_df, 
-        weather_df,
-        on='date',
-        how='inner'
-    )
-    
-    # Create results container
-    results = {}
+        LocationForecast: Columnar daily and hourly assessments (also usable
+            as the `{date: {...}}` results dictionary)
+    """
+    # Join the frames on their common hourly window
+    with tracing.span("merge", location=location_info.name) as span:
+        seconds, columns = align_frames(marine_df, weather_df)
+        span.set(rows=len(seconds))
+    return analyze_columns(seconds, columns, location_info, daylight_window, state)
+
+def analyze_columns(seconds, columns, location_info, daylight_window=None, state=None):
+    """
+    Analyze boating conditions from already aligned hourly arrays.
     
-    # Group by date (YYYY-MM-DD) to assess daily conditions
-    for day, day_data in merged_df.groupby(merged_df['date'].dt.date):
-        date_str = day.strftime("%Y-%m-%d")
-        sunrise, sunset = get_sunrise_sunset(day, location_info)
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour, in time order
+        columns (dict): Hourly variable name to values over the same hours
+            (as returned by align_frames)
+        location_info (LocationInfo): Location information (only name,
+            latitude and longitude are used)
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset), see analyze_conditions
+        state (AnalysisState): Optional analysis state, see analyze_conditions
         
-        # Assess each hour
-        hourly_assessments = []
+    Returns:
+        LocationForecast: Columnar daily and hourly assessments
+    """
+    with tracing.span("analyze", location=location_info.name, rows=len(seconds)) as span:
+        if state is not None:
+            forecast = state.analyze(seconds, columns, location_info, daylight_window)
+        else:
+            forecast = rate_columns(seconds, columns, location_info, daylight_window)
+        span.set(days=len(forecast.dates), rated_hours=len(forecast.time))
+    return forecast
+
+def rate_columns(seconds, columns, location_info, daylight_window=None):
+    """
+    Rate aligned hourly arrays in one pass (analyze_columns without the
+    analysis state or the tracing span).
+    
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour, in time order
+        columns (dict): Hourly variable name to values over the same hours
+        location_info (LocationInfo): Location information (only latitude
+            and longitude are used)
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset), see analyze_conditions
         
-        for _, hour_data in day_data.iterrows():
-            hour_str = hour_data['date'].strftime("%H:%M")
-            
-            # Convert measurements to required units
-            wave_height_ft = calculations.convert_wave_height_to_feet(hour_data['wave_height'])
-            wind_speed_mph = calculations.convert_wind_speed_to_mph(hour_data['wind_speed_10m'])
-            wind_gust_mph = calculations.convert_wind_speed_to_mph(hour_data['wind_gusts_10m'])
-            wave_period = hour_data['wave_period']
-            
-            # Use calculations module to assess conditions
-            rating = calculations.assess_hour_condition(
-                wave_height_ft, 
-                wind_speed_mph, 
-                wind_gust_mph, 
-                wave_period, 
-                hour_data['wave_height']
-            )
-                
-            # Store hourly assessment
-            hourly_assessments.append({
-                "time": hour_str,
-                "rating": rating,
-                "wave_height_ft": round(wave_height_ft, 1),
-                "wind_speed_mph": round(wind_speed_mph, 1),
-                "wind_gust_mph": round(wind_gust_mph, 1),
-                "wave_period_sec": round(wave_period, 1),
-                "precipitation_probability": hour_data.get('precipitation_probability', 0),
-                "visibility": hour_data.get('visibility', None),
-                "rain": hour_data.get('rain', 0)
-            })
+    Returns:
+        LocationForecast: Columnar daily and hourly assessments
+    """
+    if len(seconds) == 0:
+        return forecast_result.LocationForecast.empty()
+    
+    # Look up sunrise/sunset for all days at once
+    day_numbers, day_starts = split_days(seconds)
+    sunrises, sunsets = solar.get_table().lookup(
+        location_info.latitude, location_info.longitude, day_numbers[day_starts]
+    )
+    
+    # Drop the hours outside the daylight window (and days left without hours)
+    if daylight_window is not None:
+        seconds, columns, sunrises, sunsets = trim_to_daylight(
+            seconds, columns, sunrises, sunsets, daylight_window
+        )
+        if len(seconds) == 0:
+            return forecast_result.LocationForecast.empty()
+        day_numbers, day_starts = split_days(seconds)
+    
+    # Rate every hour in one vectorized pass
+    rating_codes = calculations.assess_hour_conditions(
+        columns['wave_height'],
+        columns['wave_period'],
+        columns['wind_speed_10m'],
+        columns['wind_gusts_10m']
+    )
+    
+    # Converted metrics (computed in float64 like the scalar path), rounded for the report
+    metrics = {
+        "wave_height_ft": calculations.convert_wave_height_to_feet(
+            columns['wave_height'].astype(np.float64)
+        ),
+        "wind_speed_mph": calculations.convert_wind_speed_to_mph(
+            columns['wind_speed_10m'].astype(np.float64)
+        ),
+        "wind_gust_mph": calculations.convert_wind_speed_to_mph(
+            columns['wind_gusts_10m'].astype(np.float64)
+        ),
+        "wave_period_sec": columns['wave_period'].astype(np.float64)
+    }
+    metrics = {name: np.round(values, 1) for name, values in metrics.items()}
+    
+    # Pass-through columns (views fall back to their defaults when not fetched)
+    for name in forecast_result.PASS_THROUGH_METRICS:
+        if name in columns:
+            metrics[name] = columns[name]
+    
+    # Reduce hourly ratings to day ratings in one pass
+    day_codes, good_hours_counts = calculations.determine_day_ratings(rating_codes, day_starts)
+    
+    return forecast_result.LocationForecast(
+        [forecast_result.format_date(day) for day in day_numbers[day_starts].tolist()],
+        day_starts,
+        day_codes,
+        good_hours_counts,
+        sunrises,
+        sunsets,
+        seconds,
+        rating_codes,
+        metrics
+    )
+
+def analyze_profiles(marine_df, weather_df, compiled_profiles, location_info=None, daylight_window=None):
+    """
+    Rate the hours and days of one location for several rating profiles.
+    
+    The frames are aligned once and every profile is evaluated in a single
+    broadcast pass (see rating_profiles.CompiledProfiles.rate).
+    
+    Args:
+        marine_df (DataFrame): Marine forecast data
+        weather_df (DataFrame): Weather forecast data
+        compiled_profiles (CompiledProfiles): Profiles from
+            rating_profiles.compile_profiles
+        location_info (LocationInfo): Location information (needed for the
+            daylight window)
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset), see analyze_conditions
         
-        # Determine overall day rating using calculations module
-        day_rating, good_hours_count = calculations.determine_day_rating(hourly_assessments)
-            
-        # Store daily results with hourly assessments
-        results[date_str] = {
-            "day_rating": day_rating,
-            "sunrise": sunrise.strftime("%H:%M"),
-            "sunset": sunset.strftime("%H:%M"),
-            "good_hours_count": good_hours_count,
-            "hourly": hourly_assessments
-        }
-    
-    return results
+    Returns:
+        dict: 'profiles' (names), 'dates', 'time' (UTC epoch seconds per hour),
+            'rating' (profiles x hours codes), 'day_rating' and
+            'good_hours_count' (profiles x days)
+    """
+    seconds, columns = align_frames(marine_df, weather_df)
+    
+    # Drop the hours outside the daylight window, like rate_columns
+    if daylight_window is not None:
+        day_numbers, day_starts = split_days(seconds)
+        sunrises, sunsets = solar.get_table().lookup(
+            location_info.latitude, location_info.longitude, day_numbers[day_starts]
+        )
+        seconds, columns, _, _ = trim_to_daylight(seconds, columns, sunrises, sunsets, daylight_window)
+    day_numbers, day_starts = split_days(seconds)
+    
+    with tracing.span("analyze", profiles=len(compiled_profiles), rows=len(seconds)):
+        rating_codes = compiled_profiles.rate(
+            columns['wave_height'],
+            columns['wave_period'],
+            columns['wind_speed_10m'],
+            columns['wind_gusts_10m']
+        )
+        day_codes, good_hours_counts = calculations.determine_day_ratings(rating_codes, day_starts)
+    
+    return {
+        "profiles": list(compiled_profiles.names),
+        "dates": [forecast_result.format_date(day) for day in day_numbers[day_starts].tolist()],
+        "time": seconds,
+        "rating": rating_codes,
+        "day_rating": day_codes,
+        "good_hours_count": good_hours_counts
+    }
 
 def find_good_days(all_results):
     """
@@ -124,22 +393,19 @@ def find_good_days(all_results):
         all_results (dict): All boating conditions results
         
     Returns:
-        dict: Filtered results with only good days
+        dict: Filtered results with only good days, where each day keeps
+            only its GOOD hours
     """
     good_days_results = {}
     
     for location_name, results in all_results.items():
-        # Filter for good days only
-        good_days = {}
-        for date, data in results.items():
-            if data['day_rating'] in ['GOOD', 'GREAT']:
-                # Clone the data but only include hourly entries with GOOD ratings
-                good_day_data = data.copy()
-                good_hours = [hour for hour in data['hourly'] if hour['rating'] == 'GOOD']
-                good_day_data['hourly'] = good_hours
-                good_days[date] = good_day_data
+        forecast = forecast_result.as_location_forecast(results)
         
-        if good_days:
-            good_days_results[location_name] = good_days
+        # Keep good days, and only the GOOD hours within them
+        good_days_mask = forecast.day_rating == calculations.RATING_GOOD
+        if good_days_mask.any():
+            good_days_results[location_name] = forecast.select(
+                good_days_mask, forecast.rating == calculations.RATING_GOOD
+            )
     
-    return good_days_results 
\ No newline at end of file
+    return good_days_results
@@ -2,106 +2,374 @@
 Module for fetching weather and marine data from APIs.
 """
 import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 import pandas as pd
+import calculations
+import data_analyzer
+import meteo_client
 import meteo_marine
 import meteo_weather
+import tracing
 
-def fetch_weather_data(latitude, longitude):
+# Maximum number of coordinates sent in a single Open-Meteo request.
+# Open-Meteo accepts comma-separated coordinate lists; keeping chunks small
+# keeps the request URL well under server limits.
+BATCH_SIZE = 50
+
+# Maximum number of Open-Meteo requests in flight at once
+MAX_FETCH_WORKERS = 8
+
+# Pipeline stages that declare the hourly variables they read (REQUIRED_VARIABLES).
+# Only these variables are requested from Open-Meteo.
+PIPELINE_STAGES = (calculations, data_analyzer)
+
+# Decoded frames per (url, request params, model grid point), shared by all
+# locations Open-Meteo answers from the same grid point. Entries expire with
+# the HTTP cache (meteo_client.CACHE_EXPIRE_AFTER) and the least recently used
+# ones are dropped beyond CELL_CACHE_MAX_ENTRIES, so a warm Lambda or a
+# long-running process does not keep every frame it ever decoded.
+CELL_CACHE_MAX_ENTRIES = 1024
+_cell_cache = OrderedDict()
+_cell_cache_lock = threading.Lock()
+
+# Model grid point Open-Meteo answered each requested coordinate with, per
+# (url, request params, coordinate). Coordinates are always requested exactly;
+# this is only learned from responses, never assumed. Bounded like the frames.
+GRID_POINT_CACHE_MAX_ENTRIES = 16384
+_grid_points = OrderedDict()
+
+def _remember(cache, key, value, max_entries):
+    """Store a cache entry as most recently used, dropping the oldest beyond max_entries."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+def _drop_expired_cells(now):
+    """Drop every cached frame older than the HTTP cache expiry."""
+    expired = [key for key, (fetched_at, _) in _cell_cache.items()
+               if now - fetched_at >= meteo_client.CACHE_EXPIRE_AFTER]
+    for key in expired:
+        del _cell_cache[key]
+
+def _hourly_date_range(hourly):
     """
-    Fetch weather data for the given location.
-    
+    Build the hourly DatetimeIndex for an Open-Meteo hourly block.
+
     Args:
-        latitude (float): Location latitude
-        longitude (float): Location longitude
-        
+        hourly (VariablesWithTime): Hourly block of an Open-Meteo response
+
     Returns:
-        pd.DataFrame: Weather data with hourly forecasts
+        pd.DatetimeIndex: UTC timestamps for every hourly value
     """
-    # Make a copy of the meteo_weather module's params and update coordinates
-    params = copy.deepcopy(meteo_weather.params)
-    params["latitude"] = latitude
-    params["longitude"] = longitude
-    
-    # Use the Open-Meteo client to get weather data
-    responses = meteo_weather.openmeteo.weather_api(meteo_weather.url, params=params)
-    response = responses[0]
-    
-    # Process the data
-    hourly = response.Hourly()
-    hourly_wind_speed_10m = hourly.Variables(0).ValuesAsNumpy()
-    hourly_wind_gusts_10m = hourly.Variables(1).ValuesAsNumpy()
-    hourly_precipitation_probability = hourly.Variables(2).ValuesAsNumpy()
-    hourly_wind_direction_10m = hourly.Variables(3).ValuesAsNumpy()
-    hourly_visibility = hourly.Variables(4).ValuesAsNumpy()
-    hourly_rain = hourly.Variables(5).ValuesAsNumpy()
-    
-    hourly_data = {"date": pd.date_range(
+    return pd.date_range(
         start = pd.to_datetime(hourly.Time(), unit = "s", utc = True),
         end = pd.to_datetime(hourly.TimeEnd(), unit = "s", utc = True),
         freq = pd.Timedelta(seconds = hourly.Interval()),
         inclusive = "left"
-    )}
-    
-    hourly_data["wind_speed_10m"] = hourly_wind_speed_10m
-    hourly_data["wind_gusts_10m"] = hourly_wind_gusts_10m
-    hourly_data["precipitation_probability"] = hourly_precipitation_probability
-    hourly_data["wind_direction_10m"] = hourly_wind_direction_10m
-    hourly_data["visibility"] = hourly_visibility
-    hourly_data["rain"] = hourly_rain
-    
+    )
+
+@lru_cache(maxsize=None)
+def _variable_names():
+    """Map Open-Meteo SDK variable enum values to their names."""
+    from openmeteo_sdk.Variable import Variable
+    return {value: name for name, value in vars(Variable).items() if not name.startswith('_')}
+
+def variable_name(variable):
+    """
+    Return the API name of a response variable, e.g. 'wind_speed_10m'.
+
+    Args:
+        variable (VariableWithValues): Variable block of an Open-Meteo response
+
+    Returns:
+        str: Hourly variable name as used in request params
+    """
+    name = _variable_names().get(variable.Variable(), str(variable.Variable()))
+    if variable.Altitude():
+        name += f"_{variable.Altitude()}m"
+    return name
+
+def response_to_dataframe(response, variables):
+    """
+    Convert a single Open-Meteo response to a DataFrame.
+
+    Values are matched to the requested variables by name rather than by
+    their position in the response.
+
+    Args:
+        response (WeatherApiResponse): Response for one location
+        variables (list): Hourly variable names that were requested
+
+    Returns:
+        pd.DataFrame: Hourly forecasts with a 'date' column plus one column per variable
+    """
+    hourly = response.Hourly()
+    values_by_name = {}
+    for i in range(hourly.VariablesLength()):
+        variable = hourly.Variables(i)
+        values_by_name.setdefault(variable_name(variable), variable.ValuesAsNumpy())
+
+    missing = [name for name in variables if name not in values_by_name]
+    if missing:
+        raise ValueError(f"Open-Meteo response is missing hourly variables: {', '.join(missing)}")
+
+    hourly_data = {"date": _hourly_date_range(hourly)}
+    for name in variables:
+        hourly_data[name] = values_by_name[name]
+
     return pd.DataFrame(data = hourly_data)
 
-def fetch_marine_data(latitude, longitude):
+def required_variables(api, stages=PIPELINE_STAGES):
+    """
+    Collect the hourly variables the pipeline stages need from one API.
+
+    Each stage module declares a REQUIRED_VARIABLES dict mapping the API
+    ('marine' or 'weather') to the hourly variables it reads.
+
+    Args:
+        api (str): 'marine' or 'weather'
+        stages (tuple): Stage modules to collect from
+
+    Returns:
+        list: Variable names in declaration order, without duplicates
+    """
+    variables = []
+    for stage in stages:
+        for name in getattr(stage, "REQUIRED_VARIABLES", {}).get(api, []):
+            if name not in variables:
+                variables.append(name)
+    return variables
+
+def chunks(items, size):
+    """Yield successive slices of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _request_params(module, api, variables):
+    """Copy an API module's params, requesting only the given hourly variables."""
+    params = copy.deepcopy(module.params)
+    params["hourly"] = list(variables) if variables is not None else required_variables(api)
+    return params
+
+def request_points(locations_list):
+    """
+    Map locations to the distinct coordinates to request.
+
+    Coordinates are requested exactly as given; only locations at the same
+    coordinates share a request slot.
+
+    Args:
+        locations_list (list): Location data dictionaries
+
+    Returns:
+        tuple: (points, point_index) where points is a sorted list of distinct
+            (latitude, longitude) coordinates and point_index[i] is the
+            position of location i's coordinates in that list
+    """
+    location_points = [(loc["latitude"], loc["longitude"]) for loc in locations_list]
+    # Sorted so the same locations always produce the same (cacheable) requests
+    points = sorted(set(location_points))
+    position = {point: i for i, point in enumerate(points)}
+    return points, [position[point] for point in location_points]
+
+def _request_key(module, params):
+    """Key of an API's request params, without the coordinates."""
+    return module.url, tuple(
+        (key, tuple(value) if isinstance(value, list) else value)
+        for key, value in sorted(params.items())
+        if key not in ("latitude", "longitude")
+    )
+
+def response_grid_point(response):
+    """
+    Return the model grid point Open-Meteo answered a request with.
+
+    Args:
+        response (WeatherApiResponse): Response for one location
+
+    Returns:
+        tuple: (latitude, longitude, elevation) of the grid point used
+    """
+    return (round(response.Latitude(), 6), round(response.Longitude(), 6), round(response.Elevation(), 1))
+
+def _cached_point_frames(request, points):
+    """Return {position: DataFrame} for points whose grid point frame is cached and fresh."""
+    now = time.monotonic()
+    frames = {}
+    with _cell_cache_lock:
+        _drop_expired_cells(now)
+        for i, point in enumerate(points):
+            grid_point = _grid_points.get((request, point))
+            if grid_point is None or (request, grid_point) not in _cell_cache:
+                continue
+            _grid_points.move_to_end((request, point))
+            _cell_cache.move_to_end((request, grid_point))
+            frames[i] = _cell_cache[(request, grid_point)][1]
+    return frames
+
+def _fetch_cells(module, api, points, variables=None):
+    """
+    Fetch one API for a list of coordinates in a single request.
+
+    Coordinates whose model grid point is known from an earlier response and
+    whose decoded frame is still cached are not requested again; responses
+    from the same grid point are decoded once.
+
+    Args:
+        module (module): meteo_weather or meteo_marine (provides url/params/client)
+        api (str): 'marine' or 'weather', used to resolve required variables
+        points (list): (latitude, longitude) coordinates
+        variables (list): Hourly variables to fetch (default: required_variables(api))
+
+    Returns:
+        list: DataFrames in the same order as `points`
+    """
+    params = _request_params(module, api, variables)
+    request = _request_key(module, params)
+    frames = _cached_point_frames(request, points)
+    missing = [i for i in range(len(points)) if i not in frames]
+
+    if missing:
+        params["latitude"] = [points[i][0] for i in missing]
+        params["longitude"] = [points[i][1] for i in missing]
+
+        # Open-Meteo returns one response per coordinate, in request order
+        with tracing.span("fetch", api=api, cells=len(points),
+                          cache_hits=len(points) - len(missing), cache_misses=len(missing)):
+            responses = module.get_client().weather_api(module.url, params=params)
+        if len(responses) != len(missing):
+            raise ValueError(
+                f"Expected {len(missing)} responses from {module.url}, got {len(responses)}"
+            )
+
+        fetched_at = time.monotonic()
+        decoded = {}
+        with tracing.span("decode", api=api, cells=len(missing)) as span:
+            for i, response in zip(missing, responses):
+                grid_point = response_grid_point(response)
+                if grid_point not in decoded:
+                    decoded[grid_point] = response_to_dataframe(response, params["hourly"])
+                    span.add("rows", len(decoded[grid_point]))
+                    if tracing.enabled():
+                        span.add("bytes", int(decoded[grid_point].memory_usage(index=False).sum()))
+                frames[i] = decoded[grid_point]
+                with _cell_cache_lock:
+                    _remember(_grid_points, (request, points[i]), grid_point, GRID_POINT_CACHE_MAX_ENTRIES)
+                    _remember(_cell_cache, (request, grid_point), (fetched_at, frames[i]), CELL_CACHE_MAX_ENTRIES)
+    else:
+        with tracing.span("fetch", api=api, cells=len(points), cache_hits=len(points), cache_misses=0):
+            pass  # Every grid point came from the cell cache
+
+    return [frames[i] for i in range(len(points))]
+
+def _fetch_batch(module, api, locations_list, batch_size, variables=None):
+    """
+    Fetch one API for many locations, one request per chunk of coordinates.
+
+    Locations at the same coordinates are fetched once.
+
+    Args:
+        module (module): meteo_weather or meteo_marine (provides url/params/client)
+        api (str): 'marine' or 'weather', used to resolve required variables
+        locations_list (list): Location data dictionaries
+        batch_size (int): Maximum number of coordinates per request
+        variables (list): Hourly variables to fetch (default: required_variables(api))
+
+    Returns:
+        list: DataFrames in the same order as `locations_list`
+    """
+    points, point_index = request_points(list(locations_list))
+    point_frames = []
+    for chunk in chunks(points, batch_size):
+        point_frames.extend(_fetch_cells(module, api, chunk, variables))
+    return [point_frames[i] for i in point_index]
+
+def fetch_weather_data(latitude, longitude, variables=None):
+    """
+    Fetch weather data for the given location.
+
+    Args:
+        latitude (float): Location latitude
+        longitude (float): Location longitude
+        variables (list): Hourly variables to fetch (default: what the pipeline needs)
+
+    Returns:
+        pd.DataFrame: Weather data with hourly forecasts
+    """
+    location = {"latitude": latitude, "longitude": longitude}
+    return _fetch_batch(meteo_weather, "weather", [location], 1, variables)[0]
+
+def fetch_marine_data(latitude, longitude, variables=None):
     """
     Fetch marine data for the given location.
-    
+
     Args:
         latitude (float): Location latitude
         longitude (float): Location longitude
-        
+        variables (list): Hourly variables to fetch (default: what the pipeline needs)
+
     Returns:
         pd.DataFrame: Marine data with hourly forecasts
     """
-    # Make a copy of the meteo_marine module's params and update coordinates
-    params = copy.deepcopy(meteo_marine.params)
-    params["latitude"] = latitude
-    params["longitude"] = longitude
-    
-    # Use the Open-Meteo client to get marine data
-    responses = meteo_marine.openmeteo.weather_api(meteo_marine.url, params=params)
-    response = responses[0]
-    
-    # Process the data
-    hourly = response.Hourly()
-    hourly_wave_height = hourly.Variables(0).ValuesAsNumpy()
-    hourly_wind_wave_height = hourly.Variables(1).ValuesAsNumpy()
-    hourly_wind_wave_direction = hourly.Variables(2).ValuesAsNumpy()
-    hourly_wave_direction = hourly.Variables(3).ValuesAsNumpy()
-    hourly_wave_period = hourly.Variables(4).ValuesAsNumpy()
-    hourly_swell_wave_height = hourly.Variables(5).ValuesAsNumpy()
-    hourly_swell_wave_direction = hourly.Variables(6).ValuesAsNumpy()
-    hourly_swell_wave_period = hourly.Variables(7).ValuesAsNumpy()
-    hourly_swell_wave_peak_period = hourly.Variables(8).ValuesAsNumpy()
-    hourly_wind_wave_period = hourly.Variables(9).ValuesAsNumpy()
-    hourly_wind_wave_peak_period = hourly.Variables(10).ValuesAsNumpy()
-    
-    hourly_data = {"date": pd.date_range(
-        start = pd.to_datetime(hourly.Time(), unit = "s", utc = True),
-        end = pd.to_datetime(hourly.TimeEnd(), unit = "s", utc = True),
-        freq = pd.Timedelta(seconds = hourly.Interval()),
-        inclusive = "left"
-    )}
-    
-    hourly_data["wave_height"] = hourly_wave_height
-    hourly_data["wind_wave_height"] = hourly_wind_wave_height
-    hourly_data["wind_wave_direction"] = hourly_wind_wave_direction
-    hourly_data["wave_direction"] = hourly_wave_direction
-    hourly_data["wave_period"] = hourly_wave_period
-    hourly_data["swell_wave_height"] = hourly_swell_wave_height
-    hourly_data["swell_wave_direction"] = hourly_swell_wave_direction
-    hourly_data["swell_wave_period"] = hourly_swell_wave_period
-    hourly_data["swell_wave_peak_period"] = hourly_swell_wave_peak_period
-    hourly_data["wind_wave_period"] = hourly_wind_wave_period
-    hourly_data["wind_wave_peak_period"] = hourly_wind_wave_peak_period
-    
-    return pd.DataFrame(data = hourly_data) 
\ No newline at end of file
+    location = {"latitude": latitude, "longitude": longitude}
+    return _fetch_batch(meteo_marine, "marine", [location], 1, variables)[0]
+
+def fetch_all_locations(locations_list, max_workers=MAX_FETCH_WORKERS, batch_size=BATCH_SIZE):
+    """
+    Fetch weather and marine data for many locations concurrently.
+
+    Locations are reduced to their distinct coordinates, and every chunk of
+    coordinates becomes one request per API on a bounded thread pool. A
+    location is yielded as soon as both of its frames have arrived, so
+    analysis can start before the slowest request finishes.
+
+    Args:
+        locations_list (list): Location data dictionaries
+        max_workers (int): Maximum number of concurrent requests
+        batch_size (int): Maximum number of coordinates per request
+
+    Yields:
+        tuple: (location_index, location_data, weather_df, marine_df)
+    """
+    locations_list = list(locations_list)
+    apis = {"weather": meteo_weather, "marine": meteo_marine}
+    points, point_index = request_points(locations_list)
+
+    # Which locations are waiting on each (api, point)
+    waiting_on = {}
+    outstanding = [0] * len(locations_list)
+    for api in apis:
+        for location_index, point in enumerate(point_index):
+            waiting_on.setdefault((api, point), []).append(location_index)
+            outstanding[location_index] += 1
+
+    frames = {api: {} for api in apis}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        for api, module in apis.items():
+            for start in range(0, len(points), batch_size):
+                chunk = points[start:start + batch_size]
+                futures[executor.submit(_fetch_cells, module, api, chunk)] = (api, start)
+
+        for future in as_completed(futures):
+            api, start = futures[future]
+            for offset, frame in enumerate(future.result()):
+                point = start + offset
+                frames[api][point] = frame
+
+                # Hand over every location whose two frames are now both available
+                for location_index in waiting_on[(api, point)]:
+                    outstanding[location_index] -= 1
+                    if outstanding[location_index] == 0:
+                        yield (
+                            location_index,
+                            locations_list[location_index],
+                            frames["weather"][point_index[location_index]],
+                            frames["marine"][point_index[location_index]]
+                        )
@@ -0,0 +1,301 @@
+"""
+Module for personalized email digests.
+
+Each subscriber only gets the spots they chose. The HTML table of every
+location is rendered once and cached; digests are assembled from those
+fragments, recipients with the same spot selection share one assembled
+document, and every recipient gets a message of their own (no subscriber
+sees another's address). MIME messages are built and sent in batches.
+Sending goes through a pluggable sender (SES in Lambda, a stub for local
+runs and tests).
+"""
+import binascii
+import itertools
+import json
+import os
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.nonmultipart import MIMENonMultipart
+from email.mime.text import MIMEText
+import table_generation
+import tracing
+
+# Number of MIME messages built before they are handed to the sender
+MESSAGE_BATCH_SIZE = 50
+
+# Bytes per base64 line of an HTML part (76 encoded characters)
+_BASE64_LINE_BYTES = 57
+
+def load_subscriptions(value=None):
+    """
+    Load subscriber spot selections.
+
+    The JSON maps each email address to the list of location names it wants,
+    e.g. {"a@example.com": ["San Juan", "Cabo Rojo"]}. It is read from the
+    SUBSCRIPTIONS environment variable, or from the file named by
+    SUBSCRIPTIONS_FILE.
+
+    Args:
+        value (str): JSON text to parse instead of the environment
+
+    Returns:
+        dict: Email address to list of location names, or None when no
+            subscriptions are configured
+    """
+    if value is None:
+        value = os.environ.get("SUBSCRIPTIONS")
+    if not value and os.environ.get("SUBSCRIPTIONS_FILE"):
+        with open(os.environ["SUBSCRIPTIONS_FILE"]) as f:
+            value = f.read()
+    if not value:
+        return None
+    return {email.strip(): list(spots) for email, spots in json.loads(value).items()}
+
+def group_subscribers(subscriptions, all_results):
+    """
+    Group recipients that chose the same spots.
+
+    Unknown location names are ignored, and spots are kept in report order so
+    selections that only differ in order are grouped together.
+
+    Args:
+        subscriptions (dict): Email address to list of location names
+        all_results (dict): Location names to results, in report order
+
+    Returns:
+        dict: Tuple of location names to list of email addresses
+    """
+    report_order = {name: i for i, name in enumerate(all_results)}
+    groups = {}
+    for email, spots in subscriptions.items():
+        selection = tuple(sorted(
+            {spot for spot in spots if spot in report_order}, key=report_order.get
+        ))
+        if selection:
+            groups.setdefault(selection, []).append(email)
+    return groups
+
+class FragmentCache:
+    """
+    Rendered HTML table per location, rendered on first use.
+
+    Args:
+        all_results (dict): Location names to results
+        trim_empty_hours (bool): Passed to table_generation.render_location_table
+        column_caches (dict): Optional location name to column cache, passed
+            to table_generation.render_location_table
+    """
+
+    def __init__(self, all_results, trim_empty_hours=False, column_caches=None):
+        self.all_results = all_results
+        self.trim_empty_hours = trim_empty_hours
+        self.column_caches = column_caches
+        self._fragments = {}
+
+    def __getitem__(self, location_name):
+        if location_name not in self._fragments:
+            with tracing.span("render", location=location_name) as span:
+                self._fragments[location_name] = table_generation.render_location_table(
+                    location_name, self.all_results[location_name], self.trim_empty_hours,
+                    self.column_caches.get(location_name) if self.column_caches is not None else None
+                )
+                span.set(bytes=len(self._fragments[location_name]))
+        return self._fragments[location_name]
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def document(self, location_names):
+        """
+        Assemble the HTML report for a selection of locations.
+
+        Args:
+            location_names (iterable): Locations to include, in order
+
+        Returns:
+            str: Complete HTML document
+        """
+        return "".join([
+            table_generation.HTML_DOCUMENT_START,
+            *(self[name] for name in location_names),
+            table_generation.HTML_DOCUMENT_END
+        ])
+
+def html_part(fragments):
+    """
+    Build a text/html MIME part from a stream of HTML fragments.
+
+    Each fragment is base64-encoded into the payload as it arrives, so the
+    HTML itself is never joined into one string; only the encoded payload
+    (which SES needs in full anyway) is held.
+
+    Args:
+        fragments (iterable): Consecutive str fragments of the HTML document
+
+    Returns:
+        MIMENonMultipart: The HTML part, UTF-8 and base64 encoded
+    """
+    part = MIMENonMultipart('text', 'html', charset='utf-8')
+    part['Content-Transfer-Encoding'] = 'base64'
+    lines = []
+    pending = b''
+    for fragment in fragments:
+        pending += fragment.encode('utf-8')
+        # Encode whole lines now, keep the remainder for the next fragment
+        whole = len(pending) - len(pending) % _BASE64_LINE_BYTES
+        for start in range(0, whole, _BASE64_LINE_BYTES):
+            lines.append(binascii.b2a_base64(pending[start:start + _BASE64_LINE_BYTES]).decode('ascii'))
+        pending = pending[whole:]
+    if pending:
+        lines.append(binascii.b2a_base64(pending).decode('ascii'))
+    part.set_payload(''.join(lines))
+    return part
+
+def build_message(html_content, sender_email, recipient_emails):
+    """
+    Build the report email.
+
+    Args:
+        html_content (str or iterable): HTML content for the email body, or
+            a stream of HTML fragments (see html_part)
+        sender_email (str): Email address to send from
+        recipient_emails (list): Email addresses to send to
+
+    Returns:
+        MIMEMultipart: The email message
+    """
+    # Create message container
+    msg = MIMEMultipart('alternative')
+
+    # Create today's date for the subject line
+    today = datetime.now().strftime("%m/%d/%Y")
+
+    msg['Subject'] = f"Boating Conditions Report - {today}"
+    msg['From'] = sender_email
+    msg['To'] = ', '.join(recipient_emails)  # Join all recipients with commas
+
+    # Attach HTML content to the email
+    if isinstance(html_content, str):
+        msg.attach(MIMEText(html_content, 'html'))
+    else:
+        msg.attach(html_part(html_content))
+    return msg
+
+class SesSender:
+    """Send messages with AWS SES, reusing one client for every message."""
+
+    def __init__(self, ses_client=None):
+        if ses_client is None:
+            import boto3
+            ses_client = boto3.client('ses')
+        self.ses = ses_client
+
+    def send(self, msg, recipient_emails):
+        """
+        Send one message.
+
+        Args:
+            msg (MIMEMultipart): Message to send
+            recipient_emails (list): Email addresses to deliver to
+
+        Returns:
+            str: SES message ID, or None if sending failed
+        """
+        # Print debug info
+        print(f"Sending from: {msg['From']}")
+        print(f"Sending to: {', '.join(recipient_emails)}")
+
+        try:
+            response = self.ses.send_raw_email(
+                Source=msg['From'],
+                Destinations=recipient_emails,  # List of all recipients
+                RawMessage={'Data': msg.as_string()}
+            )
+            print(f"Email sent! Message ID: {response['MessageId']}")
+            return response['MessageId']
+        except Exception as e:
+            print(f"Error sending email: {e}")
+            return None
+
+class StubSender:
+    """Collect messages instead of sending them (local runs and tests)."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg, recipient_emails):
+        """Record one message and return a fake message ID."""
+        self.sent.append((msg, list(recipient_emails)))
+        print(f"[stub] Would send to: {', '.join(recipient_emails)}")
+        return f"stub-{len(self.sent)}"
+
+def get_sender(name=None):
+    """
+    Create the sender named by the EMAIL_SENDER environment variable.
+
+    Args:
+        name (str): 'ses' (default) or 'stub'; overrides the environment
+
+    Returns:
+        SesSender or StubSender: Sender with a send(msg, recipient_emails) method
+
+    Raises:
+        ValueError: if the name is unknown
+    """
+    name = (name or os.environ.get("EMAIL_SENDER") or "ses").lower()
+    if name == "ses":
+        return SesSender()
+    if name == "stub":
+        return StubSender()
+    raise ValueError(f"Unknown email sender: {name}")
+
+def send_digests(all_results, sender_email, subscriptions, sender=None,
+                 trim_empty_hours=False, batch_size=MESSAGE_BATCH_SIZE, column_caches=None):
+    """
+    Send every subscriber a report with only their chosen spots.
+
+    Each location is rendered at most once, whatever the number of
+    subscribers, and each distinct selection is assembled once; every
+    subscriber gets their own message, addressed only to them.
+
+    Args:
+        all_results (dict): Location names to results
+        sender_email (str): Email address to send from
+        subscriptions (dict): Email address to list of location names
+        sender (object): Sender with a send(msg, recipient_emails) method
+            (default: get_sender())
+        trim_empty_hours (bool): Leave out hour rows without data
+        batch_size (int): Number of messages built before sending them
+        column_caches (dict): Optional location name to column cache (see
+            table_generation.render_location_table)
+
+    Returns:
+        list: (recipient_emails, message_id) per message sent
+    """
+    if sender is None:
+        sender = get_sender()
+    fragments = FragmentCache(all_results, trim_empty_hours, column_caches)
+
+    def messages():
+        # One shared document per selection, one message per recipient
+        for selection, recipients in group_subscribers(subscriptions, all_results).items():
+            document = fragments.document(selection)
+            for recipient in recipients:
+                yield build_message(document, sender_email, [recipient]), [recipient]
+
+    sent = []
+    pending = messages()
+    while True:
+        # Build a batch of messages, then hand them to the sender
+        batch = list(itertools.islice(pending, batch_size))
+        if not batch:
+            break
+        for msg, recipients in batch:
+            with tracing.span("email", recipients=len(recipients)) as span:
+                sent.append((recipients, sender.send(msg, recipients)))
+                if tracing.enabled():
+                    span.set(bytes=len(msg.as_string()))
+
+    print(f"Sent {len(sent)} digests to {len(subscriptions)} subscribers "
+          f"({len(fragments)} locations rendered)")
+    return sent
@@ -0,0 +1,327 @@
+"""
+Module for ensemble forecasts.
+
+Instead of one deterministic run, every ensemble member (and optionally
+several marine models) is fetched for the same variables. Per location the
+members are stored as (member x hour) float32 arrays, rated together in one
+vectorized pass of the rating engine, and reduced to the probability of
+GOOD conditions per hour and per day.
+
+Locations are processed in chunks, so only one chunk's member arrays are
+held in memory at a time. Requests go through the shared Open-Meteo client,
+so the HTTP cache and the record/replay archive (see recording) apply, and
+the endpoint can point at a local stand-in server (see meteo_ensemble).
+"""
+import copy
+import numpy as np
+import calculations
+import data_analyzer
+import data_fetcher
+import forecast_result
+import meteo_ensemble
+import meteo_marine
+import solar
+import tracing
+
+# Number of locations whose member arrays are held in memory at once
+ENSEMBLE_CHUNK_SIZE = 25
+
+# Hourly variables rated per member, per API
+MARINE_VARIABLES = ["wave_height", "wave_period"]
+WEATHER_VARIABLES = ["wind_speed_10m", "wind_gusts_10m"]
+
+class EnsembleForecast:
+    """
+    Probability of GOOD conditions for one location.
+
+    Attributes:
+        dates (list): 'YYYY-MM-DD' string per day
+        day_starts (np.ndarray): Index of each day's first hour
+        time (np.ndarray): UTC epoch seconds per hour
+        members (int): Number of members rated
+        p_good (np.ndarray): float32 share of members rating each hour GOOD
+        day_p_good (np.ndarray): float32 share of members rating each day GOOD
+    """
+
+    def __init__(self, dates, day_starts, time, members, p_good, day_p_good):
+        self.dates = list(dates)
+        self.day_starts = np.asarray(day_starts, dtype=np.int32)
+        self.time = np.asarray(time, dtype=np.int64)
+        self.members = int(members)
+        self.p_good = np.asarray(p_good, dtype=np.float32)
+        self.day_p_good = np.asarray(day_p_good, dtype=np.float32)
+
+    @classmethod
+    def empty(cls, members=0):
+        """Return a forecast with no days."""
+        return cls([], [], [], members, [], [])
+
+    def day_bounds(self, day_index):
+        """
+        Get the hour range of one day.
+
+        Args:
+            day_index (int): Position of the day in `dates`
+
+        Returns:
+            tuple: (start, end) hour indices, end exclusive
+        """
+        start = int(self.day_starts[day_index])
+        if day_index + 1 < len(self.day_starts):
+            return start, int(self.day_starts[day_index + 1])
+        return start, len(self.time)
+
+    def to_dict(self):
+        """Return `{date: {p_good, hourly: [{time, p_good}]}}` for JSON output."""
+        results = {}
+        for day_index, date in enumerate(self.dates):
+            start, end = self.day_bounds(day_index)
+            results[date] = {
+                "members": self.members,
+                "p_good": round(float(self.day_p_good[day_index]), 3),
+                "hourly": [
+                    {"time": forecast_result.format_hour(epoch), "p_good": round(p_good, 3)}
+                    for epoch, p_good in zip(self.time[start:end].tolist(), self.p_good[start:end].tolist())
+                ]
+            }
+        return results
+
+def response_members(response, variables):
+    """
+    Decode every member of an Open-Meteo response.
+
+    Args:
+        response (WeatherApiResponse): Response for one location
+        variables (list): Hourly variable names that were requested
+
+    Returns:
+        tuple: (seconds, members) where seconds holds the UTC epoch seconds
+            per hour and members maps each variable to a (member x hour)
+            float32 array; row i of every variable is the same member
+
+    Raises:
+        ValueError: if a variable is missing or the variables do not have
+            the same member IDs
+    """
+    hourly = response.Hourly()
+    if hourly.Interval() != 3600:
+        raise ValueError(f"Expected hourly data, got an interval of {hourly.Interval()} s")
+    seconds = np.arange(hourly.Time(), hourly.TimeEnd(), hourly.Interval(), dtype=np.int64)
+
+    values_by_name = {}
+    for i in range(hourly.VariablesLength()):
+        variable = hourly.Variables(i)
+        values_by_name.setdefault(data_fetcher.variable_name(variable), {}).setdefault(
+            variable.EnsembleMember(), variable.ValuesAsNumpy()
+        )
+
+    missing = [name for name in variables if name not in values_by_name]
+    if missing:
+        raise ValueError(f"Open-Meteo response is missing hourly variables: {', '.join(missing)}")
+
+    # Rows are matched across variables by member ID, so every variable must
+    # have exactly the same members
+    member_ids = sorted(values_by_name[variables[0]])
+    for name in variables:
+        if sorted(values_by_name[name]) != member_ids:
+            raise ValueError(
+                f"Open-Meteo response has members {sorted(values_by_name[name])} for {name}, "
+                f"but {member_ids} for {variables[0]}"
+            )
+
+    members = {}
+    for name in variables:
+        by_member = values_by_name[name]
+        members[name] = np.stack([by_member[member] for member in member_ids]).astype(np.float32, copy=False)
+    return seconds, members
+
+def _common_hours(series):
+    """
+    Cut (seconds, members) series to the hours they all cover.
+
+    Returns:
+        tuple: (seconds, list of member dicts) over the common hours
+    """
+    if all(len(seconds) for seconds, _ in series):
+        start = max(int(seconds[0]) for seconds, _ in series)
+        end = min(int(seconds[-1]) for seconds, _ in series) + 3600
+    else:
+        start = end = 0
+    count = max(0, (end - start) // 3600)
+
+    sliced = []
+    for seconds, members in series:
+        offset = (start - int(seconds[0])) // 3600 if count else 0
+        sliced.append({name: values[:, offset:offset + count] for name, values in members.items()})
+    return np.arange(start, start + count * 3600, 3600, dtype=np.int64), sliced
+
+def _stack_models(series):
+    """Join the members of several models over their common hours."""
+    seconds, sliced = _common_hours(series)
+    return seconds, {
+        name: np.concatenate([members[name] for members in sliced]) for name in sliced[0]
+    }
+
+def _fetch_member_cells(module, url, api, cells, variables, models):
+    """
+    Fetch the members of every model for a list of coordinates.
+
+    One request is made per model (each returns one response per coordinate).
+
+    Returns:
+        list: (seconds, members) per cell, with the members of all models stacked
+    """
+    per_cell = [[] for _ in cells]
+    for model in models or [None]:
+        params = copy.deepcopy(module.params)
+        params["hourly"] = list(variables)
+        params["latitude"] = [cell[0] for cell in cells]
+        params["longitude"] = [cell[1] for cell in cells]
+        if model:
+            params["models"] = model
+
+        with tracing.span("fetch", api=api, model=model or "best_match", cells=len(cells)):
+            responses = module.get_client().weather_api(url, params=params)
+        if len(responses) != len(cells):
+            raise ValueError(f"Expected {len(cells)} responses from {url}, got {len(responses)}")
+
+        with tracing.span("decode", api=api, cells=len(cells)) as span:
+            for i, response in enumerate(responses):
+                per_cell[i].append(response_members(response, variables))
+                if tracing.enabled():
+                    span.add("bytes", sum(values.nbytes for values in per_cell[i][-1][1].values()))
+    return [_stack_models(series) for series in per_cell]
+
+def _fetch_cells_batched(module, url, api, cells, variables, models, batch_size):
+    """Fetch member arrays for many coordinates, one request per chunk and model."""
+    fetched = []
+    for chunk in data_fetcher.chunks(cells, batch_size):
+        fetched.extend(_fetch_member_cells(module, url, api, chunk, variables, models))
+    return fetched
+
+def rate_members(seconds, marine_members, weather_members):
+    """
+    Rate every combination of marine and weather member in one pass.
+
+    Marine members (e.g. marine models) and weather members are broadcast
+    against each other, so M marine and W weather members give M * W rated
+    members. The two APIs' members are independent runs, so every pairing
+    is rated and no marine member is matched to a weather member by
+    position; within each API, rows line up by member ID (see
+    response_members).
+
+    Args:
+        seconds (np.ndarray): UTC epoch seconds per hour
+        marine_members (dict): 'wave_height'/'wave_period' (member x hour) arrays
+        weather_members (dict): 'wind_speed_10m'/'wind_gusts_10m' (member x hour) arrays
+
+    Returns:
+        EnsembleForecast: Hourly and daily probability of GOOD conditions
+    """
+    hours = len(seconds)
+    member_count = len(marine_members["wave_height"]) * len(weather_members["wind_speed_10m"])
+    if hours == 0:
+        return EnsembleForecast.empty(member_count)
+
+    # (marine, 1, hour) against (1, weather, hour) broadcasts to every pairing
+    codes = calculations.assess_hour_conditions(
+        marine_members["wave_height"][:, None, :],
+        marine_members["wave_period"][:, None, :],
+        weather_members["wind_speed_10m"][None, :, :],
+        weather_members["wind_gusts_10m"][None, :, :]
+    ).reshape(member_count, hours)
+
+    # Split the hours into UTC days and reduce every member's days at once
+    day_numbers = seconds // 86400
+    day_starts = np.flatnonzero(np.r_[True, day_numbers[1:] != day_numbers[:-1]])
+    day_codes, _ = calculations.determine_day_ratings(codes, day_starts)
+
+    return EnsembleForecast(
+        [forecast_result.format_date(day) for day in day_numbers[day_starts].tolist()],
+        day_starts,
+        seconds,
+        member_count,
+        (codes == calculations.RATING_GOOD).mean(axis=0, dtype=np.float32),
+        (day_codes == calculations.RATING_GOOD).mean(axis=0, dtype=np.float32)
+    )
+
+def daylight_hours(location, seconds, daylight_window):
+    """
+    Find the hours of one location inside its daylight window.
+
+    Args:
+        location (dict): Location data dictionary
+        seconds (np.ndarray): UTC epoch seconds per hour, in time order
+        daylight_window (tuple): (hours before sunrise, hours after sunset),
+            see data_analyzer.daylight_mask
+
+    Returns:
+        np.ndarray: Boolean mask over hours
+    """
+    day_numbers, day_starts = data_analyzer.split_days(seconds)
+    sunrises, sunsets = solar.get_table().lookup(
+        location["latitude"], location["longitude"], day_numbers[day_starts]
+    )
+    return data_analyzer.daylight_hours(seconds, day_starts, sunrises, sunsets, daylight_window)
+
+def iter_ensemble_locations(locations_list, chunk_size=ENSEMBLE_CHUNK_SIZE,
+                            batch_size=data_fetcher.BATCH_SIZE, daylight_window=None):
+    """
+    Fetch and rate the ensemble for many locations, one chunk at a time.
+
+    Args:
+        locations_list (list): Location data dictionaries
+        chunk_size (int): Number of locations whose member arrays are held at once
+        batch_size (int): Maximum number of coordinates per request
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset); when given, only hours inside that window are rated, like
+            data_analyzer.analyze_conditions does
+
+    Yields:
+        tuple: (location_data, EnsembleForecast), in location order
+    """
+    locations_list = list(locations_list)
+    for chunk in data_fetcher.chunks(locations_list, max(1, chunk_size)):
+        points, point_index = data_fetcher.request_points(chunk)
+        marine = _fetch_cells_batched(
+            meteo_marine, meteo_marine.url, "marine", points,
+            MARINE_VARIABLES, meteo_ensemble.MARINE_MODELS, batch_size
+        )
+        weather = _fetch_cells_batched(
+            meteo_ensemble, meteo_ensemble.url, "ensemble", points,
+            WEATHER_VARIABLES, meteo_ensemble.MODELS, batch_size
+        )
+
+        for i, location in enumerate(chunk):
+            with tracing.span("analyze", location=location["name"]) as span:
+                seconds, (marine_members, weather_members) = _common_hours(
+                    [marine[point_index[i]], weather[point_index[i]]]
+                )
+                if daylight_window is not None:
+                    keep = daylight_hours(location, seconds, daylight_window)
+                    seconds = seconds[keep]
+                    marine_members = {name: values[:, keep] for name, values in marine_members.items()}
+                    weather_members = {name: values[:, keep] for name, values in weather_members.items()}
+                forecast = rate_members(seconds, marine_members, weather_members)
+                span.set(members=forecast.members, rows=len(seconds))
+            yield location, forecast
+
+def analyze_ensemble(locations_list, chunk_size=ENSEMBLE_CHUNK_SIZE, batch_size=data_fetcher.BATCH_SIZE,
+                     daylight_window=None):
+    """
+    Fetch and rate the ensemble for many locations.
+
+    Args:
+        locations_list (list): Location data dictionaries
+        chunk_size (int): Number of locations whose member arrays are held at once
+        batch_size (int): Maximum number of coordinates per request
+        daylight_window (tuple): Optional daylight window (see
+            iter_ensemble_locations)
+
+    Returns:
+        dict: Location names to EnsembleForecast, in location order
+    """
+    return {
+        location["name"]: forecast
+        for location, forecast in iter_ensemble_locations(locations_list, chunk_size, batch_size, daylight_window)
+    }
@@ -0,0 +1,457 @@
+"""
+Module for the columnar forecast result structure.
+
+A LocationForecast stores one location's analyzed forecast as NumPy arrays
+(one entry per hour or per day) instead of nested per-hour dictionaries, and
+still behaves like the old `{date: {...}}` dictionary through lazily built
+views.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timezone
+import numpy as np
+import calculations
+
+# Converted metrics, stored rounded to one decimal like the report shows them
+ROUNDED_METRICS = ("wave_height_ft", "wind_speed_mph", "wind_gust_mph", "wave_period_sec")
+
+# Weather values passed through unchanged, with their default when not fetched
+PASS_THROUGH_METRICS = {
+    "precipitation_probability": 0,
+    "visibility": None,
+    "rain": 0
+}
+
+def format_hour(epoch):
+    """Format UTC epoch seconds as 'HH:MM'."""
+    seconds_of_day = int(epoch) % 86400
+    return f"{seconds_of_day // 3600:02d}:{(seconds_of_day % 3600) // 60:02d}"
+
+def format_date(day_number):
+    """Format days since 1970-01-01 as 'YYYY-MM-DD'."""
+    return datetime.fromtimestamp(int(day_number) * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+
+def _parse_epoch(date_str, hour_str):
+    """Convert a 'YYYY-MM-DD' date and 'HH:MM' time to UTC epoch seconds."""
+    day = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    hours, minutes = hour_str.split(":")
+    return int(day.timestamp()) + int(hours) * 3600 + int(minutes) * 60
+
+def rating_runs(time, rating, day_starts):
+    """
+    Run-length encode hourly ratings.
+
+    A run is a maximal sequence of hours within one day that are an hour
+    apart and share the same rating. All runs are found in one vectorized
+    diff pass.
+
+    Args:
+        time (np.ndarray): UTC epoch seconds per hour, in time order
+        rating (np.ndarray): Rating code per hour
+        day_starts (np.ndarray): Index of each day's first hour
+
+    Returns:
+        tuple: (run_start, run_length, run_rating) arrays, one entry per run
+    """
+    hours = len(time)
+    if hours == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8)
+
+    # A run starts at every rating change, time gap and day start
+    breaks = np.ones(hours, dtype=bool)
+    breaks[1:] = (rating[1:] != rating[:-1]) | (np.diff(time) != 3600)
+    breaks[day_starts[day_starts < hours]] = True
+
+    run_start = np.flatnonzero(breaks)
+    run_length = np.diff(np.append(run_start, hours))
+    return run_start.astype(np.int32), run_length.astype(np.int32), rating[run_start]
+
+class LocationForecast(Mapping):
+    """
+    Analyzed forecast for one location, stored column-wise.
+
+    Hours of all days are stored back to back in time order; `day_starts`
+    holds the index of each day's first hour. Indexing by date returns the
+    legacy day dictionary, built on demand.
+
+    Attributes:
+        dates (list): 'YYYY-MM-DD' string per day
+        day_starts (np.ndarray): Index of each day's first hour
+        day_rating (np.ndarray): int8 day rating codes (see calculations.RATING_*)
+        good_hours_count (np.ndarray): Number of GOOD hours per day
+        sunrise (np.ndarray): Sunrise per day as UTC epoch seconds
+        sunset (np.ndarray): Sunset per day as UTC epoch seconds
+        time (np.ndarray): UTC epoch seconds per hour
+        rating (np.ndarray): int8 rating code per hour
+        metrics (dict): Metric name to float32 array per hour
+        run_start (np.ndarray): Index of the first hour of each rating run
+        run_length (np.ndarray): Number of hours in each rating run
+        run_rating (np.ndarray): int8 rating code of each rating run
+        day_run_starts (np.ndarray): Index of each day's first run
+
+    The run-length encoded timeline (see rating_runs) is computed once when
+    the forecast is built and shared by the HTML table, the summary table
+    and the console summary.
+    """
+
+    def __init__(self, dates, day_starts, day_rating, good_hours_count,
+                 sunrise, sunset, time, rating, metrics, runs=None):
+        self.dates = list(dates)
+        self.day_starts = np.asarray(day_starts, dtype=np.int32)
+        self.day_rating = np.asarray(day_rating, dtype=np.int8)
+        self.good_hours_count = np.asarray(good_hours_count, dtype=np.int16)
+        self.sunrise = np.asarray(sunrise, dtype=np.int64)
+        self.sunset = np.asarray(sunset, dtype=np.int64)
+        self.time = np.asarray(time, dtype=np.int64)
+        self.rating = np.asarray(rating, dtype=np.int8)
+        self.metrics = {
+            name: np.asarray(values, dtype=np.float32) for name, values in metrics.items()
+        }
+        self._date_index = {date: i for i, date in enumerate(self.dates)}
+
+        if runs is None:
+            runs = rating_runs(self.time, self.rating, self.day_starts)
+        self.run_start = np.asarray(runs[0], dtype=np.int32)
+        self.run_length = np.asarray(runs[1], dtype=np.int32)
+        self.run_rating = np.asarray(runs[2], dtype=np.int8)
+        self.day_run_starts = np.searchsorted(self.run_start, self.day_starts).astype(np.int32)
+
+    @classmethod
+    def empty(cls):
+        """Return a forecast with no days."""
+        return cls([], [], [], [], [], [], [], [], {})
+
+    # Mapping interface (backward compatible dict view)
+
+    def __getitem__(self, date):
+        return self.day_dict(self._date_index[date])
+
+    def __iter__(self):
+        return iter(self.dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __contains__(self, date):
+        return date in self._date_index
+
+    # Columnar accessors
+
+    @property
+    def day_ends(self):
+        """Index one past each day's last hour."""
+        return np.append(self.day_starts[1:], len(self.time)).astype(np.int32)
+
+    def day_bounds(self, day_index):
+        """
+        Get the hour range of one day.
+
+        Args:
+            day_index (int): Position of the day in `dates`
+
+        Returns:
+            tuple: (start, end) hour indices, end exclusive
+        """
+        start = int(self.day_starts[day_index])
+        if day_index + 1 < len(self.day_starts):
+            return start, int(self.day_starts[day_index + 1])
+        return start, len(self.time)
+
+    def day_runs(self, day_index):
+        """
+        Get the run range of one day.
+
+        Args:
+            day_index (int): Position of the day in `dates`
+
+        Returns:
+            tuple: (first, end) run indices, end exclusive
+        """
+        first = int(self.day_run_starts[day_index])
+        if day_index + 1 < len(self.day_run_starts):
+            return first, int(self.day_run_starts[day_index + 1])
+        return first, len(self.run_start)
+
+    def contiguous_runs(self, first, end):
+        """
+        Group runs that follow each other without a time gap.
+
+        Args:
+            first (int): First run index
+            end (int): Run index one past the last run
+
+        Returns:
+            list: (first_hour, last_hour) index pairs, one per group
+        """
+        run_start = self.run_start[first:end]
+        run_last = run_start + self.run_length[first:end] - 1
+        if len(run_start) == 0:
+            return []
+        gaps = np.flatnonzero(self.time[run_start[1:]] - self.time[run_last[:-1]] != 3600)
+        group_first = np.r_[0, gaps + 1]
+        group_last = np.r_[gaps, len(run_start) - 1]
+        return list(zip(run_start[group_first].tolist(), run_last[group_last].tolist()))
+
+    def hour_strings(self, start=0, end=None):
+        """Return 'HH:MM' strings for the hours in [start, end)."""
+        return [format_hour(epoch) for epoch in self.time[start:end].tolist()]
+
+    def hour_of_day(self, start=0, end=None):
+        """Return the UTC hour of day (0-23) for the hours in [start, end)."""
+        return (self.time[start:end] % 86400) // 3600
+
+    def rating_labels(self, start=0, end=None):
+        """Return rating labels ('GOOD', ...) for the hours in [start, end)."""
+        return [calculations.RATING_LABELS[code] for code in self.rating[start:end].tolist()]
+
+    def metric_values(self, name, start=0, end=None):
+        """
+        Return one metric for the hours in [start, end) as Python values.
+
+        Rounded metrics come back as one-decimal floats; pass-through metrics
+        that were not fetched come back as their default.
+
+        Args:
+            name (str): Metric name (see ROUNDED_METRICS / PASS_THROUGH_METRICS)
+            start (int): First hour index
+            end (int): Hour index one past the last hour (None for the end)
+
+        Returns:
+            list: Metric values
+        """
+        if name in ROUNDED_METRICS:
+            return np.round(self.metrics[name][start:end].astype(np.float64), 1).tolist()
+        if name in self.metrics:
+            return self.metrics[name][start:end].tolist()
+        return [PASS_THROUGH_METRICS[name]] * len(self.time[start:end])
+
+    def hourly_dicts(self, start, end):
+        """
+        Build legacy hourly assessment dictionaries for the hours in [start, end).
+
+        Returns:
+            list: Hourly dicts with time, rating and metric keys
+        """
+        times = self.hour_strings(start, end)
+        ratings = self.rating_labels(start, end)
+        columns = {
+            name: self.metric_values(name, start, end)
+            for name in ROUNDED_METRICS + tuple(PASS_THROUGH_METRICS)
+        }
+
+        hourly = []
+        for i in range(end - start):
+            hour = {"time": times[i], "rating": ratings[i]}
+            for name, values in columns.items():
+                hour[name] = values[i]
+            hourly.append(hour)
+        return hourly
+
+    def day_dict(self, day_index):
+        """
+        Build the legacy day dictionary for one day.
+
+        Args:
+            day_index (int): Position of the day in `dates`
+
+        Returns:
+            dict: day_rating, sunrise, sunset, good_hours_count and hourly list
+        """
+        start, end = self.day_bounds(day_index)
+        return {
+            "day_rating": calculations.RATING_LABELS[self.day_rating[day_index]],
+            "sunrise": format_hour(self.sunrise[day_index]),
+            "sunset": format_hour(self.sunset[day_index]),
+            "good_hours_count": int(self.good_hours_count[day_index]),
+            "hourly": self.hourly_dicts(start, end)
+        }
+
+    def to_dict(self):
+        """Return the full legacy `{date: day_dict}` dictionary (e.g. for JSON)."""
+        return {date: self.day_dict(i) for i, date in enumerate(self.dates)}
+
+    def select(self, day_mask, hour_mask=None):
+        """
+        Return a new forecast with a subset of days and hours.
+
+        Args:
+            day_mask (np.ndarray): Boolean mask over days
+            hour_mask (np.ndarray): Optional boolean mask over hours; hours of
+                days dropped by `day_mask` are always dropped
+
+        Returns:
+            LocationForecast: Forecast with the selected days and hours
+        """
+        day_mask = np.asarray(day_mask, dtype=bool)
+        keep_hours = np.repeat(day_mask, self.day_ends - self.day_starts)
+        if hour_mask is not None:
+            keep_hours &= np.asarray(hour_mask, dtype=bool)
+
+        # New day starts: number of kept hours before each kept day
+        kept_before = np.concatenate([[0], np.cumsum(keep_hours)])
+        day_starts = kept_before[self.day_starts[day_mask]]
+
+        # Reuse the timeline when every run is kept or dropped as a whole
+        runs = None
+        if len(self.run_start):
+            kept_counts = np.add.reduceat(keep_hours.astype(np.int32), self.run_start)
+            if ((kept_counts == 0) | (kept_counts == self.run_length)).all():
+                kept_runs = kept_counts > 0
+                runs = (
+                    kept_before[self.run_start[kept_runs]],
+                    self.run_length[kept_runs],
+                    self.run_rating[kept_runs]
+                )
+
+        return LocationForecast(
+            [date for date, keep in zip(self.dates, day_mask.tolist()) if keep],
+            day_starts,
+            self.day_rating[day_mask],
+            self.good_hours_count[day_mask],
+            self.sunrise[day_mask],
+            self.sunset[day_mask],
+            self.time[keep_hours],
+            self.rating[keep_hours],
+            {name: values[keep_hours] for name, values in self.metrics.items()},
+            runs
+        )
+
+    @classmethod
+    def concat(cls, forecasts):
+        """
+        Join forecasts covering different days into one, in date order.
+
+        The rating timeline of every day is carried over, not recomputed.
+        Metrics missing from any of the forecasts are left out.
+
+        Args:
+            forecasts (list): LocationForecast objects with disjoint dates
+
+        Returns:
+            LocationForecast: Forecast with the days of all inputs
+        """
+        forecasts = [forecast for forecast in forecasts if forecast.dates]
+        if not forecasts:
+            return cls.empty()
+        if len(forecasts) == 1:
+            return forecasts[0]
+        metric_names = [
+            name for name in forecasts[0].metrics
+            if all(name in forecast.metrics for forecast in forecasts)
+        ]
+
+        days = sorted(
+            (date, part, day_index)
+            for part, forecast in enumerate(forecasts)
+            for day_index, date in enumerate(forecast.dates)
+        )
+        hour_slices, run_slices, day_starts, run_offsets = [], [], [], []
+        hours = 0
+        for _, part, day_index in days:
+            forecast = forecasts[part]
+            start, end = forecast.day_bounds(day_index)
+            first, last = forecast.day_runs(day_index)
+            hour_slices.append((forecast, start, end))
+            run_slices.append((forecast, first, last))
+            day_starts.append(hours)
+            run_offsets.append(hours - start)
+            hours += end - start
+
+        def hourly(get):
+            return np.concatenate([get(forecast)[start:end] for forecast, start, end in hour_slices])
+
+        def daily(get):
+            return np.array([get(forecasts[part])[day_index] for _, part, day_index in days])
+
+        runs = (
+            np.concatenate([
+                forecast.run_start[first:last] + offset
+                for (forecast, first, last), offset in zip(run_slices, run_offsets)
+            ]),
+            np.concatenate([forecast.run_length[first:last] for forecast, first, last in run_slices]),
+            np.concatenate([forecast.run_rating[first:last] for forecast, first, last in run_slices])
+        )
+
+        return cls(
+            [date for date, _, _ in days],
+            day_starts,
+            daily(lambda forecast: forecast.day_rating),
+            daily(lambda forecast: forecast.good_hours_count),
+            daily(lambda forecast: forecast.sunrise),
+            daily(lambda forecast: forecast.sunset),
+            hourly(lambda forecast: forecast.time),
+            hourly(lambda forecast: forecast.rating),
+            {name: hourly(lambda forecast: forecast.metrics[name]) for name in metric_names},
+            runs
+        )
+
+    @classmethod
+    def from_dict(cls, location_results):
+        """
+        Build a columnar forecast from a legacy `{date: day_dict}` dictionary.
+
+        Args:
+            location_results (dict): Legacy results for one location
+
+        Returns:
+            LocationForecast: Equivalent columnar forecast
+        """
+        label_codes = {label: code for code, label in enumerate(calculations.RATING_LABELS)}
+        dates = sorted(location_results)
+        day_starts, day_rating, good_hours_count, sunrise, sunset = [], [], [], [], []
+        time, rating = [], []
+        metrics = {name: [] for name in ROUNDED_METRICS + tuple(PASS_THROUGH_METRICS)}
+        present = set(ROUNDED_METRICS)
+
+        for date in dates:
+            data = location_results[date]
+            hourly = sorted(data.get("hourly", []), key=lambda hour: hour["time"])
+            day_starts.append(len(time))
+            day_rating.append(label_codes[data["day_rating"]])
+            good_hours_count.append(data["good_hours_count"])
+            sunrise.append(_parse_epoch(date, data["sunrise"]))
+            sunset.append(_parse_epoch(date, data["sunset"]))
+            for hour in hourly:
+                time.append(_parse_epoch(date, hour["time"]))
+                rating.append(label_codes[hour["rating"]])
+                for name, values in metrics.items():
+                    value = hour.get(name)
+                    if value is None:
+                        values.append(np.nan)
+                    else:
+                        values.append(value)
+                        present.add(name)
+
+        # Columns that were never fetched fall back to their defaults again
+        metrics = {name: values for name, values in metrics.items() if name in present}
+
+        return cls(dates, day_starts, day_rating, good_hours_count,
+                   sunrise, sunset, time, rating, metrics)
+
+def as_location_forecast(location_results):
+    """
+    Return results for one location as a LocationForecast.
+
+    Args:
+        location_results (LocationForecast or dict): Columnar or legacy results
+
+    Returns:
+        LocationForecast: Columnar results
+    """
+    if isinstance(location_results, LocationForecast):
+        return location_results
+    return LocationForecast.from_dict(location_results)
+
+def to_json_dict(all_results):
+    """
+    Convert `{location_name: results}` to plain dictionaries for JSON output.
+
+    Args:
+        all_results (dict): Location names to LocationForecast or legacy dicts
+
+    Returns:
+        dict: Location names to legacy `{date: day_dict}` dictionaries
+    """
+    return {
+        location_name: (results.to_dict() if isinstance(results, LocationForecast) else results)
+        for location_name, results in all_results.items()
+    }
@@ -5,6 +5,8 @@ Coordinates all the other modules to generate the forecast.
 import sys
 import os
 import json
+import argparse
+import subprocess
 import webbrowser
 from datetime import datetime
 
@@ -15,91 +17,137 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import table_generation
 import data_fetcher
 import data_analyzer
-import locations
+import location_catalog
+import parallel_analysis
+import solar
+import calculations
+import forecast_result
+import trip_windows
+import ensemble
+import analysis_state
+import rating_profiles
 
-def process_location(location_data, location_index):
+def analyze_all_locations(max_workers=data_fetcher.MAX_FETCH_WORKERS, daylight_window=None,
+                          analysis_workers=None, locations_list=None, state=None):
     """
-    Process a single location's data and assess boating conditions.
+    Process all locations and return their boating conditions.
+    
+    Weather and marine data are fetched in batches on a bounded thread pool,
+    and each location is analyzed as soon as both of its frames arrive.
     
     Args:
-        location_data (dict): Location data dictionary
-        location_index (int): Index of the location in the list
-        
+        max_workers (int): Maximum number of concurrent fetch requests
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset) to restrict the analysis to (see data_analyzer.analyze_conditions)
+        analysis_workers (int): Number of processes to analyze on; None or 1
+            analyzes in this process (see parallel_analysis)
+        locations_list (list): Location dictionaries to analyze (default:
+            location_catalog.default_locations()), e.g. the result of a
+            region query
+        state (AnalysisState): Optional analysis state; only days whose
+            inputs changed since the previous run are re-rated (in-process
+            analysis only, see analysis_state)
+    
     Returns:
-        tuple: (location_name, results_dict)
+        dict: All boating conditions for all locations, in location order
+        
+    Raises:
+        ValueError: if a state is given together with more than one
+            analysis worker (the state would not see the analyzed days)
     """
-    print(f"Processing location: {location_data['name']}, {location_data['region']}")
-    
-    # Get location info for sunrise/sunset calculations
-    location_info = data_analyzer.get_location_info(location_data)
+    if state is not None and analysis_workers and analysis_workers > 1:
+        raise ValueError("Incremental analysis only runs in-process; use analysis_workers=None")
+    if locations_list is None:
+        locations_list = location_catalog.default_locations()
+    fetched = data_fetcher.fetch_all_locations(locations_list, max_workers=max_workers)
+    if state is not None:
+        analyzed_before, reused_before = state.analyzed_days, state.reused_days
     
-    # Fetch weather and marine data
-    weather_df = data_fetcher.fetch_weather_data(
-        location_data["latitude"], 
-        location_data["longitude"]
-    )
+    if analysis_workers and analysis_workers > 1:
+        # Shard the analysis across a process pool
+        results_by_index = parallel_analysis.analyze_fetched_parallel(
+            fetched, workers=analysis_workers, daylight_window=daylight_window
+        )
+    else:
+        # Analyze each location as its data arrives
+        results_by_index = {}
+        for i, location, weather_df, marine_df in fetched:
+            print(f"Processing location: {location['name']}, {location['region']}")
+            location_info = data_analyzer.get_location_info(location)
+            results_by_index[i] = data_analyzer.analyze_conditions(
+                marine_df, weather_df, location_info, daylight_window, state
+            )
     
-    marine_df = data_fetcher.fetch_marine_data(
-        location_data["latitude"], 
-        location_data["longitude"]
-    )
+    # Keep the output in the same order as the location list
+    all_results = {}
+    for i, location in enumerate(locations_list):
+        all_results[location['name']] = results_by_index[i]
     
-    # Analyze conditions for this location
-    results = data_analyzer.analyze_conditions(marine_df, weather_df, location_info)
+    # Persist newly computed sunrise/sunset times for the next run
+    solar.get_table().save()
+    if state is not None:
+        print(f"Incremental analysis: {state.analyzed_days - analyzed_before} days analyzed, "
+              f"{state.reused_days - reused_before} days reused")
     
-    return location_data['name'], results
+    return all_results
 
-def analyze_all_locations():
+def region_locations(latitude, longitude, radius_km):
     """
-    Process all locations and return their boating conditions.
+    Get the catalog spots within a radius of a point.
     
+    Args:
+        latitude (float): Latitude of the region center
+        longitude (float): Longitude of the region center
+        radius_km (float): Region radius in kilometers
+        
     Returns:
-        dict: All boating conditions for all locations
+        list: Location dictionaries for analyze_all_locations
     """
-    all_results = {}
-    
-    # Process each location
-    for i, location in enumerate(locations.LOCATIONS):
-        location_name, results = process_location(location, i)
-        all_results[location_name] = results
-    
-    return all_results
+    return location_catalog.get_catalog().region(latitude, longitude, radius_km)
 
-def run_analysis():
+def run_analysis(**analysis_options):
     """
     Run the full analysis and return results.
     
+    Args:
+        **analysis_options: Keyword arguments for analyze_all_locations
+    
     Returns:
         tuple: (all_results, good_days_results)
     """
     # Get forecast data for all locations
-    all_results = analyze_all_locations()
+    all_results = analyze_all_locations(**analysis_options)
     
     # Filter for good days
     good_days_results = data_analyzer.find_good_days(all_results)
     
     return all_results, good_days_results
 
-def save_results_to_files(all_results, good_days_results):
+def save_results_to_files(all_results, good_days_results, state=None):
     """
     Save analysis results to JSON and HTML files.
     
     Args:
         all_results (dict): All boating conditions results
         good_days_results (dict): Filtered good days results
+        state (AnalysisState): Optional analysis state; only changed days
+            are re-rendered, and the state is saved afterwards
     """
     # Save full results to JSON (will overwrite existing file)
     with open("all_boating_conditions.json", 'w') as f:
-        json.dump(all_results, f, indent=2)
+        json.dump(forecast_result.to_json_dict(all_results), f, indent=2)
     
     # Save good days to JSON (will overwrite existing file)
     with open("good_boating_days.json", 'w') as f:
-        json.dump(good_days_results, f, indent=2)
+        json.dump(forecast_result.to_json_dict(good_days_results), f, indent=2)
     
-    # Generate HTML table for all days (will overwrite existing file)
-    html_content = table_generation.generate_html_tables(all_results)
+    # Stream HTML tables for all days to the file (will overwrite existing file)
     with open("all_boating_conditions.html", "w") as f:
-        f.write(html_content)
+        table_generation.write_html_tables(
+            all_results, f, column_caches=state.column_caches() if state is not None else None
+        )
+    if state is not None:
+        state.save()
         
     print("\nHTML report generated: all_boating_conditions.html")
     
@@ -111,6 +159,98 @@ def save_results_to_files(all_results, good_days_results):
     except Exception as e:
         print(f"Could not open HTML file automatically. Please open it manually: {e}")
 
+def run_ensemble(locations_list=None, daylight_window=None):
+    """
+    Run the ensemble analysis and save its JSON and HTML reports.
+    
+    Args:
+        locations_list (list): Location dictionaries to analyze (default:
+            location_catalog.default_locations())
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset) to restrict the member ratings to
+    
+    Returns:
+        dict: Location names to EnsembleForecast
+    """
+    if locations_list is None:
+        locations_list = location_catalog.default_locations()
+    ensemble_results = {}
+    for location, ensemble_forecast in ensemble.iter_ensemble_locations(
+            locations_list, daylight_window=daylight_window):
+        print(f"Processing location: {location['name']}, {location['region']} "
+              f"({ensemble_forecast.members} members)")
+        ensemble_results[location['name']] = ensemble_forecast
+    if daylight_window is not None:
+        # Persist sunrise/sunset times computed for the daylight window
+        solar.get_table().save()
+    
+    with open("ensemble_boating_conditions.json", 'w') as f:
+        json.dump({name: result.to_dict() for name, result in ensemble_results.items()}, f, indent=2)
+    
+    with open("ensemble_boating_conditions.html", "w") as f:
+        table_generation.write_probability_tables(ensemble_results, f)
+    print("\nHTML report generated: ensemble_boating_conditions.html")
+    
+    # Print the most likely good day per location
+    print("\n=== ENSEMBLE: BEST DAY PER LOCATION ===")
+    for location_name, ensemble_forecast in ensemble_results.items():
+        if ensemble_forecast.dates:
+            best = int(ensemble_forecast.day_p_good.argmax())
+            print(f"  {location_name}: {ensemble_forecast.dates[best]} "
+                  f"P(GOOD) {float(ensemble_forecast.day_p_good[best]):.0%}")
+    
+    return ensemble_results
+
+def run_profiles(locations_list=None, daylight_window=None, max_workers=data_fetcher.MAX_FETCH_WORKERS):
+    """
+    Rate every location for every rating profile and save the JSON report.
+    
+    Profiles come from RATING_PROFILES_FILE, else the default and buoy
+    profiles (see rating_profiles.compile_profiles).
+    
+    Args:
+        locations_list (list): Location dictionaries to analyze (default:
+            location_catalog.default_locations())
+        daylight_window (tuple): Optional (hours before sunrise, hours after
+            sunset) to restrict the ratings to
+        max_workers (int): Maximum number of concurrent fetch requests
+    
+    Returns:
+        dict: Location names to data_analyzer.analyze_profiles results
+    """
+    if locations_list is None:
+        locations_list = location_catalog.default_locations()
+    compiled_profiles = rating_profiles.compile_profiles()
+    
+    results_by_index = {}
+    for i, location, weather_df, marine_df in data_fetcher.fetch_all_locations(locations_list, max_workers=max_workers):
+        print(f"Processing location: {location['name']}, {location['region']}")
+        results_by_index[i] = data_analyzer.analyze_profiles(
+            marine_df, weather_df, compiled_profiles,
+            data_analyzer.get_location_info(location), daylight_window
+        )
+    profile_results = {location['name']: results_by_index[i] for i, location in enumerate(locations_list)}
+    if daylight_window is not None:
+        # Persist sunrise/sunset times computed for the daylight window
+        solar.get_table().save()
+    
+    with open("profile_boating_conditions.json", 'w') as f:
+        json.dump({
+            location_name: rating_profiles.profile_ratings_to_dict(results)
+            for location_name, results in profile_results.items()
+        }, f, indent=2)
+    print("\nJSON report generated: profile_boating_conditions.json")
+    
+    # Print the number of GOOD days per location and profile
+    print("\n=== GOOD DAYS PER PROFILE ===")
+    for location_name, results in profile_results.items():
+        good_days = (results["day_rating"] == calculations.RATING_GOOD).sum(axis=-1).tolist()
+        print(f"  {location_name}: " + ", ".join(
+            f"{name} {count}/{len(results['dates'])}" for name, count in zip(results["profiles"], good_days)
+        ))
+    
+    return profile_results
+
 def print_summary(all_results, good_days_results):
     """
     Print a summary of the analysis results to the console.
@@ -123,34 +263,68 @@ def print_summary(all_results, good_days_results):
     
     # Print all results summary
     for location_name, location_results in all_results.items():
+        forecast = forecast_result.as_location_forecast(location_results)
         print(f"\n=== {location_name} ===")
-        for date, data in location_results.items():
-            print(f"\n{date}: {data['day_rating']}")
-            print(f"  Sunrise: {data['sunrise']}, Sunset: {data['sunset']}")
-            print(f"  Good hours: {data['good_hours_count']}")
+        for day_index, date in enumerate(forecast.dates):
+            start, end = forecast.day_bounds(day_index)
+            print(f"\n{date}: {calculations.RATING_LABELS[forecast.day_rating[day_index]]}")
+            print(f"  Sunrise: {forecast_result.format_hour(forecast.sunrise[day_index])}, "
+                  f"Sunset: {forecast_result.format_hour(forecast.sunset[day_index])}")
+            print(f"  Good hours: {forecast.good_hours_count[day_index]}")
             
             # Print sample hourly ratings
             print("  Sample hourly ratings:")
-            for i, hour in enumerate(data['hourly'][:3]):
-                print(f"    {hour['time']}: {hour['rating']} - Wave: {hour['wave_height_ft']}ft, Wind: {hour['wind_speed_mph']}mph")
-            if len(data['hourly']) > 3:
-                print(f"    ... and {len(data['hourly']) - 3} more hours")
+            sample_end = min(end, start + 3)
+            sample = zip(
+                forecast.hour_strings(start, sample_end),
+                forecast.rating_labels(start, sample_end),
+                forecast.metric_values("wave_height_ft", start, sample_end),
+                forecast.metric_values("wind_speed_mph", start, sample_end)
+            )
+            for time, rating, wave_height_ft, wind_speed_mph in sample:
+                print(f"    {time}: {rating} - Wave: {wave_height_ft}ft, Wind: {wind_speed_mph}mph")
+            if end - start > 3:
+                print(f"    ... and {end - start - 3} more hours")
     
     # Print good days summary
     if good_days_results:
         print("\n\n=== GOOD BOATING DAYS ===")
         for location_name, good_days in good_days_results.items():
+            forecast = forecast_result.as_location_forecast(good_days)
             print(f"\n{location_name}:")
-            for date, data in good_days.items():
-                # Calculate time range
-                good_hours = data['hourly']
-                if good_hours:
-                    first_good_hour = good_hours[0]['time']
-                    last_good_hour = good_hours[-1]['time']
+            for day_index, date in enumerate(forecast.dates):
+                day_rating = calculations.RATING_LABELS[forecast.day_rating[day_index]]
+                first, end = forecast.day_runs(day_index)
+                # Calculate time range from the day's first and last rating runs
+                if end > first:
+                    last_hour = int(forecast.run_start[end - 1] + forecast.run_length[end - 1] - 1)
+                    first_good_hour = forecast_result.format_hour(forecast.time[forecast.run_start[first]])
+                    last_good_hour = forecast_result.format_hour(forecast.time[last_hour])
+                    hour_count = int(forecast.run_length[first:end].sum())
                     time_range = f"{first_good_hour} - {last_good_hour}"
-                    print(f"  {date}: {data['day_rating']} - {len(good_hours)} good hours ({time_range})")
+                    print(f"  {date}: {day_rating} - {hour_count} good hours ({time_range})")
                 else:
-                    print(f"  {date}: {data['day_rating']} - 0 good hours")
+                    print(f"  {date}: {day_rating} - 0 good hours")
+
+def print_best_windows(all_results, hours, k=trip_windows.TOP_WINDOWS, score="margin"):
+    """
+    Print the best contiguous trip windows of a given length per location.
+    
+    Args:
+        all_results (dict): All boating conditions results
+        hours (int): Trip length in hours
+        k (int): Number of windows per location
+        score (str): Ranking score, 'margin' or 'gust' (see trip_windows)
+    """
+    found = trip_windows.best_windows(all_results, hours, k, score)
+    print(f"\n\n=== BEST {hours}-HOUR WINDOWS (by {score}) ===")
+    if not found:
+        print("  No location has a window of that length")
+    for location_name, windows in found.items():
+        print(f"\n{location_name}:")
+        for window in windows:
+            print(f"  {window['date']} {window['start']} - {window['end']}: "
+                  f"margin {window['min_margin']:.0%}, max gust {window['max_gust_mph']}mph")
 
 def get_current_date():
     """
@@ -161,18 +335,239 @@ def get_current_date():
     """
     return datetime.now().strftime("%Y-%m-%d")
 
-def main():
+def parse_shard(value):
+    """
+    Parse a shard written as "i/N" (shard i of N, counting from 0).
+    
+    Args:
+        value (str): Shard string
+        
+    Returns:
+        tuple: (shard_index, shard_count)
+        
+    Raises:
+        ValueError: if the string is not a valid shard of N
+    """
+    shard_index, shard_count = (int(part) for part in value.split("/"))
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard must be i/N with 0 <= i < N, got {value!r}")
+    return shard_index, shard_count
+
+def shard_bounds(location_count, shard_index, shard_count):
+    """
+    Get the deterministic slice of the location list a shard analyzes.
+    
+    Shards are contiguous and differ in size by at most one location, so
+    nearby spots listed together stay in the same shard (and grid cells).
+    
+    Returns:
+        tuple: (start, end) location indices, end exclusive
+    """
+    return (
+        shard_index * location_count // shard_count,
+        (shard_index + 1) * location_count // shard_count
+    )
+
+def partial_results_path(output_dir, shard_index, shard_count):
+    """Return the path of a shard's partial results file."""
+    return os.path.join(output_dir, f"partial_{shard_index:04d}_of_{shard_count:04d}.json")
+
+def run_shard(shard_index, shard_count, output_dir=".", locations_list=None, **analysis_options):
+    """
+    Analyze one shard of the locations and write its partial results file.
+    
+    Args:
+        shard_index (int): Shard to run, counting from 0
+        shard_count (int): Total number of shards
+        output_dir (str): Directory for the partial results file
+        locations_list (list): Full location list (default:
+            location_catalog.default_locations())
+        **analysis_options: Other keyword arguments for analyze_all_locations
+        
+    Returns:
+        str: Path of the partial results file
+    """
+    if locations_list is None:
+        locations_list = location_catalog.default_locations()
+    start, end = shard_bounds(len(locations_list), shard_index, shard_count)
+    
+    all_results = analyze_all_locations(locations_list=locations_list[start:end], **analysis_options)
+    
+    path = partial_results_path(output_dir, shard_index, shard_count)
+    with open(path, 'w') as f:
+        json.dump({
+            "shard": shard_index,
+            "shards": shard_count,
+            "start": start,
+            "results": forecast_result.to_json_dict(all_results)
+        }, f)
+    print(f"Shard {shard_index}/{shard_count}: {end - start} locations written to {path}")
+    return path
+
+def merge_partial_results(paths):
+    """
+    Combine partial results files into one results dictionary.
+    
+    Args:
+        paths (list): Partial results files, in any order
+        
+    Returns:
+        dict: Location names to LocationForecast, in the original location order
+        
+    Raises:
+        ValueError: if the files do not form one complete set of shards
+    """
+    partials = []
+    for path in paths:
+        with open(path) as f:
+            partials.append(json.load(f))
+    
+    shard_counts = {partial["shards"] for partial in partials}
+    shards = sorted(partial["shard"] for partial in partials)
+    if len(shard_counts) != 1 or shards != list(range(shard_counts.pop())):
+        raise ValueError(f"Partial results do not form a complete set of shards: {shards}")
+    
+    # Shards are contiguous slices, so ordering by start restores the location order
+    all_results = {}
+    for partial in sorted(partials, key=lambda partial: partial["start"]):
+        for location_name, results in partial["results"].items():
+            all_results[location_name] = forecast_result.LocationForecast.from_dict(results)
+    return all_results
+
+def run_local_shards(shard_count, output_dir=".", extra_args=()):
+    """
+    Run every shard as a separate local process of this script.
+    
+    Args:
+        shard_count (int): Number of shards (and processes)
+        output_dir (str): Directory for the partial results files
+        extra_args (tuple): Additional command line arguments for each shard
+        
+    Returns:
+        list: Paths of the partial results files
+        
+    Raises:
+        RuntimeError: if a shard process fails
+    """
+    processes = [
+        subprocess.Popen([
+            sys.executable, os.path.abspath(__file__),
+            "--shard", f"{shard_index}/{shard_count}",
+            "--output-dir", output_dir,
+            *extra_args
+        ])
+        for shard_index in range(shard_count)
+    ]
+    failed = [shard_index for shard_index, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Shard processes failed: {failed}")
+    return [partial_results_path(output_dir, shard_index, shard_count) for shard_index in range(shard_count)]
+
+def parse_args(argv=None):
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Boating conditions forecast")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="analyze shard I of N (from 0) and write a partial results file")
+    parser.add_argument("--merge", nargs="+", metavar="FILE",
+                        help="merge partial results files and render the report")
+    parser.add_argument("--local-shards", type=int, metavar="N",
+                        help="run N shards as local processes, then merge them")
+    parser.add_argument("--output-dir", default=".",
+                        help="directory for partial results files (default: current directory)")
+    parser.add_argument("--region", type=location_catalog.parse_region, metavar="LAT,LON,KM",
+                        help="only analyze catalog spots within KM of LAT,LON")
+    parser.add_argument("--daylight-window", metavar="BEFORE,AFTER",
+                        type=lambda value: tuple(float(part) for part in value.split(",")),
+                        help="only analyze hours from BEFORE hours before sunrise to AFTER hours after sunset")
+    parser.add_argument("--analysis-workers", type=int,
+                        help="number of processes to analyze on (default: this process only)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-analyze and re-render days whose forecast changed since the last run")
+    parser.add_argument("--ensemble", action="store_true",
+                        help="rate every ensemble member and report the probability of GOOD conditions")
+    parser.add_argument("--profiles", action="store_true",
+                        help="rate every hour for every rating profile (RATING_PROFILES_FILE, "
+                             "else the default and buoy profiles) and write profile_boating_conditions.json")
+    parser.add_argument("--trip-hours", type=int, metavar="HOURS",
+                        help="also list the best contiguous GOOD windows of this many hours per location")
+    parser.add_argument("--trip-top", type=int, default=trip_windows.TOP_WINDOWS, metavar="K",
+                        help="number of trip windows per location (default: %(default)s)")
+    parser.add_argument("--trip-score", choices=trip_windows.SCORES, default="margin",
+                        help="rank trip windows by minimum margin or maximum gust (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.incremental and args.analysis_workers and args.analysis_workers > 1:
+        parser.error("--incremental cannot be combined with --analysis-workers")
+    # The ensemble and profile modes are rated in-process and have no analysis state
+    for mode in ("ensemble", "profiles"):
+        if getattr(args, mode) and (args.incremental or args.analysis_workers):
+            parser.error(f"--{mode} cannot be combined with --incremental or --analysis-workers")
+        if getattr(args, mode) and (args.shard or args.merge or args.local_shards):
+            parser.error(f"--{mode} cannot be combined with --shard, --merge or --local-shards")
+        if getattr(args, mode) and args.trip_hours:
+            parser.error(f"--{mode} cannot be combined with --trip-hours")
+    if args.profiles and args.ensemble:
+        parser.error("--profiles cannot be combined with --ensemble")
+    # Shards run in separate processes and the merge path only reads their
+    # results, so no analysis state could vouch for the merged report
+    if args.incremental and (args.shard or args.merge or args.local_shards):
+        parser.error("--incremental cannot be combined with --shard, --merge or --local-shards")
+    return args
+
+def main(argv=None):
     """Main function to run the entire forecasting process."""
     # No need to explicitly delete files as we'll overwrite them
+    args = parse_args(argv)
+    
+    analysis_options = {
+        "daylight_window": args.daylight_window,
+        "analysis_workers": args.analysis_workers,
+        "locations_list": region_locations(*args.region) if args.region else None
+    }
+    # Ensemble mode: probability of GOOD conditions instead of a single rating
+    if args.ensemble:
+        run_ensemble(analysis_options["locations_list"], args.daylight_window)
+        return
     
-    # Run analysis
-    all_results, good_days_results = run_analysis()
+    # Profile mode: one rating per profile instead of the forecast report
+    if args.profiles:
+        run_profiles(analysis_options["locations_list"], args.daylight_window)
+        return
+    
+    # Shard mode: analyze one slice and stop at the partial results file
+    if args.shard:
+        run_shard(*args.shard, output_dir=args.output_dir, **analysis_options)
+        return
+    
+    if args.merge or args.local_shards:
+        if args.merge:
+            paths = args.merge
+        else:
+            # Forward the analysis options to every shard process (--incremental
+            # is rejected with sharding, see parse_args)
+            shard_args = []
+            for option in ("--region", "--daylight-window", "--analysis-workers"):
+                value = getattr(args, option[2:].replace("-", "_"))
+                if value:
+                    shard_args += [option, ",".join(str(part) for part in value)
+                                   if isinstance(value, tuple) else str(value)]
+            paths = run_local_shards(args.local_shards, args.output_dir, shard_args)
+        all_results = merge_partial_results(paths)
+        good_days_results = data_analyzer.find_good_days(all_results)
+        state = None
+    else:
+        # Run analysis (the state is only passed on where it analyzed every location,
+        # so its cached columns are never rendered for days it did not check)
+        state = analysis_state.get_state() if args.incremental else None
+        all_results, good_days_results = run_analysis(state=state, **analysis_options)
     
     # Save results to files (overwrites existing files)
-    save_results_to_files(all_results, good_days_results)
+    save_results_to_files(all_results, good_days_results, state)
     
     # Print summary to console
     print_summary(all_results, good_days_results)
+    
+    if args.trip_hours:
+        print_best_windows(all_results, args.trip_hours, args.trip_top, args.trip_score)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
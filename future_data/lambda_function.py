@@ -3,13 +3,8 @@ AWS Lambda handler for boating conditions forecast.
 Generates and sends email with HTML tables of forecast.
 """
 import json
-import boto3
 import os
 import sys
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
-from datetime import datetime
 
 # Add the current directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -17,8 +12,44 @@ sys.path.append('/tmp')  # Lambda needs to write to /tmp directory
 
 # Import our modules directly (no need for future_data package prefix)
 import future
-import locations
 import table_generation
+import email_digest
+import analysis_state
+import tracing
+
+# Re-analyze and re-render only days whose forecast changed since the last run (opt-in)
+INCREMENTAL_ANALYSIS = os.environ.get('INCREMENTAL_ANALYSIS', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+def get_daylight_window():
+    """
+    Read the daylight window from the DAYLIGHT_WINDOW environment variable.
+    
+    The variable holds "hours before sunrise,hours after sunset" (e.g. "1,0"
+    for sunrise-1h to sunset); unset or empty analyzes all 24 hours.
+    
+    Returns:
+        tuple: (hours before sunrise, hours after sunset), or None
+    """
+    value = os.environ.get('DAYLIGHT_WINDOW', '').strip()
+    if not value:
+        return None
+    hours_before_sunrise, hours_after_sunset = (float(part) for part in value.split(','))
+    return hours_before_sunrise, hours_after_sunset
+
+def get_region_locations():
+    """
+    Read an optional region query from the REGION environment variable.
+    
+    The variable holds "latitude,longitude,radius_km"; unset or empty
+    analyzes the whole location list.
+    
+    Returns:
+        list: Location dictionaries in the region, or None
+    """
+    value = os.environ.get('REGION', '').strip()
+    if not value:
+        return None
+    return future.region_locations(*future.location_catalog.parse_region(value))
 
 def lambda_handler(event, context):
     """
@@ -37,20 +68,46 @@ def lambda_handler(event, context):
         
         # Run the weather analysis
         print("Starting weather analysis...")
-        all_results = future.analyze_all_locations()
+        max_workers = int(os.environ.get('MAX_FETCH_WORKERS', future.data_fetcher.MAX_FETCH_WORKERS))
+        daylight_window = get_daylight_window()
+        state = analysis_state.get_state() if INCREMENTAL_ANALYSIS else None
+        all_results = future.analyze_all_locations(
+            max_workers=max_workers,
+            daylight_window=daylight_window,
+            locations_list=get_region_locations(),
+            state=state
+        )
+        column_caches = state.column_caches() if state is not None else None
         
-        # Generate HTML table for ALL days and conditions
-        html_content = table_generation.generate_html_tables(all_results)
+        trim_empty_hours = daylight_window is not None
         
         # Get email configuration from environment variables
         sender_email = os.environ.get('SENDER_EMAIL')
-        recipient_emails_str = os.environ.get('RECIPIENT_EMAILS')
+        subscriptions = email_digest.load_subscriptions()
         
-        # Parse recipient emails (comma-separated list)
-        recipient_emails = [email.strip() for email in recipient_emails_str.split(',')]
+        if subscriptions:
+            # Personalized digests: each location is rendered once, whatever the subscriber count
+            email_digest.send_digests(
+                all_results, sender_email, subscriptions, trim_empty_hours=trim_empty_hours,
+                column_caches=column_caches
+            )
+        else:
+            # Stream the HTML tables for ALL days and conditions (night rows are left
+            # out when only daylight hours were analyzed) straight into the message
+            html_content = table_generation.iter_html_tables(
+                all_results, trim_empty_hours=trim_empty_hours, column_caches=column_caches
+            )
+            
+            recipient_emails_str = os.environ.get('RECIPIENT_EMAILS')
+            
+            # Parse recipient emails (comma-separated list)
+            recipient_emails = [email.strip() for email in recipient_emails_str.split(',')]
+            
+            # Send the email with the HTML table
+            send_email(html_content, sender_email, recipient_emails)
         
-        # Send the email with the HTML table
-        send_email(html_content, sender_email, recipient_emails)
+        if state is not None:
+            state.save()
         
         return {
             'statusCode': 200,
@@ -65,46 +122,27 @@ def lambda_handler(event, context):
             'body': json.dumps(f'Error: {str(e)}')
         }
 
-def send_email(html_content, sender_email, recipient_emails):
+def send_email(html_content, sender_email, recipient_emails, sender=None):
     """
     Send email with forecast using AWS SES.
     
     Args:
-        html_content (str): HTML content for email body
+        html_content (str or iterable): HTML content for email body, or a
+            stream of HTML fragments (see email_digest.html_part)
         sender_email (str): Email address to send from
         recipient_emails (list): List of email addresses to send to
+        sender (object): Sender with a send(msg, recipient_emails) method
+            (default: email_digest.get_sender(), i.e. SES)
     """
-    # Create message container
-    msg = MIMEMultipart('alternative')
-    
-    # Create today's date for the subject line
-    today = datetime.now().strftime("%m/%d/%Y")
-    
-    msg['Subject'] = f"Boating Conditions Report - {today}"
-    msg['From'] = sender_email
-    msg['To'] = ', '.join(recipient_emails)  # Join all recipients with commas
-    
-    # Attach HTML content to the email
-    html_part = MIMEText(html_content, 'html')
-    msg.attach(html_part)
-    
-    # Create SES client
-    ses = boto3.client('ses')
-    
-    # Print debug info
-    print(f"Sending from: {msg['From']}")
-    print(f"Sending to: {', '.join(recipient_emails)}")
-    
-    # Send the email
-    try:
-        response = ses.send_raw_email(
-            Source=msg['From'],
-            Destinations=recipient_emails,  # List of all recipients
-            RawMessage={'Data': msg.as_string()}
-        )
-        print(f"Email sent! Message ID: {response['MessageId']}")
-    except Exception as e:
-        print(f"Error sending email: {e}")
+    with tracing.span("email", recipients=len(recipient_emails)) as span:
+        msg = email_digest.build_message(html_content, sender_email, recipient_emails)
+        if tracing.enabled():
+            span.set(bytes=len(msg.as_string()))
+        
+        # Send the email
+        if sender is None:
+            sender = email_digest.get_sender()
+        sender.send(msg, recipient_emails)
     
     return
 
@@ -140,12 +178,11 @@ if __name__ == "__main__":
     
     # Save to JSON files
     with open("all_boating_conditions.json", 'w') as f:
-        json.dump(all_results, f, indent=2)
+        json.dump(future.forecast_result.to_json_dict(all_results), f, indent=2)
     
     # Generate HTML for email preview
-    html_content = table_generation.generate_html_tables(all_results)
     with open("boating_conditions.html", 'w') as f:
-        f.write(html_content)
+        table_generation.write_html_tables(all_results, f)
         
     # Open HTML in browser
     try:
@@ -0,0 +1,401 @@
+"""
+Module for large location catalogs with a spatial index.
+
+A LocationCatalog keeps spots as parallel arrays (names, regions, timezones,
+latitudes, longitudes) instead of one dict per spot, and buckets them into a
+regular latitude/longitude grid so radius and nearest-spot queries only look
+at a few buckets. Catalogs load from CSV or GeoJSON files, or from a list of
+location dictionaries such as locations.LOCATIONS.
+"""
+import csv
+import json
+import math
+import os
+import numpy as np
+import locations
+
+# Optional CSV/GeoJSON file of spots to use instead of locations.LOCATIONS,
+# both for region queries and as the default location list
+LOCATIONS_FILE = os.environ.get("LOCATIONS_FILE")
+
+# Mean Earth radius used for haversine distances
+EARTH_RADIUS_KM = 6371.0088
+
+# Size of a spatial index bucket in degrees (about 55 km of latitude)
+INDEX_CELL_DEG = 0.5
+
+# Bucket rings searched around a point before nearest() scans every spot
+NEAREST_MAX_RINGS = 4
+
+# Values used when a CSV row or GeoJSON feature leaves them out
+DEFAULT_REGION = ""
+DEFAULT_TIMEZONE = "UTC"
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """
+    Great-circle distance from one point to many points.
+
+    Args:
+        latitude (float): Latitude of the reference point
+        longitude (float): Longitude of the reference point
+        latitudes (np.ndarray): Latitudes of the other points
+        longitudes (np.ndarray): Longitudes of the other points
+
+    Returns:
+        np.ndarray: Distances in kilometers
+    """
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - math.radians(longitude)
+    a = np.sin(dlat / 2.0) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class LocationCatalog:
+    """
+    Spots stored as coordinate arrays with a grid-bucket spatial index.
+
+    Attributes:
+        names (list): Spot names
+        regions (list): Region per spot
+        timezones (list): Timezone name per spot
+        latitudes (np.ndarray): float64 latitude per spot
+        longitudes (np.ndarray): float64 longitude per spot
+    """
+
+    def __init__(self, names, regions, timezones, latitudes, longitudes, cell_deg=INDEX_CELL_DEG):
+        self.names = list(names)
+        self.regions = list(regions)
+        self.timezones = list(timezones)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self._lon_cells = int(math.ceil(360.0 / cell_deg))
+        self._buckets = self._build_index()
+
+    # Construction
+
+    @classmethod
+    def from_locations(cls, locations_list, cell_deg=INDEX_CELL_DEG):
+        """
+        Build a catalog from location dictionaries (e.g. locations.LOCATIONS).
+
+        Args:
+            locations_list (list): Location data dictionaries
+            cell_deg (float): Spatial index bucket size in degrees
+
+        Returns:
+            LocationCatalog: Catalog of the given locations
+        """
+        return cls(
+            [loc["name"] for loc in locations_list],
+            [loc.get("region", DEFAULT_REGION) for loc in locations_list],
+            [loc.get("timezone", DEFAULT_TIMEZONE) for loc in locations_list],
+            [loc["latitude"] for loc in locations_list],
+            [loc["longitude"] for loc in locations_list],
+            cell_deg
+        )
+
+    @classmethod
+    def from_csv(cls, path, cell_deg=INDEX_CELL_DEG):
+        """
+        Load a catalog from a CSV file.
+
+        The file needs a header row with name, latitude and longitude columns;
+        region and timezone columns are optional.
+
+        Args:
+            path (str): Path of the CSV file
+            cell_deg (float): Spatial index bucket size in degrees
+
+        Returns:
+            LocationCatalog: Catalog of the file's spots
+        """
+        names, regions, timezones, latitudes, longitudes = [], [], [], [], []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                names.append(row["name"])
+                regions.append(row.get("region") or DEFAULT_REGION)
+                timezones.append(row.get("timezone") or DEFAULT_TIMEZONE)
+                latitudes.append(float(row["latitude"]))
+                longitudes.append(float(row["longitude"]))
+        return cls(names, regions, timezones, latitudes, longitudes, cell_deg)
+
+    @classmethod
+    def from_geojson(cls, path, cell_deg=INDEX_CELL_DEG):
+        """
+        Load a catalog from a GeoJSON FeatureCollection of Point features.
+
+        Each feature's properties hold its name and optionally its region and
+        timezone. Features that are not points are skipped.
+
+        Args:
+            path (str): Path of the GeoJSON file
+            cell_deg (float): Spatial index bucket size in degrees
+
+        Returns:
+            LocationCatalog: Catalog of the file's spots
+        """
+        with open(path) as f:
+            collection = json.load(f)
+
+        names, regions, timezones, latitudes, longitudes = [], [], [], [], []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            properties = feature.get("properties") or {}
+            longitude, latitude = geometry["coordinates"][:2]
+            names.append(properties["name"])
+            regions.append(properties.get("region") or DEFAULT_REGION)
+            timezones.append(properties.get("timezone") or DEFAULT_TIMEZONE)
+            latitudes.append(float(latitude))
+            longitudes.append(float(longitude))
+        return cls(names, regions, timezones, latitudes, longitudes, cell_deg)
+
+    @classmethod
+    def load(cls, path, cell_deg=INDEX_CELL_DEG):
+        """
+        Load a catalog from a .csv or .geojson/.json file.
+
+        Args:
+            path (str): Path of the catalog file
+            cell_deg (float): Spatial index bucket size in degrees
+
+        Returns:
+            LocationCatalog: Catalog of the file's spots
+
+        Raises:
+            ValueError: if the file extension is not supported
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            return cls.from_csv(path, cell_deg)
+        if extension in (".geojson", ".json"):
+            return cls.from_geojson(path, cell_deg)
+        raise ValueError(f"Unsupported location catalog format: {path}")
+
+    # Spatial index
+
+    def _cell_rows(self, latitudes):
+        return np.floor((np.asarray(latitudes) + 90.0) / self.cell_deg).astype(np.int64)
+
+    def _cell_cols(self, longitudes):
+        return np.floor((np.asarray(longitudes) + 180.0) / self.cell_deg).astype(np.int64) % self._lon_cells
+
+    def _build_index(self):
+        """Bucket spot indices by grid cell."""
+        if len(self.latitudes) == 0:
+            return {}
+        keys = self._cell_rows(self.latitudes) * self._lon_cells + self._cell_cols(self.longitudes)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.append(starts[1:], len(order))
+        return {
+            int(sorted_keys[start]): order[start:end]
+            for start, end in zip(starts.tolist(), ends.tolist())
+        }
+
+    def _candidates(self, latitude, longitude, radius_km):
+        """Indices of the spots in every bucket that may lie within radius_km."""
+        lat_span = math.degrees(radius_km / EARTH_RADIUS_KM)
+        min_row = int(self._cell_rows(max(latitude - lat_span, -90.0)))
+        max_row = int(self._cell_rows(min(latitude + lat_span, 90.0)))
+
+        # Longitude span widens towards the poles; near them scan every column
+        max_abs_lat = min(abs(latitude) + lat_span, 90.0)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat <= 1e-9 or lat_span / cos_lat >= 180.0:
+            cols = range(self._lon_cells)
+        else:
+            lon_span = lat_span / cos_lat
+            first_col = int(math.floor((longitude - lon_span + 180.0) / self.cell_deg))
+            last_col = int(math.floor((longitude + lon_span + 180.0) / self.cell_deg))
+            cols = sorted({col % self._lon_cells for col in range(first_col, last_col + 1)})
+
+        found = [
+            self._buckets[row * self._lon_cells + col]
+            for row in range(min_row, max_row + 1)
+            for col in cols
+            if row * self._lon_cells + col in self._buckets
+        ]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    # Queries
+
+    def within(self, latitude, longitude, radius_km):
+        """
+        Find the spots within a radius of a point.
+
+        Args:
+            latitude (float): Latitude of the center
+            longitude (float): Longitude of the center
+            radius_km (float): Search radius in kilometers
+
+        Returns:
+            np.ndarray: Spot indices, nearest first
+        """
+        candidates = self._candidates(latitude, longitude, radius_km)
+        distances = haversine_km(
+            latitude, longitude, self.latitudes[candidates], self.longitudes[candidates]
+        )
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        return candidates[np.argsort(distances, kind="stable")]
+
+    def nearest(self, latitude, longitude):
+        """
+        Find the spot closest to a point.
+
+        Buckets are searched in growing rings around the point; once a spot is
+        found, a radius query at its distance confirms the closest one. Points
+        far away from every spot fall back to scanning the whole catalog.
+
+        Args:
+            latitude (float): Latitude of the point
+            longitude (float): Longitude of the point
+
+        Returns:
+            tuple: (spot index, distance in km), or (None, None) for an empty catalog
+        """
+        if len(self.latitudes) == 0:
+            return None, None
+
+        row = int(self._cell_rows(latitude))
+        col = int(self._cell_cols(longitude))
+        candidates = None
+        for ring in range(NEAREST_MAX_RINGS + 1):
+            ring_cells = [
+                (ring_row, ring_col)
+                for ring_row in range(row - ring, row + ring + 1)
+                for ring_col in range(col - ring, col + ring + 1)
+                if max(abs(ring_row - row), abs(ring_col - col)) == ring and ring_row >= 0
+            ]
+            found = [
+                self._buckets[key]
+                for key in (ring_row * self._lon_cells + ring_col % self._lon_cells
+                            for ring_row, ring_col in ring_cells)
+                if key in self._buckets
+            ]
+            if found:
+                # Any spot in the first non-empty ring bounds the nearest distance
+                first = found[0][:1]
+                bound = float(haversine_km(
+                    latitude, longitude, self.latitudes[first], self.longitudes[first]
+                )[0])
+                candidates = self._candidates(latitude, longitude, bound)
+                break
+
+        if candidates is None:
+            candidates = np.arange(len(self.latitudes))
+
+        distances = haversine_km(
+            latitude, longitude, self.latitudes[candidates], self.longitudes[candidates]
+        )
+        best = int(np.argmin(distances))
+        return int(candidates[best]), float(distances[best])
+
+    # Location dictionaries for the forecast pipeline
+
+    def __len__(self):
+        return len(self.names)
+
+    def location(self, index):
+        """
+        Return one spot as a location dictionary (like locations.LOCATIONS entries).
+
+        Args:
+            index (int): Spot index
+
+        Returns:
+            dict: name, region, timezone, latitude and longitude
+        """
+        return {
+            "name": self.names[index],
+            "region": self.regions[index],
+            "timezone": self.timezones[index],
+            "latitude": float(self.latitudes[index]),
+            "longitude": float(self.longitudes[index])
+        }
+
+    def locations(self, indices=None):
+        """
+        Return spots as a list of location dictionaries.
+
+        Args:
+            indices (iterable): Spot indices (default: every spot in catalog order)
+
+        Returns:
+            list: Location data dictionaries
+        """
+        if indices is None:
+            indices = range(len(self))
+        return [self.location(int(index)) for index in indices]
+
+    def region(self, latitude, longitude, radius_km):
+        """
+        Return the spots within a radius of a point as location dictionaries.
+
+        Args:
+            latitude (float): Latitude of the center
+            longitude (float): Longitude of the center
+            radius_km (float): Search radius in kilometers
+
+        Returns:
+            list: Location data dictionaries in catalog order
+        """
+        return self.locations(np.sort(self.within(latitude, longitude, radius_km)))
+
+_catalog = None
+
+def get_catalog():
+    """
+    Return the process-wide location catalog, loading it on first use.
+
+    The catalog comes from LOCATIONS_FILE when it is set, and from
+    locations.LOCATIONS otherwise.
+
+    Returns:
+        LocationCatalog: Shared location catalog
+    """
+    global _catalog
+    if _catalog is None:
+        if LOCATIONS_FILE:
+            _catalog = LocationCatalog.load(LOCATIONS_FILE)
+        else:
+            _catalog = LocationCatalog.from_locations(locations.LOCATIONS)
+    return _catalog
+
+def default_locations():
+    """
+    Return the locations to analyze when no list or region is given.
+
+    Every spot of LOCATIONS_FILE when it is set, else locations.LOCATIONS.
+
+    Returns:
+        list: Location data dictionaries
+    """
+    if LOCATIONS_FILE:
+        return get_catalog().locations()
+    return locations.LOCATIONS
+
+def parse_region(value):
+    """
+    Parse a region query written as "latitude,longitude,radius_km".
+
+    Args:
+        value (str): Region query string
+
+    Returns:
+        tuple: (latitude, longitude, radius_km) floats
+
+    Raises:
+        ValueError: if the string does not hold exactly three numbers
+    """
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 3:
+        raise ValueError(f"Region must be 'latitude,longitude,radius_km', got {value!r}")
+    return tuple(parts)
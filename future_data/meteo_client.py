@@ -0,0 +1,51 @@
+"""
+Shared Open-Meteo API client.
+
+The client (and its cache/retry session) is built on first use, so importing
+the API configuration modules never touches the network. Marine and weather
+requests share one HTTP cache, keyed by the exact coordinates requested;
+data_fetcher additionally keeps decoded frames per model grid point.
+"""
+import threading
+import recording
+
+# Setup for the Open-Meteo API client with cache and retry on error
+CACHE_NAME = '/tmp/.cache'
+CACHE_EXPIRE_AFTER = 3600
+# Serve expired responses for this many seconds while refreshing them in the background
+STALE_WHILE_REVALIDATE = 3600
+RETRIES = 5
+BACKOFF_FACTOR = 0.2
+
+# Forecast horizon requested from both APIs. Both series are also requested in
+# GMT, so the marine and weather hourly ranges cover exactly the same hours.
+FORECAST_DAYS = 7
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Return the shared Open-Meteo client, creating it on first call.
+
+    Returns:
+        openmeteo_requests.Client: Client with cache and retry enabled
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported lazily: these packages are slow to import
+                import openmeteo_requests
+                import requests_cache
+                from retry_requests import retry
+
+                cache_session = requests_cache.CachedSession(
+                    CACHE_NAME,
+                    expire_after = CACHE_EXPIRE_AFTER,
+                    stale_while_revalidate = STALE_WHILE_REVALIDATE
+                )
+                retry_session = retry(cache_session, retries = RETRIES, backoff_factor = BACKOFF_FACTOR)
+                # Record or replay raw responses when HTTP_ARCHIVE_MODE is set
+                _client = openmeteo_requests.Client(session = recording.wrap_session(retry_session))
+    return _client
@@ -0,0 +1,45 @@
+"""
+Open-Meteo ensemble API configuration.
+
+Importing this module performs no network I/O; run it directly for a demo
+request against the default coordinates.
+
+The URL and models can be overridden with environment variables, e.g. to
+point at a local stand-in server:
+    ENSEMBLE_URL            ensemble API endpoint
+    ENSEMBLE_MODELS         comma-separated weather ensemble models
+    ENSEMBLE_MARINE_MODELS  comma-separated marine models (each one is
+                            treated as a member; default: the best match run)
+"""
+import os
+from meteo_client import FORECAST_DAYS, get_client
+
+url = os.environ.get("ENSEMBLE_URL", "https://ensemble-api.open-meteo.com/v1/ensemble")
+params = {
+	"latitude": 18.4669,
+	"longitude": 66.0899,
+	"hourly": ["wind_speed_10m", "wind_gusts_10m"],
+	"forecast_days": FORECAST_DAYS
+}
+
+# Weather ensemble models; each returns all of its members in one response
+MODELS = [model.strip() for model in os.environ.get("ENSEMBLE_MODELS", "gfs_seamless").split(",") if model.strip()]
+
+# Marine models used as marine members (empty: the marine API's best match only)
+MARINE_MODELS = [model.strip() for model in os.environ.get("ENSEMBLE_MARINE_MODELS", "").split(",") if model.strip()]
+
+def main():
+    """Fetch and print the ensemble members for the default coordinates."""
+    import ensemble
+
+    responses = get_client().weather_api(url, params=dict(params, models=MODELS[0]))
+
+    # Process first location
+    response = responses[0]
+    print(f"Coordinates {response.Latitude()}°N {response.Longitude()}°E")
+    seconds, members = ensemble.response_members(response, params["hourly"])
+    for name, values in members.items():
+        print(f"{name}: {values.shape[0]} members x {values.shape[1]} hours")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Module for analyzing many locations on a process pool.
+
+Fetched locations are grouped into shards. The aligned hourly arrays of a
+shard are packed into one block of shared memory, so worker processes
+analyze views of it instead of unpickling DataFrames; only the (much
+smaller) analyzed results travel back. Results are keyed by location index,
+so the output order never depends on which worker finishes first.
+
+Workers are started with forkserver (spawn where that is unavailable), not
+fork: the pool is created while fetch threads are running, and a forked
+child could inherit a lock one of them holds.
+"""
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import data_analyzer
+import solar
+
+# Number of locations packed into one shared memory block / pool task
+ANALYSIS_SHARD_SIZE = 100
+
+# Byte alignment of each array inside a shared memory block
+_ALIGNMENT = 8
+
+def pool_context():
+    """Return the multiprocessing context for the analysis pool (never fork)."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+def default_workers():
+    """Return the default number of analysis processes (one per core)."""
+    return os.cpu_count() or 1
+
+def _pack_shard(shard):
+    """
+    Copy the aligned arrays of a shard into one shared memory block.
+
+    Args:
+        shard (list): (location_index, location_data, seconds, columns) tuples
+
+    Returns:
+        tuple: (shm, entries) where shm is the SharedMemory block and entries
+            describe each location as (location_index, location_data, arrays)
+            with arrays a list of (name, dtype, offset, length)
+    """
+    layout = []
+    size = 0
+    for location_index, location, seconds, columns in shard:
+        arrays = []
+        for name, values in [("date", seconds)] + list(columns.items()):
+            values = np.ascontiguousarray(values)
+            arrays.append((name, values.dtype.str, size, len(values), values))
+            size += -(-values.nbytes // _ALIGNMENT) * _ALIGNMENT
+        layout.append((location_index, location, arrays))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    entries = []
+    for location_index, location, arrays in layout:
+        described = []
+        for name, dtype, offset, length, values in arrays:
+            np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[:] = values
+            described.append((name, dtype, offset, length))
+        entries.append((location_index, location, described))
+    return shm, entries
+
+def _analyze_views(buffer, entries, daylight_window):
+    """
+    Analyze every location of a shard on views of its shared memory block.
+
+    Results may still point into the block (e.g. pass-through metrics), so
+    they are pickled here, while it is mapped; once this returns no view is
+    left and the block can be closed.
+
+    Returns:
+        bytes: Pickled list of (location_index, LocationForecast) tuples
+    """
+    results = []
+    for location_index, location, arrays in entries:
+        views = {
+            name: np.ndarray(length, dtype=dtype, buffer=buffer, offset=offset)
+            for name, dtype, offset, length in arrays
+        }
+        seconds = views.pop("date")
+        location_info = data_analyzer.get_location_info(location)
+        results.append((
+            location_index,
+            data_analyzer.analyze_columns(seconds, views, location_info, daylight_window)
+        ))
+    return pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _analyze_shard(shm_name, entries, daylight_window):
+    """
+    Analyze one shard inside a worker process.
+
+    Args:
+        shm_name (str): Name of the shard's shared memory block
+        entries (list): Location descriptions from _pack_shard
+        daylight_window (tuple): Optional daylight window (see data_analyzer.analyze_conditions)
+
+    Returns:
+        bytes: Pickled list of (location_index, LocationForecast) tuples
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _analyze_views(shm.buf, entries, daylight_window)
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # A propagating exception still references views; the parent unlinks the block
+
+def _remember_sun_times(location, forecast):
+    """Store sunrise/sunset computed by a worker in this process's solar table."""
+    if len(forecast.dates):
+        solar.get_table().store(
+            location["latitude"],
+            location["longitude"],
+            forecast.time[forecast.day_starts] // 86400,
+            forecast.sunrise,
+            forecast.sunset
+        )
+
+def analyze_fetched_parallel(fetched, workers=None, daylight_window=None,
+                             shard_size=ANALYSIS_SHARD_SIZE):
+    """
+    Analyze fetched locations on a process pool.
+
+    Shards are submitted as soon as enough locations have arrived, so
+    analysis overlaps with the remaining fetches.
+
+    Args:
+        fetched (iterable): (location_index, location_data, weather_df, marine_df)
+            tuples, as yielded by data_fetcher.fetch_all_locations
+        workers (int): Number of analysis processes (default: one per core)
+        daylight_window (tuple): Optional daylight window (see data_analyzer.analyze_conditions)
+        shard_size (int): Number of locations per pool task
+
+    Returns:
+        dict: Location index to LocationForecast
+    """
+    workers = max(1, workers or default_workers())
+    locations_by_index = {}
+    blocks = []
+    futures = []
+
+    def submit(shard):
+        shm, entries = _pack_shard(shard)
+        blocks.append(shm)
+        futures.append(executor.submit(_analyze_shard, shm.name, entries, daylight_window))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as executor:
+            shard = []
+            for location_index, location, weather_df, marine_df in fetched:
+                print(f"Processing location: {location['name']}, {location['region']}")
+                locations_by_index[location_index] = location
+                seconds, columns = data_analyzer.align_frames(marine_df, weather_df)
+                shard.append((location_index, location, seconds, columns))
+                if len(shard) >= shard_size:
+                    submit(shard)
+                    shard = []
+            if shard:
+                submit(shard)
+
+            results_by_index = {}
+            for future in futures:
+                for location_index, forecast in pickle.loads(future.result()):
+                    results_by_index[location_index] = forecast
+                    _remember_sun_times(locations_by_index[location_index], forecast)
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return results_by_index
@@ -0,0 +1,305 @@
+"""
+Module for declarative rating profiles.
+
+A rating profile describes, as plain data, when an hour is GOOD and when it
+is BAD for one kind of boat; everything else is MEDIOCRE. Profiles are
+compiled once into a table of threshold comparisons, and any number of
+profiles is then evaluated in one broadcast pass over the hourly arrays,
+giving a profile x hour matrix of rating codes.
+
+Profile format:
+    {
+        "name": "kayak",
+        "good": <condition>,          # hours that are GOOD
+        "bad": <condition>,           # hours that are BAD
+        "precedence": "good"          # which wins when both match (default "good")
+    }
+
+A condition is a comparison [metric, op, threshold] or {"all": [...]} /
+{"any": [...]} of conditions. The threshold is a number or [metric, factor]
+for a comparison against factor * another metric. Metrics are the names in
+METRICS and ops are <, <=, >, >=.
+"""
+import json
+import os
+import numpy as np
+import calculations
+import forecast_result
+
+# Optional JSON file with the profiles to evaluate (e.g. one per boat class)
+RATING_PROFILES_FILE = os.environ.get("RATING_PROFILES_FILE")
+
+# Metrics a profile can compare, computed from the API columns
+METRICS = (
+    "wave_height_m",
+    "wave_height_ft",
+    "wave_period",
+    "wind_speed_kmh",
+    "wind_speed_mph",
+    "wind_gust_kmh",
+    "wind_gust_mph"
+)
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal
+}
+
+# The forecast rating; calculations.assess_hour_conditions evaluates this profile
+DEFAULT_PROFILE = {
+    "name": "default",
+    "good": {"all": [
+        ["wave_height_ft", "<", calculations.GOOD_WAVE_HEIGHT_MAX_FT],
+        ["wind_speed_mph", "<", calculations.GOOD_WIND_SPEED_MAX_MPH],
+        ["wave_period", ">=", ["wave_height_m", 2.0]]
+    ]},
+    "bad": {"any": [
+        ["wave_height_ft", ">", calculations.MEDIOCRE_WAVE_HEIGHT_MAX_FT],
+        ["wind_speed_mph", ">", calculations.MEDIOCRE_WIND_SPEED_MAX_MPH],
+        ["wind_gust_mph", ">", calculations.MEDIOCRE_WIND_GUST_MAX_MPH]
+    ]},
+    "precedence": "good"
+}
+
+# The buoy rating, for comparing forecasts with buoy reports; it mirrors the
+# thresholds of current_data/conditions_analyzer.ConditionsAnalyzer, which
+# keeps its own copy so the buoy scripts do not depend on this package
+BUOY_PROFILE = {
+    "name": "buoy",
+    "good": {"all": [
+        ["wave_height_ft", "<", 2.0],
+        ["wave_period", ">", 7.0],
+        ["wind_speed_mph", "<", 10.0],
+        ["wind_gust_mph", "<", 15.0],
+        ["wave_period", ">=", ["wave_height_m", 2.0]]
+    ]},
+    "bad": {"any": [
+        ["wave_height_ft", ">", 4.0],
+        {"all": [["wave_period", "<", 5.0], ["wave_height_ft", ">", 3.0]]},
+        {"all": [["wave_period", ">", 10.0], ["wave_height_ft", ">", 4.0]]},
+        ["wind_speed_mph", ">", 18.0],
+        ["wind_gust_mph", ">", 25.0]
+    ]},
+    "precedence": "bad"
+}
+
+def load_profiles(path):
+    """
+    Load rating profiles from a JSON file holding a list of profiles.
+
+    Args:
+        path (str): Path of the JSON file
+
+    Returns:
+        list: Profile dictionaries
+    """
+    with open(path) as f:
+        return json.load(f)
+
+def metric_arrays(wave_height_m, wave_period, wind_speed_kmh, wind_gust_kmh):
+    """
+    Compute every profile metric from the API columns.
+
+    Args:
+        wave_height_m (array-like): Wave heights in meters
+        wave_period (array-like): Wave periods in seconds
+        wind_speed_kmh (array-like): Wind speeds in km/h
+        wind_gust_kmh (array-like): Wind gust speeds in km/h
+
+    Returns:
+        dict: Metric name to float64 array
+    """
+    wave_height_m = np.asarray(wave_height_m, dtype=np.float64)
+    wind_speed_kmh = np.asarray(wind_speed_kmh, dtype=np.float64)
+    wind_gust_kmh = np.asarray(wind_gust_kmh, dtype=np.float64)
+    return {
+        "wave_height_m": wave_height_m,
+        "wave_height_ft": calculations.convert_wave_height_to_feet(wave_height_m),
+        "wave_period": np.asarray(wave_period, dtype=np.float64),
+        "wind_speed_kmh": wind_speed_kmh,
+        "wind_speed_mph": calculations.convert_wind_speed_to_mph(wind_speed_kmh),
+        "wind_gust_kmh": wind_gust_kmh,
+        "wind_gust_mph": calculations.convert_wind_speed_to_mph(wind_gust_kmh)
+    }
+
+class CompiledProfiles:
+    """
+    Rating profiles compiled for broadcast evaluation.
+
+    Every comparison of every profile becomes one row of a comparison
+    table. Comparisons sharing (metric, op, reference metric) are evaluated
+    together as one (thresholds x hours) broadcast; profile conditions are
+    then reductions over rows of the resulting boolean matrix.
+
+    Args:
+        profiles (list): Profile dictionaries (see module docstring)
+
+    Raises:
+        ValueError: if a profile uses an unknown metric or operator
+    """
+
+    def __init__(self, profiles):
+        self.names = [profile["name"] for profile in profiles]
+        self._leaves = []   # (metric, op, reference_metric, constant)
+        self._nodes = []    # ("leaf", leaf_index) or ("all"/"any", [node indices])
+        self._good = []
+        self._bad = []
+        self._good_wins = []
+
+        for profile in profiles:
+            self._good.append(self._compile(profile["good"]))
+            self._bad.append(self._compile(profile["bad"]))
+            precedence = profile.get("precedence", "good")
+            if precedence not in ("good", "bad"):
+                raise ValueError(f"Profile {profile['name']}: precedence must be 'good' or 'bad'")
+            self._good_wins.append(precedence == "good")
+
+        # Group comparisons that can share one broadcast
+        self._groups = {}
+        for index, (metric, op, reference, constant) in enumerate(self._leaves):
+            self._groups.setdefault((metric, op, reference), []).append((index, constant))
+        self._groups = {
+            key: (np.array([index for index, _ in leaves]),
+                  np.array([constant for _, constant in leaves], dtype=np.float64)[:, None])
+            for key, leaves in self._groups.items()
+        }
+
+    def __len__(self):
+        return len(self.names)
+
+    def _compile(self, condition):
+        """Add a condition's nodes and return the index of its root node."""
+        if isinstance(condition, dict):
+            (kind, children), = condition.items()
+            if kind not in ("all", "any"):
+                raise ValueError(f"Unknown condition {kind!r}; use 'all' or 'any'")
+            node = (kind, [self._compile(child) for child in children])
+        else:
+            metric, op, threshold = condition
+            if op not in _OPERATORS:
+                raise ValueError(f"Unknown operator {op!r}")
+            reference, constant = None, threshold
+            if isinstance(threshold, (list, tuple)):
+                reference, constant = threshold
+            for name in (metric, reference):
+                if name is not None and name not in METRICS:
+                    raise ValueError(f"Unknown metric {name!r}")
+            self._leaves.append((metric, op, reference, float(constant)))
+            node = ("leaf", len(self._leaves) - 1)
+        self._nodes.append(node)
+        return len(self._nodes) - 1
+
+    def _evaluate_leaves(self, metrics, hours):
+        """Evaluate every comparison; returns a (comparisons x hours) bool matrix."""
+        leaves = np.empty((len(self._leaves), hours), dtype=bool)
+        for (metric, op, reference), (indices, constants) in self._groups.items():
+            threshold = constants if reference is None else constants * metrics[reference][None, :]
+            leaves[indices] = _OPERATORS[op](metrics[metric][None, :], threshold)
+        return leaves
+
+    def _evaluate_nodes(self, leaves, roots):
+        """Reduce the comparison matrix to one boolean row per root node."""
+        values = {}
+        for index, (kind, operand) in enumerate(self._nodes):
+            if kind == "leaf":
+                values[index] = leaves[operand]
+            elif kind == "all":
+                values[index] = np.logical_and.reduce([values[child] for child in operand])
+            else:
+                values[index] = np.logical_or.reduce([values[child] for child in operand])
+        return np.array([values[root] for root in roots]).reshape(len(roots), leaves.shape[1])
+
+    def rate(self, wave_height_m, wave_period, wind_speed_kmh, wind_gust_kmh):
+        """
+        Rate every hour for every profile in one pass.
+
+        Args:
+            wave_height_m (array-like): Wave heights in meters
+            wave_period (array-like): Wave periods in seconds
+            wind_speed_kmh (array-like): Wind speeds in km/h
+            wind_gust_kmh (array-like): Wind gust speeds in km/h
+
+        Returns:
+            np.ndarray: (profiles x hours) int8 rating codes (calculations.RATING_*);
+                inputs of any broadcastable shape give (profiles,) + that shape
+        """
+        columns = (wave_height_m, wave_period, wind_speed_kmh, wind_gust_kmh)
+        shape = np.broadcast_shapes(*(np.shape(values) for values in columns))
+        metrics = metric_arrays(*(np.broadcast_to(values, shape).ravel() for values in columns))
+        hours = len(metrics["wave_height_m"])
+        leaves = self._evaluate_leaves(metrics, hours)
+        is_good = self._evaluate_nodes(leaves, self._good)
+        is_bad = self._evaluate_nodes(leaves, self._bad)
+
+        # Resolve hours that match both according to each profile's precedence
+        good_wins = np.array(self._good_wins)[:, None]
+        codes = np.full((len(self), hours), calculations.RATING_MEDIOCRE, dtype=np.int8)
+        codes[is_good & (good_wins | ~is_bad)] = calculations.RATING_GOOD
+        codes[is_bad & ~(good_wins & is_good)] = calculations.RATING_BAD
+        return codes.reshape((len(self),) + shape)
+
+def compile_profiles(profiles=None):
+    """
+    Compile rating profiles.
+
+    Args:
+        profiles (list): Profile dictionaries (default: the profiles in
+            RATING_PROFILES_FILE, else DEFAULT_PROFILE and BUOY_PROFILE)
+
+    Returns:
+        CompiledProfiles: Profiles ready for CompiledProfiles.rate
+    """
+    if profiles is None and RATING_PROFILES_FILE:
+        profiles = load_profiles(RATING_PROFILES_FILE)
+    if profiles is None:
+        profiles = [DEFAULT_PROFILE, BUOY_PROFILE]
+    return CompiledProfiles(profiles)
+
+_default_profile = None
+
+def default_profile():
+    """
+    Return DEFAULT_PROFILE, compiled on first use.
+
+    Returns:
+        CompiledProfiles: The forecast rating as a single compiled profile
+    """
+    global _default_profile
+    if _default_profile is None:
+        _default_profile = CompiledProfiles([DEFAULT_PROFILE])
+    return _default_profile
+
+def profile_ratings_to_dict(profile_ratings):
+    """
+    Convert data_analyzer.analyze_profiles output to plain dictionaries for JSON.
+
+    Args:
+        profile_ratings (dict): Profile ratings of one location
+
+    Returns:
+        dict: `{profile: {date: {day_rating, good_hours_count, hourly}}}`
+            where hourly holds `{time, rating}` per hour
+    """
+    seconds = profile_ratings["time"]
+    day_numbers = seconds // 86400
+    day_starts = np.flatnonzero(np.r_[True, day_numbers[1:] != day_numbers[:-1]])[:len(profile_ratings["dates"])]
+    bounds = np.append(day_starts, len(seconds)).tolist()
+    hours = [forecast_result.format_hour(epoch) for epoch in seconds.tolist()]
+
+    results = {}
+    for profile_index, name in enumerate(profile_ratings["profiles"]):
+        labels = [calculations.RATING_LABELS[code] for code in profile_ratings["rating"][profile_index].tolist()]
+        results[name] = {
+            date: {
+                "day_rating": calculations.RATING_LABELS[profile_ratings["day_rating"][profile_index, day_index]],
+                "good_hours_count": int(profile_ratings["good_hours_count"][profile_index, day_index]),
+                "hourly": [
+                    {"time": hour, "rating": label}
+                    for hour, label in zip(hours[start:end], labels[start:end])
+                ]
+            }
+            for day_index, (date, start, end) in enumerate(zip(profile_ratings["dates"], bounds[:-1], bounds[1:]))
+        }
+    return results
@@ -0,0 +1,227 @@
+"""
+Record/replay archive for HTTP responses.
+
+In record mode every response body is stored as raw bytes in an on-disk
+archive, keyed by a hash of the request (method, URL and params). In replay
+mode the same requests are answered from the archive, memory-mapped and
+without touching the network, so forecasts can be reprocessed offline and
+load tests and profiles are deterministic.
+
+Configured with environment variables:
+    HTTP_ARCHIVE_DIR    archive directory (default: /tmp/.http_archive)
+    HTTP_ARCHIVE_MODE   'record', 'replay' or empty/unset (disabled)
+
+Used by meteo_client for Open-Meteo requests.
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+
+# Where recorded responses are stored
+HTTP_ARCHIVE_DIR = os.environ.get("HTTP_ARCHIVE_DIR", "/tmp/.http_archive")
+
+# 'record', 'replay' or '' (pass requests straight through)
+HTTP_ARCHIVE_MODE = os.environ.get("HTTP_ARCHIVE_MODE", "").strip().lower()
+
+MODES = ("record", "replay")
+
+class ArchiveMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+def request_key(method, url, params=None):
+    """
+    Hash a request into its archive key.
+
+    Params are normalized (sorted keys, lists kept in order) so the same
+    request always maps to the same key.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL without query string
+        params (dict): Query or form parameters
+
+    Returns:
+        str: Hex SHA-256 key
+    """
+    canonical = json.dumps(
+        [method.upper(), url, sorted((str(key), value) for key, value in (params or {}).items())],
+        default=str,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ArchivedResponse:
+    """
+    Minimal response object served from the archive.
+
+    Provides the parts of the requests/niquests Response interface the
+    project uses: status_code, content, text, headers, json() and
+    raise_for_status().
+    """
+
+    def __init__(self, url, status_code, content, headers=None, encoding="utf-8"):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = encoding
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return bytes(self.content).decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise OSError(f"{self.status_code} error for archived response {self.url}")
+
+class Archive:
+    """
+    Directory of recorded responses.
+
+    Each response is stored as `<key[:2]>/<key>.bin` (raw body bytes) plus
+    `<key[:2]>/<key>.json` (URL, params, status code and headers).
+    """
+
+    def __init__(self, directory=HTTP_ARCHIVE_DIR):
+        self.directory = directory
+
+    def _paths(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}.bin"), os.path.join(folder, f"{key}.json")
+
+    def __contains__(self, key):
+        return os.path.exists(self._paths(key)[1])
+
+    def store(self, key, content, metadata):
+        """
+        Write one response; files are swapped in atomically.
+
+        Args:
+            key (str): Request key (see request_key)
+            content (bytes): Raw response body
+            metadata (dict): JSON-serializable request/response details
+        """
+        body_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        for path, data in ((body_path, content or b""), (meta_path, json.dumps(metadata, default=str).encode("utf-8"))):
+            with open(path + suffix, "wb") as f:
+                f.write(data)
+            os.replace(path + suffix, path)
+
+    def load(self, key):
+        """
+        Read one response with its body memory-mapped.
+
+        Args:
+            key (str): Request key (see request_key)
+
+        Returns:
+            tuple: (content, metadata) where content is a read-only mmap (or
+                b'' for an empty body)
+
+        Raises:
+            ArchiveMissError: if the request is not in the archive
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                metadata = json.load(f)
+            with open(body_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b"", metadata
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), metadata
+        except FileNotFoundError:
+            raise ArchiveMissError(f"Request {key} is not in the archive {self.directory}") from None
+
+    def record(self, method, url, params, response):
+        """Store a live response under its request key."""
+        self.store(request_key(method, url, params), response.content, {
+            "method": method.upper(),
+            "url": url,
+            "params": params,
+            "status_code": response.status_code,
+            "headers": dict(response.headers or {}),
+            "encoding": getattr(response, "encoding", None),
+            "recorded_at": time.time()
+        })
+
+    def replay(self, method, url, params):
+        """Serve a recorded response as an ArchivedResponse."""
+        content, metadata = self.load(request_key(method, url, params))
+        return ArchivedResponse(
+            url,
+            metadata["status_code"],
+            content,
+            metadata.get("headers"),
+            metadata.get("encoding") or "utf-8"
+        )
+
+class RecordingSession:
+    """
+    Session wrapper that records or replays get/post requests.
+
+    Wraps any requests-like session (e.g. the cached retry session used by
+    the Open-Meteo client). In replay mode the wrapped session is never used.
+
+    Args:
+        session (object): Session with get() and post() methods
+        archive (Archive): Archive to record to / replay from
+        mode (str): 'record' or 'replay'
+    """
+
+    def __init__(self, session, archive, mode):
+        if mode not in MODES:
+            raise ValueError(f"HTTP archive mode must be one of {MODES}, got {mode!r}")
+        self.session = session
+        self.archive = archive
+        self.mode = mode
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        request_params = params if params is not None else data
+        if self.mode == "replay":
+            return self.archive.replay(method, url, request_params)
+
+        if method.upper() == "POST":
+            response = self.session.post(url, data=data, **kwargs)
+        else:
+            response = self.session.get(url, params=params, **kwargs)
+        self.archive.record(method, url, request_params, response)
+        return response
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+    def close(self):
+        if self.session is not None and hasattr(self.session, "close"):
+            self.session.close()
+
+def wrap_session(session, mode=None, directory=None):
+    """
+    Wrap a session for recording or replay according to the configuration.
+
+    Args:
+        session (object): Session with get() and post() methods
+        mode (str): 'record', 'replay' or '' (default: HTTP_ARCHIVE_MODE)
+        directory (str): Archive directory (default: HTTP_ARCHIVE_DIR)
+
+    Returns:
+        object: `session` unchanged when disabled, else a RecordingSession
+    """
+    mode = HTTP_ARCHIVE_MODE if mode is None else mode
+    if not mode:
+        return session
+    return RecordingSession(session, Archive(directory or HTTP_ARCHIVE_DIR), mode)
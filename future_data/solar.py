@@ -0,0 +1,300 @@
+"""
+Module for precomputed sunrise/sunset tables.
+
+Solar times are fully deterministic, so they are computed once per location
+and date, memoized in memory (which survives Lambda warm invocations) and
+persisted to a JSON file between runs. Missing entries are computed for a
+whole date range at once with a NumPy port of the NOAA algorithm used by
+astral, so the results match astral.sun.sun.
+"""
+import json
+import os
+import threading
+from datetime import date as date_type, datetime, timezone
+import numpy as np
+from astral import refraction_at_zenith
+from astral.sun import SUN_APPARENT_RADIUS
+
+# Where the solar table is persisted between runs (Lambda can only write /tmp)
+SOLAR_TABLE_PATH = os.environ.get("SOLAR_TABLE_PATH", "/tmp/.solar_table.json")
+
+# Entries older than this many days are dropped when the table is saved
+SOLAR_TABLE_KEEP_DAYS = 7
+
+# Sunrise/sunset zenith including the sun's apparent radius and refraction
+_ZENITH = 90.0 + SUN_APPARENT_RADIUS
+_ZENITH_ADJUSTED = _ZENITH + refraction_at_zenith(_ZENITH)
+
+# Julian day of 1970-01-01 00:00 UTC
+_UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+def _time_of_transit(latitude, longitude, day_numbers, rising):
+    """
+    Vectorized port of astral.sun.time_of_transit for sunrise/sunset.
+
+    Args:
+        latitude (float): Observer latitude
+        longitude (float): Observer longitude
+        day_numbers (np.ndarray): Dates as days since 1970-01-01
+        rising (bool): True for sunrise, False for sunset
+
+    Returns:
+        np.ndarray: Transit times in minutes after UTC midnight of each date
+    """
+    latitude = min(max(latitude, -89.8), 89.8)
+    latitude_rad = np.radians(latitude)
+    jd = day_numbers.astype(np.float64) + _UNIX_EPOCH_JULIAN_DAY
+    adjustment = np.zeros_like(jd)
+    time_utc = np.zeros_like(jd)
+
+    for _ in range(2):
+        jc = (jd + adjustment - 2451545.0) / 36525.0
+
+        # Solar coordinates (see astral.sun for the scalar versions)
+        l0 = (280.46646 + jc * (36000.76983 + 0.0003032 * jc)) % 360.0
+        m = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+        e = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+        mrad = np.radians(m)
+        c = (
+            np.sin(mrad) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+            + np.sin(mrad + mrad) * (0.019993 - 0.000101 * jc)
+            + np.sin(mrad + mrad + mrad) * 0.000289
+        )
+        omega = 125.04 - 1934.136 * jc
+        apparent_long = l0 + c - 0.00569 - 0.00478 * np.sin(np.radians(omega))
+        seconds = 21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))
+        obliquity = 23.0 + (26.0 + (seconds / 60.0)) / 60.0 + 0.00256 * np.cos(np.radians(omega))
+        declination_rad = np.arcsin(np.sin(np.radians(obliquity)) * np.sin(np.radians(apparent_long)))
+
+        # Hour angle of the sun at the sunrise/sunset zenith
+        with np.errstate(invalid="ignore"):
+            hour_angle = np.arccos(
+                (np.cos(np.radians(_ZENITH_ADJUSTED)) - np.sin(latitude_rad) * np.sin(declination_rad))
+                / (np.cos(latitude_rad) * np.cos(declination_rad))
+            )
+        if not rising:
+            hour_angle = -hour_angle
+
+        # Equation of time
+        y = np.tan(np.radians(obliquity) / 2.0) ** 2
+        l0_rad = np.radians(l0)
+        eq_time = np.degrees(
+            y * np.sin(2.0 * l0_rad)
+            - 2.0 * e * np.sin(mrad)
+            + 4.0 * e * y * np.sin(mrad) * np.cos(2.0 * l0_rad)
+            - 0.5 * y * y * np.sin(4.0 * l0_rad)
+            - 1.25 * e * e * np.sin(2.0 * mrad)
+        ) * 4.0
+
+        offset = (-longitude - np.degrees(hour_angle)) * 4.0 - eq_time
+        offset = np.where(offset < -720.0, offset + 1440, offset)
+        time_utc = 720.0 + offset
+        adjustment = time_utc / 1440.0
+
+    return time_utc
+
+def _transit_epochs(latitude, longitude, day_numbers, rising):
+    """
+    Transit times as UTC epoch seconds falling on each requested UTC date.
+
+    Like astral, a transit that lands on a neighbouring date is recomputed
+    for the adjacent date.
+
+    Raises:
+        ValueError: if the sun does not cross the horizon on one of the dates
+    """
+    # Evaluate the previous, requested and next date in a single pass
+    candidates = np.concatenate([day_numbers - 1, day_numbers, day_numbers + 1])
+    minutes = _time_of_transit(latitude, longitude, candidates, rising).reshape(3, -1)
+    if np.isnan(minutes).any():
+        raise ValueError("Sun does not rise or set on every date at this location.")
+
+    epochs = (
+        (candidates.reshape(3, -1) * 86400).astype(np.int64)
+        + np.trunc(minutes * 60.0).astype(np.int64)
+    )
+    previous, current, following = epochs
+    current_day = current // 86400
+
+    # Transit fell before the date: use the next date's transit, and vice versa
+    result = np.where(current_day < day_numbers, following, current)
+    result = np.where(current_day > day_numbers, previous, result)
+    if (result // 86400 != day_numbers).any():
+        raise ValueError("Unable to find a sunrise/sunset time on every date specified.")
+    return result
+
+def compute_sun_times(latitude, longitude, day_numbers):
+    """
+    Compute sunrise and sunset for many dates in one vectorized pass.
+
+    Args:
+        latitude (float): Location latitude
+        longitude (float): Location longitude
+        day_numbers (array-like): Dates as days since 1970-01-01 (UTC)
+
+    Returns:
+        tuple: (sunrise_epochs, sunset_epochs) int64 arrays of UTC epoch seconds
+    """
+    day_numbers = np.asarray(day_numbers, dtype=np.int64)
+    sunrises = _transit_epochs(latitude, longitude, day_numbers, rising=True)
+    sunsets = _transit_epochs(latitude, longitude, day_numbers, rising=False)
+    return sunrises, sunsets
+
+def to_day_number(day):
+    """Convert a date to days since 1970-01-01."""
+    return day.toordinal() - date_type(1970, 1, 1).toordinal()
+
+class SolarTable:
+    """
+    Sunrise/sunset table keyed by location coordinates and date.
+
+    Lookups hit the in-memory table; any missing dates for a location are
+    computed together with compute_sun_times. The table is loaded from and
+    saved to a JSON file so it persists across runs.
+    """
+
+    def __init__(self, path=SOLAR_TABLE_PATH):
+        self.path = path
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(latitude, longitude):
+        return f"{latitude:.6f},{longitude:.6f}"
+
+    def _load(self):
+        """Load the persisted table, ignoring a missing or corrupt file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            self._entries = {
+                key: {int(day): tuple(times) for day, times in days.items()}
+                for key, days in stored.items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Ignoring unreadable solar table {self.path}: {e}")
+            self._entries = {}
+
+    def lookup(self, latitude, longitude, day_numbers):
+        """
+        Get sunrise and sunset for many dates of one location.
+
+        Args:
+            latitude (float): Location latitude
+            longitude (float): Location longitude
+            day_numbers (array-like): Dates as days since 1970-01-01 (UTC)
+
+        Returns:
+            tuple: (sunrise_epochs, sunset_epochs) int64 arrays of UTC epoch seconds
+        """
+        day_numbers = [int(day) for day in day_numbers]
+        key = self._key(latitude, longitude)
+
+        with self._lock:
+            days = self._entries.setdefault(key, {})
+            missing = sorted({day for day in day_numbers if day not in days})
+            if missing:
+                sunrises, sunsets = compute_sun_times(latitude, longitude, missing)
+                for day, sunrise, sunset in zip(missing, sunrises.tolist(), sunsets.tolist()):
+                    days[day] = (sunrise, sunset)
+                self._dirty = True
+
+            times = [days[day] for day in day_numbers]
+
+        if not times:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        sunrises, sunsets = np.array(times, dtype=np.int64).T
+        return sunrises, sunsets
+
+    def store(self, latitude, longitude, day_numbers, sunrises, sunsets):
+        """
+        Add already computed sunrise/sunset times (e.g. from a worker process).
+        
+        Args:
+            latitude (float): Location latitude
+            longitude (float): Location longitude
+            day_numbers (array-like): Dates as days since 1970-01-01 (UTC)
+            sunrises (array-like): Sunrise per date as UTC epoch seconds
+            sunsets (array-like): Sunset per date as UTC epoch seconds
+        """
+        key = self._key(latitude, longitude)
+        with self._lock:
+            days = self._entries.setdefault(key, {})
+            for day, sunrise, sunset in zip(
+                np.asarray(day_numbers).tolist(),
+                np.asarray(sunrises).tolist(),
+                np.asarray(sunsets).tolist()
+            ):
+                if day not in days:
+                    days[day] = (sunrise, sunset)
+                    self._dirty = True
+
+    def sunrise_sunset(self, latitude, longitude, day):
+        """
+        Get sunrise and sunset for a single date.
+
+        Args:
+            latitude (float): Location latitude
+            longitude (float): Location longitude
+            day (date): Date to get sunrise/sunset for
+
+        Returns:
+            tuple: (sunrise, sunset) UTC datetime objects
+        """
+        sunrises, sunsets = self.lookup(latitude, longitude, [to_day_number(day)])
+        return (
+            datetime.fromtimestamp(int(sunrises[0]), tz=timezone.utc),
+            datetime.fromtimestamp(int(sunsets[0]), tz=timezone.utc)
+        )
+
+    def save(self):
+        """Persist the table if it changed, dropping entries that are too old."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            oldest_day = to_day_number(datetime.now(timezone.utc).date()) - SOLAR_TABLE_KEEP_DAYS
+            stored = {
+                key: {str(day): list(times) for day, times in days.items() if day >= oldest_day}
+                for key, days in self._entries.items()
+            }
+            try:
+                # Write a temporary file and swap it in, so concurrent runs never see a partial table
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, "w") as f:
+                    json.dump(stored, f)
+                os.replace(temp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Could not save solar table to {self.path}: {e}")
+
+_table = None
+
+def get_table():
+    """
+    Return the process-wide solar table, loading it on first use.
+
+    Returns:
+        SolarTable: Shared solar table
+    """
+    global _table
+    if _table is None:
+        _table = SolarTable()
+    return _table
+
+def set_table(table):
+    """
+    Replace the process-wide solar table (e.g. with SolarTable(path=None) for
+    runs that must not read or write the table file).
+
+    Args:
+        table (SolarTable): Table returned by get_table() from now on, or
+            None to load the default table again on next use
+    """
+    global _table
+    _table = table
@@ -1,12 +1,143 @@
 import pandas as pd
+import numpy as np
 import os
 from datetime import datetime
+import calculations
+import forecast_result
+import tracing
+
+# All table rows (00:00 to 23:00) and their row index
+ALL_HOURS = [f"{h:02d}:00" for h in range(24)]
+HOUR_INDEX = {hour: idx for idx, hour in enumerate(ALL_HOURS)}
+
+# Column headers of the Excel export
+EXCEL_COLUMNS = [
+    'Date',
+    'Time',
+    'Wave Height (ft)',
+    'Wind Speed (mph)',
+    'Wind Gust (mph)',
+    'Wave Period (sec)',
+    'Precip. Prob. (%)',
+    'Rating'
+]
+
+# Metrics written to the numeric Excel columns, in column order
+EXCEL_METRICS = (
+    'wave_height_ft',
+    'wind_speed_mph',
+    'wind_gust_mph',
+    'wave_period_sec',
+    'precipitation_probability'
+)
+
+# P(GOOD) at or above which an ensemble cell is shown as good / mediocre
+PROBABILITY_GOOD = 0.7
+PROBABILITY_MEDIOCRE = 0.3
+
+# Styles embedded in the head of the HTML report
+HTML_STYLES = """
+    <style>
+        table {
+            border-collapse: collapse;
+            margin-bottom: 20px;
+            width: 100%;
+            font-family: Arial, sans-serif;
+        }
+        th, td {
+            border: 1px solid #ddd;
+            padding: 8px;
+            text-align: center;
+        }
+        th {
+            background-color: #f2f2f2;
+            position: sticky;
+            top: 0;
+        }
+        .good {
+            background-color: #c8e6c9;  /* light green */
+            font-weight: bold;
+            border: 2px solid #000000;  /* bold black border */
+        }
+        .mediocre {
+            background-color: #fff9c4;  /* light yellow */
+            font-weight: bold;
+            border: 2px solid #000000;  /* bold black border */
+        }
+        .bad {
+            background-color: #ffcdd2;  /* light red */
+            font-weight: bold;
+            border: 2px solid #000000;  /* bold black border */
+        }
+        .location-header {
+            background-color: #2196F3;
+            color: white;
+            font-size: 1.2em;
+            padding: 10px;
+            text-align: center;
+            margin-top: 20px;
+            margin-bottom: 5px;
+            border-radius: 4px;
+        }
+        body {
+            font-family: Arial, sans-serif;
+            margin: 20px;
+        }
+        .hour-cell {
+            font-weight: bold;
+            background-color: #e0e0e0;
+        }
+        h1 {
+            color: #2196F3;
+            text-align: center;
+        }
+        .date-header {
+            background-color: #e1f5fe;
+            font-weight: bold;
+        }
+        .weekday {
+            font-size: 0.8em;
+            color: #555;
+        }
+        .hour-count {
+            font-size: 0.8em;
+            margin-top: 4px;
+        }
+    </style>
+    """
+
+# Start and end of the HTML report document
+HTML_DOCUMENT_START = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Boating Conditions Forecast</title>
+        {HTML_STYLES}
+    </head>
+    <body>
+        <h1>Boating Conditions Forecast</h1>
+    """
+HTML_DOCUMENT_END = """
+    </body>
+    </html>
+    """
+
+def _excel_value(value):
+    """Return a cell value for xlsxwriter, with NaN written as a blank cell."""
+    if value is None or value != value:
+        return None
+    return value
 
 def export_to_excel(good_days_results, filename="good_boating_days.xlsx"):
     """
     Export good boating days to a nicely formatted Excel file with tables
     for each location.
     
+    Rows are written in bulk with xlsxwriter's constant-memory mode, so each
+    row is flushed to disk as soon as the next one starts and no sheet is
+    held in memory. The GOOD highlight is a conditional format over the
+    whole rating column instead of a per-cell format.
+    
     Args:
         good_days_results (dict): Dictionary of location names to good boating days data
         filename (str): Name of the Excel file to create
@@ -14,8 +145,12 @@ def export_to_excel(good_days_results, filename="good_boating_days.xlsx"):
     Returns:
         str: Path to the created Excel file
     """
-    # Create a Pandas Excel writer
-    writer = pd.ExcelWriter(filename, engine='xlsxwriter')
+    # Create a Pandas Excel writer in constant-memory mode (rows must be written in order)
+    writer = pd.ExcelWriter(
+        filename,
+        engine='xlsxwriter',
+        engine_kwargs={'options': {'constant_memory': True}}
+    )
     workbook = writer.book
     
     # Add a title format
@@ -65,320 +200,267 @@ def export_to_excel(good_days_results, filename="good_boating_days.xlsx"):
     
     # Process each location
     for location_name, good_days in good_days_results.items():
-        # Create a DataFrame to hold all hourly data for this location
-        all_hours_data = []
-        
-        for date, data in good_days.items():
-            good_hours = data['hourly']
-            for hour in good_hours:
-                all_hours_data.append({
-                    'Date': date,
-                    'Time': hour['time'],
-                    'Wave Height (ft)': hour['wave_height_ft'],
-                    'Wind Speed (mph)': hour['wind_speed_mph'],
-                    'Wind Gust (mph)': hour['wind_gust_mph'],
-                    'Wave Period (sec)': hour['wave_period_sec'],
-                    'Precip. Prob. (%)': hour['precipitation_probability'],
-                    'Rating': hour['rating']
-                })
-        
-        if not all_hours_data:
+        forecast = forecast_result.as_location_forecast(good_days)
+        if len(forecast.time) == 0:
             continue  # Skip if no data
-            
-        # Create DataFrame and write to Excel
-        df = pd.DataFrame(all_hours_data)
         
         # Create a sheet for each location (truncate name if too long)
         sheet_name = location_name[:31]  # Excel sheet names limited to 31 chars
-        df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=1)
+        worksheet = workbook.add_worksheet(sheet_name)
         
-        # Get the worksheet object
-        worksheet = writer.sheets[sheet_name]
+        # Set column widths and formats (data cells take the format of their column)
+        worksheet.set_column('A:A', 12, date_format)  # Date
+        worksheet.set_column('B:B', 10, time_format)  # Time
+        worksheet.set_column('C:C', 14, number_format)  # Wave Height
+        worksheet.set_column('D:D', 14, number_format)  # Wind Speed
+        worksheet.set_column('E:E', 14, number_format)  # Wind Gust
+        worksheet.set_column('F:F', 14, number_format)  # Wave Period
+        worksheet.set_column('G:G', 14, number_format)  # Precip Prob
+        worksheet.set_column('H:H', 10, time_format)  # Rating
         
-        # Write the column headers with the header format
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            
-        # Set column widths
-        worksheet.set_column('A:A', 12)  # Date
-        worksheet.set_column('B:B', 10)  # Time
-        worksheet.set_column('C:C', 14)  # Wave Height
-        worksheet.set_column('D:D', 14)  # Wind Speed
-        worksheet.set_column('E:E', 14)  # Wind Gust
-        worksheet.set_column('F:F', 14)  # Wave Period
-        worksheet.set_column('G:G', 14)  # Precip Prob
-        worksheet.set_column('H:H', 10)  # Rating
+        # Add a title for the sheet, then the column headers
+        worksheet.merge_range('A1:H1', f"Good Boating Conditions - {location_name}", title_format)
+        worksheet.write_row(1, 0, EXCEL_COLUMNS, header_format)
         
-        # Apply formats
-        for i, row in enumerate(df.iterrows()):
-            row_idx = i + 1  # Adjusted for header
-            
-            # Apply conditional formatting based on rating
-            rating = row[1]['Rating']
-            if rating == 'GOOD':
-                worksheet.write(row_idx, 7, rating, rating_format_good)
-            
-            # Set date format
-            worksheet.write(row_idx, 0, row[1]['Date'], date_format)
-            
-            # Set number formats
-            for col in [2, 3, 4, 5, 6]:  # Columns with numeric values
-                worksheet.write(row_idx, col, row[1].iloc[col], number_format)
-            
-            # Set time format
-            worksheet.write(row_idx, 1, row[1]['Time'], time_format)
+        # Write the data one whole row per call
+        rows = zip(
+            np.repeat(forecast.dates, forecast.day_ends - forecast.day_starts).tolist(),
+            forecast.hour_strings(),
+            *([_excel_value(value) for value in forecast.metric_values(name)] for name in EXCEL_METRICS),
+            forecast.rating_labels()
+        )
+        row_idx = 2
+        for row in rows:
+            worksheet.write_row(row_idx, 0, row)
+            row_idx += 1
         
-        # Add a title for the sheet
-        worksheet.merge_range('A1:H1', f"Good Boating Conditions - {location_name}", title_format)
+        # Highlight GOOD ratings with one conditional format over the rating column
+        worksheet.conditional_format(2, 7, row_idx - 1, 7, {
+            'type': 'cell',
+            'criteria': '==',
+            'value': '"GOOD"',
+            'format': rating_format_good
+        })
     
     # Save the Excel file
     writer.close()
     print(f"Excel file saved: {filename}")
     return filename
 
-def generate_html_tables(all_results):
+def render_location_table(location_name, location_results, trim_empty_hours=False, column_cache=None):
     """
-    Generate HTML tables for email with times in rows and dates in columns.
+    Render the HTML table for a single location.
     Merges consecutive hours with the same condition rating vertically.
     
     Args:
-        all_results (dict): Dictionary of location names to all boating days data
+        location_name (str): Name of the location
+        location_results (LocationForecast or dict): Boating days data for the location
+        trim_empty_hours (bool): Leave out hour rows that have no data on any
+            date (e.g. night hours of a daylight-window analysis)
+        column_cache (dict): Optional date to rendered column cells; cached
+            dates are reused and newly rendered ones are added (see
+            analysis_state.AnalysisState.column_caches)
         
     Returns:
-        str: HTML string with all tables
-    """
-    # Define HTML styles
-    styles = """
-    <style>
-        table {
-            border-collapse: collapse;
-            margin-bottom: 20px;
-            width: 100%;
-            font-family: Arial, sans-serif;
-        }
-        th, td {
-            border: 1px solid #ddd;
-            padding: 8px;
-            text-align: center;
-        }
-        th {
-            background-color: #f2f2f2;
-            position: sticky;
-            top: 0;
-        }
-        .good {
-            background-color: #c8e6c9;  /* light green */
-            font-weight: bold;
-            border: 2px solid #000000;  /* bold black border */
-        }
-        .mediocre {
-            background-color: #fff9c4;  /* light yellow */
-            font-weight: bold;
-            border: 2px solid #000000;  /* bold black border */
-        }
-        .bad {
-            background-color: #ffcdd2;  /* light red */
-            font-weight: bold;
-            border: 2px solid #000000;  /* bold black border */
-        }
-        .location-header {
-            background-color: #2196F3;
-            color: white;
-            font-size: 1.2em;
-            padding: 10px;
-            text-align: center;
-            margin-top: 20px;
-            margin-bottom: 5px;
-            border-radius: 4px;
-        }
-        body {
-            font-family: Arial, sans-serif;
-            margin: 20px;
-        }
-        .hour-cell {
-            font-weight: bold;
-            background-color: #e0e0e0;
-        }
-        h1 {
-            color: #2196F3;
-            text-align: center;
-        }
-        .date-header {
-            background-color: #e1f5fe;
-            font-weight: bold;
-        }
-        .weekday {
-            font-size: 0.8em;
-            color: #555;
-        }
-        .hour-count {
-            font-size: 0.8em;
-            margin-top: 4px;
-        }
-    </style>
+        str: HTML fragment with the location header and table
     """
-
-    # Start HTML document
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Boating Conditions Forecast</title>
-        {styles}
-    </head>
-    <body>
-        <h1>Boating Conditions Forecast</h1>
-    """
-
-    # For each location
-    for location_name, location_results in all_results.items():
-        # Add location header
-        html += f"<div class='location-header'>{location_name}</div>"
-        
-        # Create a table for this location
-        html += "<table>"
+    forecast = forecast_result.as_location_forecast(location_results)
+    parts = []
+    
+    # Add location header
+    parts.append(f"<div class='location-header'>{location_name}</div>")
+    
+    # Create a table for this location
+    parts.append("<table>")
+    
+    # Get all dates for columns (already in date order)
+    dates = forecast.dates
+    
+    if not dates:
+        parts.append("<tr><td>No data available for this location.</td></tr></table>")
+        return "".join(parts)
+    
+    # Add header row with dates and weekdays
+    parts.append("<tr><th>Hour</th>")
+    for date in dates:
+        # Format date from YYYY-MM-DD to MM/DD
+        formatted_date = f"{date[5:7]}/{date[8:10]}"
         
-        # Get all dates for columns
-        dates = sorted(location_results.keys())
+        # Get day of week
+        date_obj = datetime.strptime(date, "%Y-%m-%d")
+        weekday = date_obj.strftime("%A")
         
-        if not dates:
-            html += "<tr><td>No data available for this location.</td></tr></table>"
+        parts.append(f"<th class='date-header'>{formatted_date}<br><span class='weekday'>{weekday}</span></th>")
+    parts.append("</tr>")
+    
+    # Pre-compute the cell for every hour of each date column
+    if column_cache is None:
+        date_columns = [_date_column_cells(forecast, day_index) for day_index in range(len(dates))]
+    else:
+        date_columns = []
+        for day_index, date in enumerate(dates):
+            if date not in column_cache:
+                column_cache[date] = _date_column_cells(forecast, day_index)
+            date_columns.append(column_cache[date])
+    
+    # Hours with data on at least one date
+    hours_with_data = set(forecast.hour_of_day().tolist())
+    
+    # Build the table row by row
+    for hour_idx, hour in enumerate(ALL_HOURS):
+        if trim_empty_hours and hour_idx not in hours_with_data:
             continue
         
-        # Add header row with dates and weekdays
-        html += "<tr><th>Hour</th>"
-        for date in dates:
-            # Format date from YYYY-MM-DD to MM/DD
-            formatted_date = f"{date[5:7]}/{date[8:10]}"
-            
-            # Get day of week
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
-            weekday = date_obj.strftime("%A")
-            
-            html += f"<th class='date-header'>{formatted_date}<br><span class='weekday'>{weekday}</span></th>"
-        html += "</tr>"
+        parts.append(f"<tr><td class='hour-cell'>{hour}</td>")
         
-        # Pre-process to find vertical blocks for each date
-        date_blocks = {}
+        # Cells covered by a rowspan from an earlier row are None
+        for cells in date_columns:
+            cell = cells[hour_idx]
+            if cell is not None:
+                parts.append(cell)
         
-        for date in dates:
-            if date not in location_results:
-                date_blocks[date] = []
-                continue
-                
-            # Get all hourly data sorted by time
-            hourly_data = sorted(
-                location_results[date].get('hourly', []),
-                key=lambda x: x['time']
-            )
-            
-            if not hourly_data:
-                date_blocks[date] = []
-                continue
-                
-            # Find blocks of consecutive hours with the same rating
-            blocks = []
-            current_block = {
-                'rating': hourly_data[0]['rating'],
-                'start_hour': hourly_data[0]['time'],
-                'end_hour': hourly_data[0]['time'],
-                'count': 1
-            }
-            
-            for i in range(1, len(hourly_data)):
-                current_hour = hourly_data[i]
-                prev_hour = hourly_data[i-1]
-                
-                # Check if current hour is consecutive to previous hour and has same rating
-                prev_hour_int = int(prev_hour['time'].split(':')[0])
-                curr_hour_int = int(current_hour['time'].split(':')[0])
-                
-                if curr_hour_int == prev_hour_int + 1 and current_hour['rating'] == current_block['rating']:
-                    # Extend the current block
-                    current_block['end_hour'] = current_hour['time']
-                    current_block['count'] += 1
-                else:
-                    # End current block and start a new one
-                    blocks.append(current_block)
-                    current_block = {
-                        'rating': current_hour['rating'],
-                        'start_hour': current_hour['time'],
-                        'end_hour': current_hour['time'],
-                        'count': 1
-                    }
-            
-            # Add the last block
-            blocks.append(current_block)
-            date_blocks[date] = blocks
+        parts.append("</tr>")
+    
+    parts.append("</table>")
+    
+    return "".join(parts)
+
+def iter_html_tables(all_results, trim_empty_hours=False, column_caches=None):
+    """
+    Generate the HTML report as a stream of fragments.
+    
+    Yields the document start, one fragment per location and the document
+    end, so the full report never has to exist as a single string.
+    
+    Args:
+        all_results (dict): Dictionary of location names to all boating days data
+        trim_empty_hours (bool): Leave out hour rows without data (see
+            render_location_table)
+        column_caches (dict): Optional location name to column cache (see
+            render_location_table)
         
-        # Get all possible hours (00:00 to 23:00)
-        all_hours = [f"{h:02d}:00" for h in range(24)]
+    Yields:
+        str: Consecutive fragments of the HTML document
+    """
+    yield HTML_DOCUMENT_START
+    
+    # For each location
+    for location_name, location_results in all_results.items():
+        with tracing.span("render", location=location_name) as span:
+            fragment = render_location_table(
+                location_name, location_results, trim_empty_hours,
+                column_caches.get(location_name) if column_caches is not None else None
+            )
+            span.set(bytes=len(fragment))
+        yield fragment
+    
+    yield HTML_DOCUMENT_END
+
+def write_html_tables(all_results, fileobj, trim_empty_hours=False, column_caches=None):
+    """
+    Write the HTML report to any file-like object, one location at a time.
+    
+    Args:
+        all_results (dict): Dictionary of location names to all boating days data
+        fileobj (file-like): Text stream with a write() method (file, socket
+            wrapper, io.StringIO, ...)
+        trim_empty_hours (bool): Leave out hour rows without data (see
+            render_location_table)
+        column_caches (dict): Optional location name to column cache (see
+            render_location_table)
+    """
+    for fragment in iter_html_tables(all_results, trim_empty_hours, column_caches):
+        fileobj.write(fragment)
+
+def generate_html_tables(all_results, trim_empty_hours=False, column_caches=None):
+    """
+    Generate HTML tables for email with times in rows and dates in columns.
+    Merges consecutive hours with the same condition rating vertically.
+    
+    Args:
+        all_results (dict): Dictionary of location names to all boating days data
+        trim_empty_hours (bool): Leave out hour rows without data (see
+            render_location_table)
+        column_caches (dict): Optional location name to column cache (see
+            render_location_table)
         
-        # Build the table row by row
-        for hour_idx, hour in enumerate(all_hours):
-            html += f"<tr><td class='hour-cell'>{hour}</td>"
-            
-            # Process each date column
-            for date in dates:
-                # Find if this hour is the start of a block
-                is_start_of_block = False
-                matching_block = None
-                
-                for block in date_blocks.get(date, []):
-                    if block['start_hour'] == hour:
-                        is_start_of_block = True
-                        matching_block = block
-                        break
-                
-                # Check if this hour is in the middle of a block (should be skipped)
-                is_in_middle_of_block = False
-                if not is_start_of_block:
-                    for block in date_blocks.get(date, []):
-                        start_hour_int = int(block['start_hour'].split(':')[0])
-                        end_hour_int = int(block['end_hour'].split(':')[0])
-                        current_hour_int = int(hour.split(':')[0])
-                        
-                        if start_hour_int < current_hour_int <= end_hour_int:
-                            is_in_middle_of_block = True
-                            break
-                
-                # Skip if in middle of block (already covered by rowspan)
-                if is_in_middle_of_block:
-                    continue
-                
-                # If start of block, create cell with rowspan
-                if is_start_of_block and matching_block:
-                    rating = matching_block['rating']
-                    rowspan = matching_block['count']
-                    
-                    # Set CSS class based on rating
-                    if rating == "GOOD":
-                        css_class = "good"
-                        # For GOOD ratings, display the hour count
-                        cell_content = f"{rating}<br><span class='hour-count'>{rowspan} hr</span>"
-                    elif rating == "MEDIOCRE":
-                        css_class = "mediocre"
-                        cell_content = rating
-                    else:  # BAD
-                        css_class = "bad"
-                        cell_content = rating
-                    
-                    # Add cell with appropriate rowspan
-                    html += f"<td class='{css_class}' rowspan='{rowspan}'>{cell_content}</td>"
-                else:
-                    # If no block starts here and not in middle of block, add empty cell
-                    html += "<td></td>"
-            
-            html += "</tr>"
+    Returns:
+        str: HTML string with all tables
+    """
+    return "".join(iter_html_tables(all_results, trim_empty_hours, column_caches))
+
+def _find_rating_blocks(forecast, day_index):
+    """
+    Get the blocks of consecutive hours with the same rating for one day.
+    
+    Blocks are read from the forecast's run-length encoded timeline.
+    
+    Args:
+        forecast (LocationForecast): Forecast for the location
+        day_index (int): Position of the day in `forecast.dates`
         
-        html += "</table>"
+    Returns:
+        list: Blocks as (rating, start_hour, start_hour_int, end_hour_int, count) tuples
+    """
+    first, end = forecast.day_runs(day_index)
+    run_start = forecast.run_start[first:end]
+    run_length = forecast.run_length[first:end].tolist()
+    start_times = forecast.time[run_start]
+    start_hour_ints = ((start_times % 86400) // 3600).tolist()
     
-    html += """
-    </body>
-    </html>
+    return [
+        (calculations.RATING_LABELS[rating], forecast_result.format_hour(start_time),
+         start_hour_int, start_hour_int + count - 1, count)
+        for rating, start_time, start_hour_int, count in zip(
+            forecast.run_rating[first:end].tolist(), start_times.tolist(), start_hour_ints, run_length
+        )
+    ]
+
+def _rating_cell(rating, rowspan):
+    """Render the table cell for a block of hours with the same rating."""
+    # Set CSS class based on rating
+    if rating == "GOOD":
+        css_class = "good"
+        # For GOOD ratings, display the hour count
+        cell_content = f"{rating}<br><span class='hour-count'>{rowspan} hr</span>"
+    elif rating == "MEDIOCRE":
+        css_class = "mediocre"
+        cell_content = rating
+    else:  # BAD
+        css_class = "bad"
+        cell_content = rating
+    
+    return f"<td class='{css_class}' rowspan='{rowspan}'>{cell_content}</td>"
+
+def _date_column_cells(forecast, day_index):
     """
+    Compute the HTML cell for each of the 24 table rows of one date column.
+    
+    Args:
+        forecast (LocationForecast): Forecast for the location
+        day_index (int): Position of the day in `forecast.dates`
+        
+    Returns:
+        list: 24 entries, each the cell HTML or None when the row is covered
+            by the rowspan of a block that started earlier
+    """
+    cells = ["<td></td>"] * len(ALL_HOURS)
+    
+    blocks = _find_rating_blocks(forecast, day_index)
     
-    return html
+    # Rows in the middle of a block are already covered by its rowspan
+    for _, _, start_hour_int, end_hour_int, _ in blocks:
+        for hour_idx in range(max(start_hour_int + 1, 0), min(end_hour_int, len(ALL_HOURS) - 1) + 1):
+            cells[hour_idx] = None
+    
+    # A block starting at a row takes precedence (first matching block wins)
+    started = set()
+    for rating, start_hour, _, _, count in blocks:
+        if start_hour in HOUR_INDEX and start_hour not in started:
+            started.add(start_hour)
+            cells[HOUR_INDEX[start_hour]] = _rating_cell(rating, count)
+    
+    return cells
 
 def create_summary_table(good_days_results):
     """
@@ -387,52 +469,109 @@ def create_summary_table(good_days_results):
     summary_data = []
     
     for location_name, good_days in good_days_results.items():
-        for date, data in good_days.items():
-            good_hours = data['hourly']
-            if good_hours:
-                # Find consecutive hour groups
-                hour_groups = []
-                current_group = [good_hours[0]]
-                
-                # Parse hours to integers for comparison
-                for i in range(1, len(good_hours)):
-                    prev_hour = int(good_hours[i-1]['time'].split(':')[0])
-                    curr_hour = int(good_hours[i]['time'].split(':')[0])
-                    
-                    # Check if hours are consecutive
-                    if curr_hour == prev_hour + 1:
-                        current_group.append(good_hours[i])
-                    else:
-                        # Start a new group
-                        hour_groups.append(current_group)
-                        current_group = [good_hours[i]]
-                
-                # Add the last group
-                hour_groups.append(current_group)
+        forecast = forecast_result.as_location_forecast(good_days)
+        for day_index, date in enumerate(forecast.dates):
+            start, end = forecast.day_bounds(day_index)
+            if end > start:
+                # Consecutive hour groups as (first, last) hour indices, from the timeline
+                hour_groups = forecast.contiguous_runs(*forecast.day_runs(day_index))
                 
                 # Format time ranges for each group
                 time_ranges = []
-                for group in hour_groups:
-                    if len(group) == 1:
-                        time_ranges.append(f"{group[0]['time']}")
+                for first, last in hour_groups:
+                    if first == last:
+                        time_ranges.append(forecast_result.format_hour(forecast.time[first]))
                     else:
-                        time_ranges.append(f"{group[0]['time']} - {group[-1]['time']}")
+                        time_ranges.append(f"{forecast_result.format_hour(forecast.time[first])} - "
+                                           f"{forecast_result.format_hour(forecast.time[last])}")
                 
                 time_range_str = ", ".join(time_ranges)
                 
+                wave_heights = forecast.metric_values('wave_height_ft', start, end)
+                wind_speeds = forecast.metric_values('wind_speed_mph', start, end)
+                
                 # Add entry to summary data
                 summary_data.append({
                     'Location': location_name,
                     'Date': date,
-                    'Rating': data['day_rating'],
-                    'Good Hours': len(good_hours),
+                    'Rating': calculations.RATING_LABELS[forecast.day_rating[day_index]],
+                    'Good Hours': end - start,
                     'Time Ranges': time_range_str,
-                    'Avg Wave Height (ft)': sum(h['wave_height_ft'] for h in good_hours) / len(good_hours),
-                    'Avg Wind Speed (mph)': sum(h['wind_speed_mph'] for h in good_hours) / len(good_hours)
+                    'Avg Wave Height (ft)': sum(wave_heights) / len(wave_heights),
+                    'Avg Wind Speed (mph)': sum(wind_speeds) / len(wind_speeds)
                 })
     
     if not summary_data:
         return pd.DataFrame()
         
     # Create and return summary DataFrame
-    return pd.DataFrame(summary_data)
\ No newline at end of file
+    return pd.DataFrame(summary_data)
+
+def _probability_class(p_good):
+    """CSS class of an ensemble cell for a probability of GOOD conditions."""
+    if p_good >= PROBABILITY_GOOD:
+        return "good"
+    if p_good >= PROBABILITY_MEDIOCRE:
+        return "mediocre"
+    return "bad"
+
+def render_probability_table(location_name, ensemble_forecast):
+    """
+    Render the HTML table of an ensemble forecast for a single location.
+    Cells show the share of members rating the hour GOOD; date headers show
+    the share of members rating the whole day GOOD.
+    
+    Args:
+        location_name (str): Name of the location
+        ensemble_forecast (EnsembleForecast): Ensemble results for the location
+        
+    Returns:
+        str: HTML fragment with the location header and table
+    """
+    forecast = ensemble_forecast
+    parts = [f"<div class='location-header'>{location_name} ({forecast.members} members)</div>", "<table>"]
+    
+    if not forecast.dates:
+        parts.append("<tr><td>No data available for this location.</td></tr></table>")
+        return "".join(parts)
+    
+    # Add header row with dates, weekdays and the day probability
+    parts.append("<tr><th>Hour</th>")
+    for day_index, date in enumerate(forecast.dates):
+        weekday = datetime.strptime(date, "%Y-%m-%d").strftime("%A")
+        day_p_good = float(forecast.day_p_good[day_index])
+        parts.append(
+            f"<th class='date-header'>{date[5:7]}/{date[8:10]}<br><span class='weekday'>{weekday}</span>"
+            f"<br><span class='hour-count'>P(GOOD day) {day_p_good:.0%}</span></th>"
+        )
+    parts.append("</tr>")
+    
+    # Cell per (hour of day, date); hours without data stay empty
+    cells = [["<td></td>"] * len(forecast.dates) for _ in ALL_HOURS]
+    hour_of_day = ((forecast.time % 86400) // 3600).tolist()
+    for day_index in range(len(forecast.dates)):
+        start, end = forecast.day_bounds(day_index)
+        for hour_idx, p_good in zip(hour_of_day[start:end], forecast.p_good[start:end].tolist()):
+            cells[hour_idx][day_index] = f"<td class='{_probability_class(p_good)}'>{p_good:.0%}</td>"
+    
+    for hour, row in zip(ALL_HOURS, cells):
+        parts.append(f"<tr><td class='hour-cell'>{hour}</td>{''.join(row)}</tr>")
+    
+    parts.append("</table>")
+    return "".join(parts)
+
+def write_probability_tables(ensemble_results, fileobj):
+    """
+    Write the ensemble HTML report to a file-like object, one location at a time.
+    
+    Args:
+        ensemble_results (dict): Location names to EnsembleForecast
+        fileobj (file-like): Text stream with a write() method
+    """
+    fileobj.write(HTML_DOCUMENT_START)
+    for location_name, ensemble_forecast in ensemble_results.items():
+        with tracing.span("render", location=location_name) as span:
+            fragment = render_probability_table(location_name, ensemble_forecast)
+            span.set(bytes=len(fragment))
+        fileobj.write(fragment)
+    fileobj.write(HTML_DOCUMENT_END)
@@ -0,0 +1,35 @@
+"""
+Shared test setup: the modules live next to this directory and import each
+other by name, like future.py and lambda_function.py do.
+"""
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_fetcher
+import meteo_marine
+import meteo_weather
+import solar
+from openmeteo_fakes import FakeClient
+
+@pytest.fixture(autouse=True)
+def solar_table():
+    """Keep sunrise/sunset times in memory, never in the table file."""
+    table = solar.SolarTable(path=None)
+    solar.set_table(table)
+    yield table
+    solar.set_table(None)
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Route the marine and weather APIs to a fake client, with empty frame caches."""
+    client = FakeClient()
+    monkeypatch.setattr(meteo_marine, "get_client", lambda: client)
+    monkeypatch.setattr(meteo_weather, "get_client", lambda: client)
+    monkeypatch.setattr(data_fetcher, "_cell_cache", OrderedDict())
+    monkeypatch.setattr(data_fetcher, "_grid_points", OrderedDict())
+    return client
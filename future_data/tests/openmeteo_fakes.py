@@ -0,0 +1,110 @@
+"""
+Stand-ins for Open-Meteo SDK responses and the client, for offline tests.
+"""
+import numpy as np
+from openmeteo_sdk.Variable import Variable
+
+# 2025-06-01T00:00Z
+START = 1748736000
+
+class FakeVariable:
+    def __init__(self, name, values, member=0):
+        base, _, altitude = name.rpartition("_")
+        if altitude.endswith("m") and altitude[:-1].isdigit():
+            self._variable, self._altitude = getattr(Variable, base), int(altitude[:-1])
+        else:
+            self._variable, self._altitude = getattr(Variable, name), 0
+        self._values = np.asarray(values, dtype=np.float32)
+        self._member = member
+
+    def Variable(self):
+        return self._variable
+
+    def Altitude(self):
+        return self._altitude
+
+    def EnsembleMember(self):
+        return self._member
+
+    def ValuesAsNumpy(self):
+        return self._values
+
+class FakeHourly:
+    def __init__(self, start, hours, variables):
+        self._start, self._hours, self._variables = start, hours, variables
+
+    def Time(self):
+        return self._start
+
+    def TimeEnd(self):
+        return self._start + self._hours * 3600
+
+    def Interval(self):
+        return 3600
+
+    def VariablesLength(self):
+        return len(self._variables)
+
+    def Variables(self, i):
+        return self._variables[i]
+
+class FakeResponse:
+    def __init__(self, latitude, longitude, hourly):
+        self._latitude, self._longitude, self._hourly = latitude, longitude, hourly
+
+    def Latitude(self):
+        return self._latitude
+
+    def Longitude(self):
+        return self._longitude
+
+    def Elevation(self):
+        return 0.0
+
+    def Hourly(self):
+        return self._hourly
+
+def make_location(name, latitude, longitude):
+    """Location dictionary like the catalog's."""
+    return {
+        "name": name,
+        "region": "Puerto Rico",
+        "timezone": "America/Puerto_Rico",
+        "latitude": latitude,
+        "longitude": longitude
+    }
+
+def grid_values(name, latitude, longitude, hours, member=0):
+    """Deterministic hourly values for one variable at one grid point."""
+    phase = latitude * 7.0 + longitude * 3.0 + member * 0.7 + len(name)
+    wave = (np.sin(np.arange(hours) / 5.0 + phase) + 1.0) / 2.0
+    return 0.2 + wave * 30.0 if "wind" in name else 0.1 + wave * (12.0 if "period" in name else 2.0)
+
+class FakeClient:
+    """
+    Answers weather_api calls like Open-Meteo: one response per coordinate,
+    from the model grid point nearest to it (a 0.1 degree grid here).
+
+    Attributes:
+        calls (list): (url, params) of every request made
+    """
+
+    def __init__(self, hours=48, members=1, grid=0.1):
+        self.hours, self.members, self.grid = hours, members, grid
+        self.calls = []
+
+    def weather_api(self, url, params):
+        self.calls.append((url, params))
+        responses = []
+        for latitude, longitude in zip(params["latitude"], params["longitude"]):
+            grid_latitude = round(round(latitude / self.grid) * self.grid, 6)
+            grid_longitude = round(round(longitude / self.grid) * self.grid, 6)
+            variables = [
+                FakeVariable(name, grid_values(name, grid_latitude, grid_longitude, self.hours, member), member)
+                for member in range(self.members)
+                for name in params["hourly"]
+            ]
+            responses.append(FakeResponse(
+                grid_latitude, grid_longitude, FakeHourly(START, self.hours, variables)
+            ))
+        return responses
@@ -0,0 +1,117 @@
+"""
+Tests for incremental re-analysis against a full recompute.
+"""
+import os
+
+import numpy as np
+import pytest
+
+import analysis_state
+import benchmark
+import data_analyzer
+import table_generation
+
+def aligned_inputs(location_count=3, days=4, seed=0):
+    """(location_info, seconds, columns) per synthetic location."""
+    inputs = []
+    for location, marine_df, weather_df in benchmark.synthetic_inputs(location_count, days, seed):
+        seconds, columns = data_analyzer.align_frames(marine_df, weather_df)
+        inputs.append((data_analyzer.get_location_info(location), seconds, columns))
+    return inputs
+
+def analyze(inputs, state=None, daylight_window=None):
+    return {
+        info.name: data_analyzer.analyze_columns(seconds, columns, info, daylight_window, state)
+        for info, seconds, columns in inputs
+    }
+
+def render(all_results, state=None):
+    return table_generation.generate_html_tables(
+        all_results, column_caches=state.column_caches() if state is not None else None
+    )
+
+def change_day(inputs, location_index, day_offset):
+    """Copy the inputs with the wave heights of one day of one location raised."""
+    changed = []
+    for i, (info, seconds, columns) in enumerate(inputs):
+        columns = {name: values.copy() for name, values in columns.items()}
+        if i == location_index:
+            day = seconds // 86400 == seconds[0] // 86400 + day_offset
+            columns["wave_height"][day] += 0.8
+        changed.append((info, seconds, columns))
+    return changed
+
+@pytest.mark.parametrize("daylight_window", [None, (1, 0)])
+def test_incremental_matches_full_recompute(daylight_window):
+    """Reused and re-rated days give the same results and report as a full run."""
+    inputs = aligned_inputs()
+    state = analysis_state.AnalysisState(path=None)
+
+    first = analyze(inputs, state, daylight_window)
+    assert (state.analyzed_days, state.reused_days) == (12, 0)
+    assert render(first, state) == render(analyze(inputs, daylight_window=daylight_window))
+
+    # Nothing changed: every day is reused
+    second = analyze(inputs, state, daylight_window)
+    assert (state.analyzed_days, state.reused_days) == (12, 12)
+    assert render(second, state) == render(first)
+
+    # One day of one location changed: only that day is re-rated and re-rendered
+    changed = change_day(inputs, 1, 2)
+    third = analyze(changed, state, daylight_window)
+    assert (state.analyzed_days, state.reused_days) == (13, 23)
+    full = analyze(changed, daylight_window=daylight_window)
+    for name in full:
+        assert third[name].to_dict() == full[name].to_dict()
+    assert render(third, state) == render(full)
+
+def test_shorter_forecast_drops_vanished_days():
+    """Days that are no longer in the forecast leave the results."""
+    inputs = aligned_inputs(location_count=1)
+    state = analysis_state.AnalysisState(path=None)
+    analyze(inputs, state)
+    shorter = [(info, seconds[24:], {name: values[24:] for name, values in columns.items()})
+               for info, seconds, columns in inputs]
+    results = analyze(shorter, state)
+    assert state.analyzed_days == 4
+    for name, forecast in analyze(shorter).items():
+        assert results[name].to_dict() == forecast.to_dict()
+
+def test_state_round_trips_through_the_file(tmp_path):
+    """A saved state is reused by the next process, cached columns included."""
+    os.chmod(tmp_path, 0o700)
+    path = str(tmp_path / "analysis_state.npz")
+    inputs = aligned_inputs()
+
+    state = analysis_state.AnalysisState(path=path)
+    report = render(analyze(inputs, state), state)
+    state.save()
+    assert os.path.exists(path)
+
+    loaded = analysis_state.AnalysisState(path=path)
+    results = analyze(inputs, loaded)
+    assert (loaded.analyzed_days, loaded.reused_days) == (0, 12)
+    assert all(len(cache) == 4 for cache in loaded.column_caches().values())
+    assert render(results, loaded) == report
+    for name, forecast in analyze(inputs).items():
+        assert results[name].to_dict() == forecast.to_dict()
+        for field in ("time", "rating", "run_start", "run_length"):
+            assert np.array_equal(getattr(results[name], field), getattr(forecast, field))
+
+def test_corrupt_file_is_ignored(tmp_path, capsys):
+    os.chmod(tmp_path, 0o700)
+    path = tmp_path / "analysis_state.npz"
+    path.write_bytes(b"not an npz file")
+    state = analysis_state.AnalysisState(path=str(path))
+    assert state.column_caches() == {}
+    assert "Ignoring unreadable analysis state" in capsys.readouterr().out
+
+def test_shared_directory_is_refused(tmp_path, capsys):
+    """The state is neither read from nor written to a directory others can write."""
+    os.chmod(tmp_path, 0o777)
+    path = str(tmp_path / "analysis_state.npz")
+    state = analysis_state.AnalysisState(path=path)
+    analyze(aligned_inputs(location_count=1), state)
+    state.save()
+    assert not os.path.exists(path)
+    assert "Could not save analysis state" in capsys.readouterr().out
@@ -0,0 +1,27 @@
+"""
+Tests for the offline pipeline benchmark.
+"""
+import importlib.util
+
+import benchmark
+import solar
+
+def test_run_benchmark_measures_every_stage():
+    """A tiny run measures every stage and compares cleanly to itself."""
+    run = benchmark.run_benchmark(location_count=3, days=2, repeat=1)
+    assert set(run["stages"]) == set(benchmark.STAGES)
+    assert benchmark.compare_to_baseline(run, run) == []
+    assert solar.get_table().path is None
+    solar.set_table(None)
+
+def test_run_benchmark_skips_excel_without_xlsxwriter(monkeypatch, capsys):
+    """Without xlsxwriter the Excel stage is skipped with a notice."""
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util, "find_spec",
+        lambda name, *args: None if name == "xlsxwriter" else find_spec(name, *args)
+    )
+    run = benchmark.run_benchmark(location_count=2, days=1, repeat=1)
+    assert "export_to_excel" not in run["stages"]
+    assert "skipping the export_to_excel stage" in capsys.readouterr().out
+    solar.set_table(None)
@@ -0,0 +1,80 @@
+"""
+Tests for the vectorized analysis against the scalar per-hour rules.
+"""
+import numpy as np
+import pytest
+
+import benchmark
+import calculations
+import data_analyzer
+import forecast_result
+import rating_profiles
+
+def scalar_reference(marine_df, weather_df):
+    """Rate every hour with assess_hour_condition and every day with determine_day_rating."""
+    merged = marine_df.merge(weather_df, on="date")
+    days = {}
+    for row in merged.itertuples():
+        wave_height_m = float(row.wave_height)
+        hour = {
+            "time": row.date.strftime("%H:%M"),
+            "rating": calculations.assess_hour_condition(
+                calculations.convert_wave_height_to_feet(wave_height_m),
+                calculations.convert_wind_speed_to_mph(float(row.wind_speed_10m)),
+                calculations.convert_wind_speed_to_mph(float(row.wind_gusts_10m)),
+                float(row.wave_period),
+                wave_height_m
+            ),
+            "wave_height_ft": round(calculations.convert_wave_height_to_feet(wave_height_m), 1),
+            "wind_speed_mph": round(calculations.convert_wind_speed_to_mph(float(row.wind_speed_10m)), 1),
+            "wind_gust_mph": round(calculations.convert_wind_speed_to_mph(float(row.wind_gusts_10m)), 1),
+            "wave_period_sec": round(float(row.wave_period), 1)
+        }
+        days.setdefault(row.date.strftime("%Y-%m-%d"), []).append(hour)
+    return days
+
+def test_analyze_conditions_matches_scalar_rules():
+    """Hour ratings, day ratings and rounded metrics match the per-hour path."""
+    ratings = set()
+    for location, marine_df, weather_df in benchmark.synthetic_inputs(4, days=4):
+        forecast = data_analyzer.analyze_conditions(
+            marine_df, weather_df, data_analyzer.get_location_info(location)
+        )
+        expected = scalar_reference(marine_df, weather_df)
+        ratings.update(forecast.rating_labels())
+
+        assert forecast.dates == list(expected)
+        for date, hours in expected.items():
+            day = forecast[date]
+            day_rating, good_hours_count = calculations.determine_day_rating(hours)
+            assert (day["day_rating"], day["good_hours_count"]) == (day_rating, good_hours_count)
+            for actual, reference in zip(day["hourly"], hours, strict=True):
+                assert {name: actual[name] for name in reference} == reference
+    assert ratings == {"GOOD", "MEDIOCRE", "BAD"}
+
+def test_rounded_metrics_are_arrays():
+    """Rounding stays in NumPy; the stored columns are float32 arrays."""
+    (location, marine_df, weather_df), = benchmark.synthetic_inputs(1, days=1)
+    forecast = data_analyzer.analyze_conditions(
+        marine_df, weather_df, data_analyzer.get_location_info(location)
+    )
+    for name in forecast_result.ROUNDED_METRICS:
+        values = forecast.metrics[name]
+        assert values.dtype == np.float32
+        assert np.array_equal(values, np.round(values.astype(np.float64), 1).astype(np.float32))
+
+@pytest.mark.parametrize("daylight_window", [None, (1, 0), (-30, -30)])
+def test_analyze_profiles_trims_like_analyze_conditions(daylight_window):
+    """The default profile over the same daylight window rates like analyze_conditions."""
+    (location, marine_df, weather_df), = benchmark.synthetic_inputs(1, days=3)
+    location_info = data_analyzer.get_location_info(location)
+    forecast = data_analyzer.analyze_conditions(marine_df, weather_df, location_info, daylight_window)
+    profiles = data_analyzer.analyze_profiles(
+        marine_df, weather_df, rating_profiles.compile_profiles([rating_profiles.DEFAULT_PROFILE]),
+        location_info, daylight_window
+    )
+    assert profiles["dates"] == forecast.dates
+    assert np.array_equal(profiles["time"], forecast.time)
+    assert np.array_equal(profiles["rating"][0], forecast.rating)
+    assert np.array_equal(profiles["day_rating"][0], forecast.day_rating)
+    assert np.array_equal(profiles["good_hours_count"][0], forecast.good_hours_count)
@@ -0,0 +1,68 @@
+"""
+Tests for batched fetching, grid point deduplication and the frame cache.
+"""
+import data_fetcher
+import meteo_client
+import meteo_marine
+import meteo_weather
+from openmeteo_fakes import make_location
+
+def location(latitude, longitude):
+    return make_location(f"{latitude},{longitude}", latitude, longitude)
+
+def test_exact_coordinates_share_the_returned_grid_point(fake_client):
+    """Coordinates are requested as given; one grid point is decoded once."""
+    locations_list = [location(18.41, -66.01), location(18.42, -66.02), location(18.46, -66.09), location(18.41, -66.01)]
+    frames = data_fetcher._fetch_batch(meteo_marine, "marine", locations_list, batch_size=50)
+
+    (url, params), = fake_client.calls
+    assert url == meteo_marine.url
+    assert sorted(zip(params["latitude"], params["longitude"])) == [(18.41, -66.01), (18.42, -66.02), (18.46, -66.09)]
+    assert list(frames[0].columns) == ["date", "wave_height", "wave_period"]
+    # 18.41/-66.01 and 18.42/-66.02 fall on the same grid point, 18.46/-66.09 does not
+    assert frames[0] is frames[1] is frames[3]
+    assert frames[2] is not frames[0]
+
+def test_cached_grid_points_are_not_requested_again(fake_client):
+    """A second fetch is answered from the frame cache."""
+    locations_list = [location(18.41, -66.01), location(18.46, -66.09)]
+    first = data_fetcher._fetch_batch(meteo_weather, "weather", locations_list, batch_size=1)
+    assert len(fake_client.calls) == 2
+    second = data_fetcher._fetch_batch(meteo_weather, "weather", locations_list, batch_size=50)
+    assert len(fake_client.calls) == 2
+    assert all(a is b for a, b in zip(first, second))
+
+def test_frame_cache_expires(fake_client, monkeypatch):
+    """Frames older than the HTTP cache expiry are dropped and fetched again."""
+    data_fetcher._fetch_batch(meteo_marine, "marine", [location(18.41, -66.01)], batch_size=50)
+    monkeypatch.setattr(meteo_client, "CACHE_EXPIRE_AFTER", 0)
+    data_fetcher._fetch_batch(meteo_marine, "marine", [location(18.46, -66.09)], batch_size=50)
+    # Only the frame fetched last is left
+    assert [grid_point for _, grid_point in data_fetcher._cell_cache] == [(18.5, -66.1, 0.0)]
+    data_fetcher._fetch_batch(meteo_marine, "marine", [location(18.41, -66.01)], batch_size=50)
+    assert len(fake_client.calls) == 3
+
+def test_frame_cache_is_bounded(fake_client, monkeypatch):
+    """Only the most recently used frames and grid points are kept."""
+    monkeypatch.setattr(data_fetcher, "CELL_CACHE_MAX_ENTRIES", 3)
+    monkeypatch.setattr(data_fetcher, "GRID_POINT_CACHE_MAX_ENTRIES", 4)
+    locations_list = [location(18.0 + i / 10, -66.0) for i in range(6)]
+    data_fetcher._fetch_batch(meteo_marine, "marine", locations_list, batch_size=50)
+    assert len(data_fetcher._cell_cache) == 3
+    assert len(data_fetcher._grid_points) == 4
+
+    # The last locations are still cached, the first ones are requested again
+    data_fetcher._fetch_batch(meteo_marine, "marine", locations_list[-3:], batch_size=50)
+    assert len(fake_client.calls) == 1
+    data_fetcher._fetch_batch(meteo_marine, "marine", locations_list[:1], batch_size=50)
+    assert len(fake_client.calls) == 2
+
+def test_fetch_all_locations_yields_both_frames(fake_client):
+    """Every location is yielded once with its weather and marine frames."""
+    locations_list = [location(18.41, -66.01), location(18.46, -66.09), location(18.41, -66.01)]
+    fetched = sorted(data_fetcher.fetch_all_locations(locations_list, max_workers=2, batch_size=1),
+                     key=lambda item: item[0])
+    assert [item[0] for item in fetched] == [0, 1, 2]
+    for location_index, location_data, weather_df, marine_df in fetched:
+        assert location_data is locations_list[location_index]
+        assert "wind_speed_10m" in weather_df and "wave_height" in marine_df
@@ -0,0 +1,94 @@
+"""
+Tests for personalized digests and the streamed report email.
+"""
+import email
+
+import email_digest
+import lambda_function
+import table_generation
+from test_table_generation import fixed_forecast
+
+def report_results():
+    """Three locations with fixed forecasts (one without data)."""
+    forecast = fixed_forecast()
+    return {"San Juan": forecast, "Cabo Rojo": fixed_forecast((1, 0)), "Culebra": {}}
+
+def html_body(msg):
+    """Decode the HTML part of a sent message, as a mail client would."""
+    parsed = email.message_from_string(msg.as_string())
+    part, = [part for part in parsed.walk() if part.get_content_type() == "text/html"]
+    return part.get_payload(decode=True).decode(part.get_content_charset())
+
+def test_html_part_decodes_to_the_report():
+    """Fragments streamed into the payload decode to the whole document."""
+    all_results = report_results()
+    msg = email_digest.build_message(
+        table_generation.iter_html_tables(all_results), "from@example.com", ["to@example.com"]
+    )
+    assert html_body(msg) == table_generation.generate_html_tables(all_results)
+
+    # Fragment boundaries that split base64 lines and multi-byte characters
+    text = "<p>Rincón " + "é" * 100 + "</p>"
+    fragments = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert html_body(email_digest.build_message(iter(fragments), "f@example.com", ["t@example.com"])) == text
+
+def test_send_email_streams_the_report():
+    """The plain report path sends the whole report in one message."""
+    all_results = report_results()
+    sender = email_digest.StubSender()
+    lambda_function.send_email(
+        table_generation.iter_html_tables(all_results), "from@example.com",
+        ["a@example.com", "b@example.com"], sender=sender
+    )
+    (msg, recipients), = sender.sent
+    assert recipients == ["a@example.com", "b@example.com"]
+    assert html_body(msg) == table_generation.generate_html_tables(all_results)
+
+def test_one_message_per_recipient():
+    """Every subscriber gets their own message with only their spots."""
+    all_results = report_results()
+    subscriptions = {
+        "a@example.com": ["Cabo Rojo", "San Juan"],
+        "b@example.com": ["San Juan", "Cabo Rojo", "Nowhere"],
+        "c@example.com": ["Culebra"],
+        "d@example.com": ["Nowhere"],
+    }
+    sender = email_digest.StubSender()
+    sent = email_digest.send_digests(all_results, "from@example.com", subscriptions, sender=sender)
+
+    assert [recipients for recipients, _ in sent] == [["a@example.com"], ["b@example.com"], ["c@example.com"]]
+    for msg, recipients in sender.sent:
+        assert msg["To"] == recipients[0]
+    both = table_generation.generate_html_tables({name: all_results[name] for name in ("San Juan", "Cabo Rojo")})
+    assert html_body(sender.sent[0][0]) == both == html_body(sender.sent[1][0])
+    assert html_body(sender.sent[2][0]) == table_generation.generate_html_tables({"Culebra": {}})
+
+def test_messages_are_built_in_batches(monkeypatch):
+    """Only one batch of messages is built before they are sent."""
+    built = []
+    build_message = email_digest.build_message
+    monkeypatch.setattr(email_digest, "build_message",
+                        lambda *args: built.append(args) or build_message(*args))
+
+    class CountingSender(email_digest.StubSender):
+        def send(self, msg, recipient_emails):
+            self.built_at_send = getattr(self, "built_at_send", []) + [len(built)]
+            return super().send(msg, recipient_emails)
+
+    subscriptions = {f"user{i}@example.com": ["San Juan"] for i in range(5)}
+    sender = CountingSender()
+    sent = email_digest.send_digests(report_results(), "from@example.com", subscriptions,
+                                     sender=sender, batch_size=2)
+    assert len(sent) == 5
+    assert sender.built_at_send == [2, 2, 4, 4, 5]
+
+def test_locations_are_rendered_once(monkeypatch):
+    """Each location is rendered once, whatever the number of subscribers."""
+    rendered = []
+    render = table_generation.render_location_table
+    monkeypatch.setattr(table_generation, "render_location_table",
+                        lambda name, *args: rendered.append(name) or render(name, *args))
+    subscriptions = {f"user{i}@example.com": ["San Juan", "Cabo Rojo"][:1 + i % 2] for i in range(6)}
+    email_digest.send_digests(report_results(), "from@example.com", subscriptions,
+                              sender=email_digest.StubSender())
+    assert sorted(rendered) == ["Cabo Rojo", "San Juan"]
@@ -0,0 +1,92 @@
+"""
+Tests for ensemble member decoding and the probability of GOOD conditions.
+"""
+import numpy as np
+import pytest
+
+import calculations
+import data_analyzer
+import data_fetcher
+import ensemble
+import meteo_ensemble
+from openmeteo_fakes import START, FakeClient, FakeHourly, FakeResponse, FakeVariable, make_location
+
+def member_response(members_by_variable, hours=6):
+    """Response with the given member IDs per variable, blocks in the given order."""
+    variables = [
+        FakeVariable(name, np.full(hours, member * 10.0 + offset), member)
+        for offset, (name, members) in enumerate(members_by_variable)
+        for member in members
+    ]
+    return FakeResponse(18.5, -66.1, FakeHourly(START, hours, variables))
+
+def test_members_line_up_by_id():
+    """Row i of every variable is the same member, whatever the block order."""
+    response = member_response([("wind_speed_10m", [2, 0, 1]), ("wind_gusts_10m", [1, 2, 0])])
+    seconds, members = ensemble.response_members(response, ensemble.WEATHER_VARIABLES)
+    assert len(seconds) == 6
+    assert members["wind_speed_10m"][:, 0].tolist() == [0.0, 10.0, 20.0]
+    assert members["wind_gusts_10m"][:, 0].tolist() == [1.0, 11.0, 21.0]
+
+def test_mismatched_members_are_rejected():
+    """Variables with different member IDs are an error, not a silent mis-pairing."""
+    response = member_response([("wind_speed_10m", [0, 1, 2]), ("wind_gusts_10m", [0, 1, 3])])
+    with pytest.raises(ValueError, match="members"):
+        ensemble.response_members(response, ensemble.WEATHER_VARIABLES)
+
+def test_rate_members_rates_every_pairing():
+    """P(GOOD) is the share of all marine x weather pairings rated GOOD."""
+    rng = np.random.default_rng(3)
+    hours = 72
+    seconds = START + np.arange(hours, dtype=np.int64) * 3600
+    marine = {"wave_height": rng.uniform(0.1, 1.8, (2, hours)).astype(np.float32),
+              "wave_period": rng.uniform(3.0, 12.0, (2, hours)).astype(np.float32)}
+    weather = {"wind_speed_10m": rng.uniform(0.0, 35.0, (5, hours)).astype(np.float32),
+               "wind_gusts_10m": rng.uniform(0.0, 45.0, (5, hours)).astype(np.float32)}
+    forecast = ensemble.rate_members(seconds, marine, weather)
+
+    day_starts = np.arange(0, hours, 24)
+    hour_good, day_good = [], []
+    for m in range(2):
+        for w in range(5):
+            codes = calculations.assess_hour_conditions(
+                marine["wave_height"][m], marine["wave_period"][m],
+                weather["wind_speed_10m"][w], weather["wind_gusts_10m"][w]
+            )
+            hour_good.append(codes == calculations.RATING_GOOD)
+            day_good.append(calculations.determine_day_ratings(codes, day_starts)[0] == calculations.RATING_GOOD)
+
+    assert forecast.members == 10
+    assert forecast.dates == ["2025-06-01", "2025-06-02", "2025-06-03"]
+    assert np.allclose(forecast.p_good, np.mean(hour_good, axis=0))
+    assert np.allclose(forecast.day_p_good, np.mean(day_good, axis=0))
+    assert 0 < forecast.p_good.mean() < 1
+
+@pytest.mark.parametrize("daylight_window", [None, (1, 0)])
+def test_single_member_matches_the_deterministic_analysis(fake_client, monkeypatch, daylight_window):
+    """With one member per API, P(GOOD) is the deterministic GOOD rating."""
+    monkeypatch.setattr(meteo_ensemble, "get_client", lambda: fake_client)
+    locations_list = [make_location("A", 18.41, -66.01), make_location("B", 18.73, -65.52)]
+
+    results = ensemble.analyze_ensemble(locations_list, chunk_size=1, daylight_window=daylight_window)
+    assert list(results) == ["A", "B"]
+    for _, location, weather_df, marine_df in data_fetcher.fetch_all_locations(locations_list, max_workers=1):
+        forecast = data_analyzer.analyze_conditions(
+            marine_df, weather_df, data_analyzer.get_location_info(location), daylight_window
+        )
+        members = results[location["name"]]
+        assert (forecast.rating == calculations.RATING_GOOD).any()
+        assert members.members == 1
+        assert members.dates == forecast.dates
+        assert np.array_equal(members.time, forecast.time)
+        assert np.array_equal(members.p_good == 1, forecast.rating == calculations.RATING_GOOD)
+        assert np.array_equal(members.day_p_good == 1, forecast.day_rating == calculations.RATING_GOOD)
+
+def test_ensemble_members_are_cross_multiplied(fake_client, monkeypatch):
+    """Three marine and three weather members give nine rated members."""
+    client = FakeClient(members=3)
+    monkeypatch.setattr(meteo_ensemble, "get_client", lambda: client)
+    monkeypatch.setattr(ensemble.meteo_marine, "get_client", lambda: client)
+    result, = ensemble.analyze_ensemble([make_location("A", 18.41, -66.01)]).values()
+    assert result.members == 9
+    assert ((result.p_good >= 0) & (result.p_good <= 1)).all()
@@ -0,0 +1,121 @@
+"""
+Tests for the run-length encoded rating timeline of LocationForecast.
+"""
+import numpy as np
+import pytest
+
+import calculations
+import forecast_result
+
+def random_forecast(seed, hours=120, gaps=True):
+    """
+    Build a forecast with rating runs of several lengths, hour gaps (like
+    trimmed nights) and days that start at different hours.
+    """
+    rng = np.random.default_rng(seed)
+    start = int(np.datetime64("2025-06-01T05:00", "s").astype(np.int64))
+    steps = np.full(hours, 3600, dtype=np.int64)
+    if gaps:
+        steps[rng.random(hours) < 0.08] = 3600 * rng.integers(2, 10)
+    time = start + np.cumsum(steps) - steps[0]
+
+    run_lengths = rng.integers(1, 6, size=hours)
+    rating = np.repeat(
+        rng.integers(calculations.RATING_BAD, calculations.RATING_GOOD + 1, size=hours), run_lengths
+    )[:hours]
+
+    day_numbers = time // 86400
+    day_starts = np.flatnonzero(np.r_[True, day_numbers[1:] != day_numbers[:-1]])
+    days = len(day_starts)
+    metrics = {
+        "wave_height_ft": np.round(rng.uniform(0.5, 6.0, hours), 1),
+        "wind_speed_mph": np.round(rng.uniform(1.0, 25.0, hours), 1),
+        "wind_gust_mph": np.round(rng.uniform(2.0, 35.0, hours), 1),
+        "wave_period_sec": np.round(rng.uniform(3.0, 12.0, hours), 1)
+    }
+    return forecast_result.LocationForecast(
+        [forecast_result.format_date(day) for day in day_numbers[day_starts].tolist()],
+        day_starts,
+        rng.integers(calculations.RATING_BAD, calculations.RATING_GOOD + 1, size=days),
+        rng.integers(0, 12, size=days),
+        time[day_starts] - 3600,
+        time[day_starts] + 12 * 3600,
+        time,
+        rating,
+        metrics
+    )
+
+def brute_force_runs(time, rating, day_starts):
+    """Split the hours into runs one hour at a time."""
+    runs = []
+    day_starts = set(day_starts.tolist())
+    for i in range(len(time)):
+        if (i == 0 or i in day_starts or rating[i] != rating[i - 1]
+                or time[i] - time[i - 1] != 3600):
+            runs.append([i, 0, int(rating[i])])
+        runs[-1][1] += 1
+    return runs
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("gaps", [False, True])
+def test_rating_runs_match_brute_force(seed, gaps):
+    """Runs break at rating changes, hour gaps and day starts, and cover every hour."""
+    forecast = random_forecast(seed, gaps=gaps)
+    run_start, run_length, run_rating = forecast_result.rating_runs(
+        forecast.time, forecast.rating, forecast.day_starts
+    )
+    expected = brute_force_runs(forecast.time, forecast.rating, forecast.day_starts)
+
+    assert [list(run) for run in zip(run_start.tolist(), run_length.tolist(), run_rating.tolist())] == expected
+    assert np.array_equal(np.repeat(run_rating, run_length), forecast.rating)
+    assert np.array_equal(forecast.run_start, run_start)
+
+def test_rating_runs_of_no_hours():
+    empty = np.empty(0, dtype=np.int64)
+    for values in forecast_result.rating_runs(empty, empty.astype(np.int8), empty):
+        assert len(values) == 0
+    assert forecast_result.LocationForecast.empty().contiguous_runs(0, 0) == []
+
+def test_day_runs_stay_inside_their_day():
+    forecast = random_forecast(7)
+    for day_index in range(len(forecast.dates)):
+        start, end = forecast.day_bounds(day_index)
+        first, last = forecast.day_runs(day_index)
+        assert forecast.run_start[first] == start
+        assert forecast.run_start[last - 1] + forecast.run_length[last - 1] == end
+
+def test_contiguous_runs_split_at_hour_gaps():
+    forecast = random_forecast(8)
+    for day_index in range(len(forecast.dates)):
+        start, end = forecast.day_bounds(day_index)
+        groups = forecast.contiguous_runs(*forecast.day_runs(day_index))
+
+        gaps = np.flatnonzero(np.diff(forecast.time[start:end]) != 3600) + start
+        expected_firsts = [start] + (gaps + 1).tolist()
+        expected_lasts = gaps.tolist() + [end - 1]
+        assert groups == list(zip(expected_firsts, expected_lasts))
+
+def test_select_and_concat_keep_the_timeline():
+    """Carried-over runs equal the runs recomputed from the selected hours."""
+    forecast = random_forecast(9)
+    day_mask = np.arange(len(forecast.dates)) % 2 == 0
+    parts = [forecast.select(day_mask), forecast.select(~day_mask)]
+    for part in parts:
+        recomputed = forecast_result.rating_runs(part.time, part.rating, part.day_starts)
+        assert np.array_equal(part.run_start, recomputed[0])
+        assert np.array_equal(part.run_length, recomputed[1])
+
+    joined = forecast_result.LocationForecast.concat(parts[::-1])
+    assert joined.dates == forecast.dates
+    assert np.array_equal(joined.run_start, forecast.run_start)
+    assert np.array_equal(joined.run_length, forecast.run_length)
+    assert np.array_equal(joined.run_rating, forecast.run_rating)
+    assert np.array_equal(joined.day_run_starts, forecast.day_run_starts)
+
+def test_select_splitting_runs_recomputes_them():
+    forecast = random_forecast(10, gaps=False)
+    hour_mask = np.arange(len(forecast.time)) % 3 != 1
+    part = forecast.select(np.ones(len(forecast.dates), dtype=bool), hour_mask)
+    expected = brute_force_runs(part.time, part.rating, part.day_starts)
+    assert [list(run) for run in zip(part.run_start.tolist(), part.run_length.tolist(),
+                                     part.run_rating.tolist())] == expected
@@ -0,0 +1,76 @@
+"""
+Tests for the command line and the shard/merge pipeline.
+"""
+import pytest
+
+import forecast_result
+import future
+from openmeteo_fakes import make_location
+
+@pytest.mark.parametrize("argv", [
+    ["--ensemble", "--shard", "0/2"],
+    ["--ensemble", "--merge", "part.json"],
+    ["--ensemble", "--local-shards", "2"],
+    ["--ensemble", "--trip-hours", "3"],
+    ["--ensemble", "--analysis-workers", "2"],
+    ["--ensemble", "--incremental"],
+    ["--profiles", "--shard", "0/2"],
+    ["--profiles", "--trip-hours", "3"],
+    ["--profiles", "--ensemble"],
+])
+def test_parse_args_rejects_options_a_mode_would_ignore(argv, capsys):
+    """Options the ensemble and profile modes do not support are errors, not ignored."""
+    with pytest.raises(SystemExit):
+        future.parse_args(argv)
+    assert "cannot be combined" in capsys.readouterr().err
+
+def test_parse_args_accepts_supported_combinations():
+    """The daylight window and region apply to every mode."""
+    args = future.parse_args(["--ensemble", "--daylight-window", "1,0", "--region", "18.4,-66.1,50"])
+    assert args.ensemble and args.daylight_window == (1.0, 0.0)
+    args = future.parse_args(["--shard", "1/4", "--trip-hours", "3"])
+    assert args.shard == (1, 4) and args.trip_hours == 3
+
+def spots(count=7):
+    """Spots on distinct (and some shared) model grid points."""
+    return [make_location(f"Spot {i}", 18.0 + (i % 5) * 0.13, -66.0 - i * 0.07) for i in range(count)]
+
+@pytest.mark.parametrize("daylight_window", [None, (1, 0)])
+def test_shards_merge_to_the_single_run(fake_client, tmp_path, daylight_window):
+    """Shard + merge gives the same results, in the same order, as one run."""
+    locations_list = spots()
+    single = future.analyze_all_locations(max_workers=1, locations_list=locations_list,
+                                          daylight_window=daylight_window)
+
+    paths = [
+        future.run_shard(shard_index, 3, str(tmp_path), locations_list=locations_list,
+                         max_workers=1, daylight_window=daylight_window)
+        for shard_index in (2, 0, 1)
+    ]
+    merged = future.merge_partial_results(paths)
+
+    assert list(merged) == [location["name"] for location in locations_list]
+    assert forecast_result.to_json_dict(merged) == forecast_result.to_json_dict(single)
+
+def test_shard_bounds_cover_every_location_once():
+    """Shards are contiguous, cover the list and differ by at most one location."""
+    for location_count in (0, 1, 7, 100):
+        for shard_count in (1, 3, 8):
+            bounds = [future.shard_bounds(location_count, i, shard_count) for i in range(shard_count)]
+            assert bounds[0][0] == 0 and bounds[-1][1] == location_count
+            assert all(end == start for (_, end), (start, _) in zip(bounds, bounds[1:]))
+            sizes = [end - start for start, end in bounds]
+            assert max(sizes) - min(sizes) <= 1
+
+def test_merge_rejects_an_incomplete_set(fake_client, tmp_path):
+    """A missing shard is an error, not a silently shorter report."""
+    locations_list = spots(4)
+    paths = [future.run_shard(i, 3, str(tmp_path), locations_list=locations_list, max_workers=1) for i in (0, 2)]
+    with pytest.raises(ValueError):
+        future.merge_partial_results(paths)
+
+def test_parse_shard():
+    assert future.parse_shard("2/5") == (2, 5)
+    for value in ("5/5", "-1/2", "1/0"):
+        with pytest.raises(ValueError):
+            future.parse_shard(value)
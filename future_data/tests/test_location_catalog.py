@@ -0,0 +1,118 @@
+"""
+Tests for the grid-bucket location catalog against brute-force distance scans.
+"""
+import json
+
+import numpy as np
+import pytest
+
+import location_catalog
+import locations
+
+def random_catalog(n, seed, cell_deg=location_catalog.INDEX_CELL_DEG):
+    """Spots clustered around a few centers, including the poles and the antimeridian."""
+    rng = np.random.default_rng(seed)
+    centers = np.array([[18.4, -66.1], [0.0, 179.9], [0.0, -179.9], [89.8, 0.0], [-89.8, 45.0], [45.0, 10.0]])
+    picks = centers[rng.integers(0, len(centers), n)]
+    latitudes = np.clip(picks[:, 0] + rng.normal(0.0, 1.5, n), -90.0, 90.0)
+    longitudes = (picks[:, 1] + rng.normal(0.0, 1.5, n) + 180.0) % 360.0 - 180.0
+    names = [f"spot {i}" for i in range(n)]
+    return location_catalog.LocationCatalog(
+        names, ["region"] * n, ["UTC"] * n, latitudes, longitudes, cell_deg
+    )
+
+def query_points(seed, count=60):
+    """Query points near the clusters and anywhere on the globe."""
+    rng = np.random.default_rng(seed)
+    near = [(18.0, -66.5), (0.0, 180.0), (0.3, -179.95), (90.0, 0.0), (-90.0, 0.0), (45.2, 9.8)]
+    anywhere = zip(rng.uniform(-90.0, 90.0, count), rng.uniform(-180.0, 180.0, count))
+    return near + [(float(lat), float(lon)) for lat, lon in anywhere]
+
+def brute_force_distances(catalog, latitude, longitude):
+    return location_catalog.haversine_km(latitude, longitude, catalog.latitudes, catalog.longitudes)
+
+@pytest.mark.parametrize("cell_deg", [0.5, 2.0])
+@pytest.mark.parametrize("radius_km", [0.0, 25.0, 150.0, 800.0])
+def test_within_matches_brute_force(cell_deg, radius_km):
+    """within() returns exactly the spots a full scan finds, nearest first."""
+    catalog = random_catalog(400, seed=3, cell_deg=cell_deg)
+    for latitude, longitude in query_points(seed=4):
+        distances = brute_force_distances(catalog, latitude, longitude)
+        found = catalog.within(latitude, longitude, radius_km)
+
+        assert sorted(found.tolist()) == np.flatnonzero(distances <= radius_km).tolist()
+        assert np.all(np.diff(distances[found]) >= 0)
+
+@pytest.mark.parametrize("cell_deg", [0.5, 2.0])
+def test_nearest_matches_brute_force(cell_deg):
+    """nearest() finds the closest spot both near the clusters and far from every spot."""
+    catalog = random_catalog(400, seed=5, cell_deg=cell_deg)
+    for latitude, longitude in query_points(seed=6):
+        distances = brute_force_distances(catalog, latitude, longitude)
+        index, distance = catalog.nearest(latitude, longitude)
+
+        assert distance == pytest.approx(distances.min())
+        assert distances[index] == pytest.approx(distances.min())
+
+def test_queries_on_an_empty_catalog():
+    catalog = location_catalog.LocationCatalog([], [], [], [], [])
+    assert catalog.nearest(18.0, -66.0) == (None, None)
+    assert catalog.within(18.0, -66.0, 1000.0).tolist() == []
+    assert catalog.region(18.0, -66.0, 1000.0) == []
+
+def test_region_returns_location_dictionaries_in_catalog_order():
+    catalog = location_catalog.LocationCatalog.from_locations(locations.LOCATIONS)
+    center = locations.LOCATIONS[0]
+    distances = brute_force_distances(catalog, center["latitude"], center["longitude"])
+    expected = [loc for loc, distance in zip(locations.LOCATIONS, distances) if distance <= 60.0]
+
+    region = catalog.region(center["latitude"], center["longitude"], 60.0)
+    assert [loc["name"] for loc in region] == [loc["name"] for loc in expected]
+    for loc, source in zip(region, expected):
+        assert (loc["latitude"], loc["longitude"]) == (source["latitude"], source["longitude"])
+
+def test_csv_and_geojson_files_load_the_same_catalog(tmp_path):
+    """Both file formats fill in missing regions and timezones with the defaults."""
+    csv_path = tmp_path / "spots.csv"
+    csv_path.write_text(
+        "name,latitude,longitude,region,timezone\n"
+        "Crash Boat,18.4575,-67.1670,Puerto Rico,America/Puerto_Rico\n"
+        "Nowhere,10.5,-60.25,,\n"
+    )
+    geojson_path = tmp_path / "spots.geojson"
+    geojson_path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-67.1670, 18.4575]},
+         "properties": {"name": "Crash Boat", "region": "Puerto Rico", "timezone": "America/Puerto_Rico"}},
+        {"type": "Feature", "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]},
+         "properties": {"name": "Skipped"}},
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-60.25, 10.5]},
+         "properties": {"name": "Nowhere"}}
+    ]}))
+
+    from_csv = location_catalog.LocationCatalog.load(str(csv_path))
+    from_geojson = location_catalog.LocationCatalog.load(str(geojson_path))
+    assert from_csv.locations() == from_geojson.locations()
+    assert from_csv.location(1) == {
+        "name": "Nowhere", "region": location_catalog.DEFAULT_REGION,
+        "timezone": location_catalog.DEFAULT_TIMEZONE, "latitude": 10.5, "longitude": -60.25
+    }
+
+    with pytest.raises(ValueError):
+        location_catalog.LocationCatalog.load(str(tmp_path / "spots.txt"))
+
+def test_default_locations_follow_locations_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(location_catalog, "_catalog", None)
+    monkeypatch.setattr(location_catalog, "LOCATIONS_FILE", None)
+    assert location_catalog.default_locations() is locations.LOCATIONS
+
+    csv_path = tmp_path / "spots.csv"
+    csv_path.write_text("name,latitude,longitude\nOnly Spot,18.0,-66.0\n")
+    monkeypatch.setattr(location_catalog, "_catalog", None)
+    monkeypatch.setattr(location_catalog, "LOCATIONS_FILE", str(csv_path))
+    assert [loc["name"] for loc in location_catalog.default_locations()] == ["Only Spot"]
+
+def test_parse_region():
+    assert location_catalog.parse_region("18.4,-66.1,25") == (18.4, -66.1, 25.0)
+    for value in ("18.4,-66.1", "18.4,-66.1,25,1", "north,-66.1,25"):
+        with pytest.raises(ValueError):
+            location_catalog.parse_region(value)
@@ -0,0 +1,85 @@
+"""
+Tests for the shared memory process pool against in-process analysis.
+"""
+import numpy as np
+import pytest
+
+import benchmark
+import data_analyzer
+import parallel_analysis
+import solar
+
+def fetched_inputs(location_count=7, days=3):
+    """(location_index, location, weather_df, marine_df) like fetch_all_locations yields."""
+    return [
+        (i, location, weather_df, marine_df)
+        for i, (location, marine_df, weather_df) in enumerate(
+            benchmark.synthetic_inputs(location_count, days, seed=5)
+        )
+    ]
+
+def serial_results(fetched, daylight_window):
+    return {
+        i: data_analyzer.analyze_conditions(
+            marine_df, weather_df, data_analyzer.get_location_info(location), daylight_window
+        )
+        for i, location, weather_df, marine_df in fetched
+    }
+
+def test_pool_never_forks():
+    assert parallel_analysis.pool_context().get_start_method() in ("forkserver", "spawn")
+
+@pytest.mark.parametrize("daylight_window", [None, (1, 0)])
+def test_pool_matches_serial_analysis(daylight_window):
+    """Every location analyzed on the pool equals the in-process result."""
+    fetched = fetched_inputs()
+    expected = serial_results(fetched, daylight_window)
+
+    results = parallel_analysis.analyze_fetched_parallel(
+        iter(fetched[::-1]), workers=2, daylight_window=daylight_window, shard_size=3
+    )
+    assert sorted(results) == sorted(expected)
+    for i, forecast in expected.items():
+        assert results[i].dates == forecast.dates
+        for field in ("time", "rating", "day_rating", "good_hours_count", "sunrise", "sunset", "run_start"):
+            assert np.array_equal(getattr(results[i], field), getattr(forecast, field))
+        assert results[i].to_dict() == forecast.to_dict()
+
+def test_worker_sun_times_reach_this_process(solar_table, monkeypatch):
+    """Sunrise/sunset computed by the workers are stored in the parent's table."""
+    fetched = fetched_inputs(location_count=2, days=2)
+    location = fetched[0][1]
+    days = [20240, 20241]  # 2025-06-01 and 02, the synthetic forecast days
+    expected = solar.compute_sun_times(location["latitude"], location["longitude"], days)
+
+    parallel_analysis.analyze_fetched_parallel(iter(fetched), workers=2, shard_size=1)
+
+    def no_compute(*args):
+        raise AssertionError("sun times should come from the table")
+    monkeypatch.setattr(solar, "compute_sun_times", no_compute)
+    sunrises, sunsets = solar_table.lookup(location["latitude"], location["longitude"], days)
+    assert sunrises.tolist() == expected[0].tolist()
+    assert sunsets.tolist() == expected[1].tolist()
+
+def test_analyze_views_reads_the_packed_arrays():
+    """A packed shard analyzed on its views equals the arrays it was packed from."""
+    fetched = fetched_inputs(location_count=3, days=2)
+    shard = []
+    for i, location, weather_df, marine_df in fetched:
+        seconds, columns = data_analyzer.align_frames(marine_df, weather_df)
+        shard.append((i, location, seconds, columns))
+    shm, entries = parallel_analysis._pack_shard(shard)
+    try:
+        for (i, location, seconds, columns), (index, _, arrays) in zip(shard, entries):
+            assert index == i
+            views = {
+                name: np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)
+                for name, dtype, offset, length in arrays
+            }
+            assert np.array_equal(views.pop("date"), seconds)
+            for name, values in columns.items():
+                assert np.array_equal(views[name], values)
+            del views
+    finally:
+        shm.close()
+        shm.unlink()
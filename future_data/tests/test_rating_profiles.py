@@ -0,0 +1,64 @@
+"""
+Tests for the declarative rating profiles against the hand-written rules.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+import calculations
+import rating_profiles
+
+def random_conditions(count=5000, seed=21):
+    """Return wave height (m), period (s), wind and gust arrays around the thresholds."""
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(0.0, 2.0, count),
+        rng.uniform(1.0, 14.0, count),
+        rng.uniform(0.0, 40.0, count),
+        rng.uniform(0.0, 50.0, count)
+    )
+
+def load_conditions_analyzer():
+    """Import current_data/conditions_analyzer.py by path (it is not a package)."""
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "current_data", "conditions_analyzer.py")
+    spec = importlib.util.spec_from_file_location("conditions_analyzer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ConditionsAnalyzer()
+
+def test_default_profile_matches_assess_hour_condition():
+    """The default profile rates every hour like the scalar rules."""
+    wave_height, wave_period, wind_speed, wind_gust = random_conditions()
+    codes = rating_profiles.default_profile().rate(wave_height, wave_period, wind_speed, wind_gust)[0]
+
+    for i in range(len(wave_height)):
+        expected = calculations.assess_hour_condition(
+            calculations.convert_wave_height_to_feet(wave_height[i]),
+            calculations.convert_wind_speed_to_mph(wind_speed[i]),
+            calculations.convert_wind_speed_to_mph(wind_gust[i]),
+            wave_period[i],
+            wave_height[i]
+        )
+        assert calculations.RATING_LABELS[codes[i]] == expected
+
+def test_buoy_profile_matches_conditions_analyzer():
+    """The buoy profile mirrors the thresholds of the buoy analyzer."""
+    analyzer = load_conditions_analyzer()
+    wave_height, wave_period, wind_speed_ms, wind_gust_ms = random_conditions(seed=41)
+    wind_speed_ms, wind_gust_ms = wind_speed_ms / 3.6, wind_gust_ms / 3.6
+
+    # The analyzer converts m/s with 2.237 mph; give the profile the same mph in km/h
+    ms_to_kmh = 2.237 / 0.621371
+    codes = rating_profiles.compile_profiles([rating_profiles.BUOY_PROFILE]).rate(
+        wave_height, wave_period, wind_speed_ms * ms_to_kmh, wind_gust_ms * ms_to_kmh
+    )[0]
+
+    labels = {"GOOD": "GREAT", "MEDIOCRE": "MEDIOCRE", "BAD": "BAD"}
+    for i in range(len(wave_height)):
+        expected = analyzer.analyze_conditions({
+            "wave": {"wave_height": wave_height[i], "wave_period": wave_period[i]},
+            "wind": {"wind_speed": wind_speed_ms[i], "wind_gust": wind_gust_ms[i]},
+            "spectral": {}
+        })
+        assert labels[calculations.RATING_LABELS[codes[i]]] == expected
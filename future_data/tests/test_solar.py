@@ -0,0 +1,74 @@
+"""
+Tests for the NumPy sunrise/sunset port against astral.
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+from astral import Observer
+from astral.sun import sunrise, sunset
+
+import solar
+
+# (latitude, longitude) of spots in both hemispheres, including ones whose
+# sunset falls on the next UTC day
+LOCATIONS = [
+    (18.4669, -66.0899),   # San Juan
+    (27.7676, -82.6403),   # St. Petersburg, FL
+    (51.5072, -0.1276),    # London
+    (-33.8688, 151.2093),  # Sydney
+    (35.6762, 139.6503),   # Tokyo
+]
+
+DATES = [
+    date(2025, 1, 1),
+    date(2025, 3, 20),
+    date(2025, 6, 21),
+    date(2025, 9, 23),
+    date(2025, 12, 21),
+    date(2024, 2, 29),
+]
+
+@pytest.mark.parametrize("latitude,longitude", LOCATIONS)
+def test_compute_sun_times_matches_astral(latitude, longitude):
+    """Every date is within a second of astral (astral keeps microseconds)."""
+    day_numbers = [solar.to_day_number(day) for day in DATES]
+    sunrises, sunsets = solar.compute_sun_times(latitude, longitude, day_numbers)
+
+    observer = Observer(latitude, longitude)
+    for day, sunrise_epoch, sunset_epoch in zip(DATES, sunrises.tolist(), sunsets.tolist()):
+        assert abs(sunrise_epoch - sunrise(observer, day).timestamp()) < 1.0
+        assert abs(sunset_epoch - sunset(observer, day).timestamp()) < 1.0
+
+def test_compute_sun_times_date_range():
+    """A whole range computed at once matches computing each date alone."""
+    first_day = solar.to_day_number(date(2025, 5, 1))
+    day_numbers = np.arange(first_day, first_day + 60)
+    sunrises, sunsets = solar.compute_sun_times(27.7676, -82.6403, day_numbers)
+
+    for i, day in enumerate(day_numbers.tolist()):
+        single_sunrise, single_sunset = solar.compute_sun_times(27.7676, -82.6403, [day])
+        assert sunrises[i] == single_sunrise[0]
+        assert sunsets[i] == single_sunset[0]
+        # Times fall on the requested UTC date, like astral's
+        assert sunrises[i] // 86400 == day
+        assert sunsets[i] // 86400 == day
+
+def test_compute_sun_times_polar_night():
+    """Dates without a sunrise raise ValueError, like astral."""
+    with pytest.raises(ValueError):
+        solar.compute_sun_times(78.2232, 15.6267, [solar.to_day_number(date(2025, 12, 21))])
+
+def test_solar_table_lookup_and_sunrise_sunset():
+    """The table returns the computed times, as epochs and as datetimes."""
+    table = solar.SolarTable(path=None)
+    day = date(2025, 6, 21)
+    sunrises, sunsets = table.lookup(18.4669, -66.0899, [solar.to_day_number(day)])
+    expected_sunrises, expected_sunsets = solar.compute_sun_times(18.4669, -66.0899, [solar.to_day_number(day)])
+    assert sunrises.tolist() == expected_sunrises.tolist()
+    assert sunsets.tolist() == expected_sunsets.tolist()
+
+    sunrise_time, sunset_time = table.sunrise_sunset(18.4669, -66.0899, day)
+    observer = Observer(18.4669, -66.0899)
+    assert abs(sunrise_time.timestamp() - sunrise(observer, day).timestamp()) < 1.0
+    assert abs(sunset_time.timestamp() - sunset(observer, day).timestamp()) < 1.0
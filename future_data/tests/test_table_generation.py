@@ -0,0 +1,216 @@
+"""
+Tests for the HTML report renderer against the original dict-based renderer.
+"""
+import io
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import data_analyzer
+import table_generation
+
+LOCATION = {
+    "name": "San Juan",
+    "region": "Puerto Rico",
+    "timezone": "America/Puerto_Rico",
+    "latitude": 18.4669,
+    "longitude": -66.0899,
+}
+
+def baseline_generate_html_tables(all_results):
+    """
+    The renderer as it was before the columnar results, kept as the
+    reference output (only the unchanged style block is shared). It takes the
+    legacy `{date: day_dict}` results.
+    """
+    styles = table_generation.HTML_STYLES
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Boating Conditions Forecast</title>
+        {styles}
+    </head>
+    <body>
+        <h1>Boating Conditions Forecast</h1>
+    """
+
+    for location_name, location_results in all_results.items():
+        html += f"<div class='location-header'>{location_name}</div>"
+        html += "<table>"
+        dates = sorted(location_results.keys())
+
+        if not dates:
+            html += "<tr><td>No data available for this location.</td></tr></table>"
+            continue
+
+        html += "<tr><th>Hour</th>"
+        for date in dates:
+            formatted_date = f"{date[5:7]}/{date[8:10]}"
+            weekday = datetime.strptime(date, "%Y-%m-%d").strftime("%A")
+            html += f"<th class='date-header'>{formatted_date}<br><span class='weekday'>{weekday}</span></th>"
+        html += "</tr>"
+
+        date_blocks = {}
+        for date in dates:
+            hourly_data = sorted(location_results[date].get('hourly', []), key=lambda x: x['time'])
+            if not hourly_data:
+                date_blocks[date] = []
+                continue
+
+            blocks = []
+            current_block = {
+                'rating': hourly_data[0]['rating'],
+                'start_hour': hourly_data[0]['time'],
+                'end_hour': hourly_data[0]['time'],
+                'count': 1
+            }
+            for i in range(1, len(hourly_data)):
+                current_hour = hourly_data[i]
+                prev_hour_int = int(hourly_data[i - 1]['time'].split(':')[0])
+                curr_hour_int = int(current_hour['time'].split(':')[0])
+                if curr_hour_int == prev_hour_int + 1 and current_hour['rating'] == current_block['rating']:
+                    current_block['end_hour'] = current_hour['time']
+                    current_block['count'] += 1
+                else:
+                    blocks.append(current_block)
+                    current_block = {
+                        'rating': current_hour['rating'],
+                        'start_hour': current_hour['time'],
+                        'end_hour': current_hour['time'],
+                        'count': 1
+                    }
+            blocks.append(current_block)
+            date_blocks[date] = blocks
+
+        for hour in [f"{h:02d}:00" for h in range(24)]:
+            html += f"<tr><td class='hour-cell'>{hour}</td>"
+            for date in dates:
+                matching_block = None
+                for block in date_blocks.get(date, []):
+                    if block['start_hour'] == hour:
+                        matching_block = block
+                        break
+
+                if matching_block is None and any(
+                    int(block['start_hour'].split(':')[0]) < int(hour.split(':')[0]) <= int(block['end_hour'].split(':')[0])
+                    for block in date_blocks.get(date, [])
+                ):
+                    continue
+
+                if matching_block:
+                    rating = matching_block['rating']
+                    rowspan = matching_block['count']
+                    if rating == "GOOD":
+                        css_class = "good"
+                        cell_content = f"{rating}<br><span class='hour-count'>{rowspan} hr</span>"
+                    elif rating == "MEDIOCRE":
+                        css_class = "mediocre"
+                        cell_content = rating
+                    else:
+                        css_class = "bad"
+                        cell_content = rating
+                    html += f"<td class='{css_class}' rowspan='{rowspan}'>{cell_content}</td>"
+                else:
+                    html += "<td></td>"
+            html += "</tr>"
+        html += "</table>"
+
+    html += """
+    </body>
+    </html>
+    """
+    return html
+
+def fixed_forecast(daylight_window=None):
+    """
+    Analyze a fixed five-day forecast that starts mid-day, with conditions
+    that change every few hours so every rating forms runs of several lengths.
+    """
+    rng = np.random.default_rng(20250601)
+    start = int(np.datetime64("2025-06-01T07:00", "s").astype(np.int64))
+    hours = 5 * 24 - 7
+    seconds = np.arange(start, start + hours * 3600, 3600, dtype=np.int64)
+    run_lengths = rng.integers(1, 7, size=hours)
+
+    def steps(low, high):
+        values = rng.uniform(low, high, size=hours)
+        return np.repeat(values, run_lengths)[:hours].astype(np.float32)
+
+    columns = {
+        "wave_height": steps(0.1, 2.5),
+        "wave_period": steps(3.0, 12.0),
+        "wind_speed_10m": steps(1.0, 15.0),
+        "wind_gusts_10m": steps(2.0, 20.0),
+    }
+    location_info = data_analyzer.get_location_info(LOCATION)
+    return data_analyzer.analyze_columns(seconds, columns, location_info, daylight_window)
+
+@pytest.mark.parametrize("daylight_window", [None, (1, 0)])
+def test_generate_html_tables_matches_baseline(daylight_window):
+    """Columnar results render exactly like the legacy dicts did."""
+    forecast = fixed_forecast(daylight_window)
+    ratings = set(forecast.rating_labels())
+    assert ratings == {"GOOD", "MEDIOCRE", "BAD"}
+
+    all_results = {LOCATION["name"]: forecast, "Nowhere": {}}
+    expected = baseline_generate_html_tables({
+        LOCATION["name"]: forecast.to_dict(), "Nowhere": {}
+    })
+    assert table_generation.generate_html_tables(all_results) == expected
+
+    # Legacy dict results still render the same
+    assert table_generation.generate_html_tables({
+        LOCATION["name"]: forecast.to_dict(), "Nowhere": {}
+    }) == expected
+
+def test_write_html_tables_matches_generate():
+    """Streaming the report gives the same document as building it in memory."""
+    all_results = {LOCATION["name"]: fixed_forecast((1, 0))}
+    stream = io.StringIO()
+    table_generation.write_html_tables(all_results, stream)
+    assert stream.getvalue() == table_generation.generate_html_tables(all_results)
+
+def test_column_cache_renders_the_same():
+    """Cached date columns give the same table as rendering them again."""
+    forecast = fixed_forecast()
+    column_cache = {}
+    first = table_generation.render_location_table(LOCATION["name"], forecast, column_cache=column_cache)
+    assert set(column_cache) == set(forecast.dates)
+    assert table_generation.render_location_table(LOCATION["name"], forecast, column_cache=column_cache) == first
+    assert table_generation.render_location_table(LOCATION["name"], forecast) == first
+
+def test_export_to_excel_round_trip(tmp_path):
+    """Every hour comes back from the workbook with its date, metrics and rating."""
+    pytest.importorskip("xlsxwriter")
+    openpyxl = pytest.importorskip("openpyxl")
+
+    forecast = fixed_forecast()
+    good_days = data_analyzer.find_good_days({LOCATION["name"]: forecast, "Nowhere": {}})
+    all_hours = {"All " + LOCATION["name"]: forecast}
+    path = str(tmp_path / "report.xlsx")
+    assert table_generation.export_to_excel({**good_days, **all_hours}, path) == path
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == [LOCATION["name"], "All " + LOCATION["name"]]
+
+    for sheet_name, expected in [(LOCATION["name"], good_days[LOCATION["name"]]),
+                                 ("All " + LOCATION["name"], forecast)]:
+        sheet = workbook[sheet_name]
+        rows = list(sheet.iter_rows(values_only=True))
+        assert rows[0][0] == f"Good Boating Conditions - {sheet_name}"
+        assert list(rows[1]) == table_generation.EXCEL_COLUMNS
+
+        expected_rows = []
+        for day_index, date in enumerate(expected.dates):
+            start, end = expected.day_bounds(day_index)
+            metrics = [expected.metric_values(name, start, end) for name in table_generation.EXCEL_METRICS]
+            for i, (time, rating) in enumerate(zip(expected.hour_strings(start, end), expected.rating_labels(start, end))):
+                expected_rows.append((date, time, *(values[i] for values in metrics), rating))
+        assert rows[2:] == expected_rows
+
+        # Data cells take their column's format, GOOD is highlighted by one range rule
+        assert sheet.column_dimensions["C"].number_format == "0.0"
+        ranges = [str(rule_range.sqref) for rule_range in sheet.conditional_formatting]
+        assert ranges == [f"H3:H{len(rows)}"]
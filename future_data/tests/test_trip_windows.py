@@ -0,0 +1,121 @@
+"""
+Tests for the best-departure-window finder against a brute-force window scan.
+"""
+import numpy as np
+import pytest
+
+import calculations
+import forecast_result
+import trip_windows
+from test_forecast_result import random_forecast
+
+def brute_force_windows(forecast, length, k, score, min_rating=calculations.RATING_GOOD,
+                        allow_overlap=False):
+    """Check every start hour by hour, then pick the best windows greedily."""
+    margins = trip_windows.hour_margins(forecast)
+    gusts = forecast.metrics["wind_gust_mph"].astype(np.float64)
+    candidates = []
+    for start in range(len(forecast.time) - length + 1):
+        hours = range(start, start + length)
+        if any(forecast.rating[i] < min_rating for i in hours):
+            continue
+        if any(forecast.time[i + 1] - forecast.time[i] != 3600 for i in hours[:-1]):
+            continue
+        margin = min(margins[i] for i in hours)
+        gust = max(gusts[i] for i in hours)
+        candidates.append((-(margin if score == "margin" else -gust), start, margin, gust))
+
+    chosen = []
+    for _, start, margin, gust in sorted(candidates):
+        if allow_overlap or all(abs(start - other[0]) >= length for other in chosen):
+            chosen.append((start, round(float(margin), 3), round(float(gust), 1)))
+        if len(chosen) == k:
+            break
+    return chosen
+
+def window_summary(forecast, windows):
+    """Reduce window dicts to (start hour index, min_margin, max_gust_mph)."""
+    start_of = {
+        (forecast_result.format_date(int(epoch) // 86400), forecast_result.format_hour(int(epoch))): i
+        for i, epoch in enumerate(forecast.time.tolist())
+    }
+    return [(start_of[window["date"], window["start"]], window["min_margin"], window["max_gust_mph"])
+            for window in windows]
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("score", trip_windows.SCORES)
+@pytest.mark.parametrize("min_rating", [calculations.RATING_GOOD, calculations.RATING_MEDIOCRE])
+def test_location_windows_match_brute_force(seed, score, min_rating):
+    forecast = random_forecast(seed, hours=150)
+    results = trip_windows.location_windows(forecast, k=4, score=score, min_rating=min_rating)
+
+    assert list(results) == list(trip_windows.WINDOW_LENGTHS)
+    assert any(results.values())
+    for length, windows in results.items():
+        assert window_summary(forecast, windows) == brute_force_windows(
+            forecast, length, 4, score, min_rating
+        )
+
+@pytest.mark.parametrize("seed", range(4))
+def test_returned_windows_never_share_hours(seed):
+    forecast = random_forecast(seed, hours=150)
+    for length, windows in trip_windows.location_windows(
+            forecast, k=10, min_rating=calculations.RATING_MEDIOCRE).items():
+        starts = sorted(start for start, _, _ in window_summary(forecast, windows))
+        assert all(later - earlier >= length for earlier, later in zip(starts, starts[1:]))
+        for window in windows:
+            assert window["hours"] == length
+
+def test_allow_overlap_returns_the_best_starts():
+    forecast = random_forecast(11, hours=150)
+    windows = trip_windows.location_windows(
+        forecast, [3], k=5, min_rating=calculations.RATING_MEDIOCRE, allow_overlap=True
+    )[3]
+    assert window_summary(forecast, windows) == brute_force_windows(
+        forecast, 3, 5, "margin", calculations.RATING_MEDIOCRE, allow_overlap=True
+    )
+
+def test_windows_stop_at_hour_gaps():
+    """A run of GOOD hours split by a gap holds no window across the gap."""
+    forecast = random_forecast(12, hours=10, gaps=False)
+    forecast.rating[:] = calculations.RATING_GOOD
+    forecast.time[5:] += 3600
+    forecast = forecast_result.LocationForecast(
+        forecast.dates, forecast.day_starts, forecast.day_rating, forecast.good_hours_count,
+        forecast.sunrise, forecast.sunset, forecast.time, forecast.rating, forecast.metrics
+    )
+    results = trip_windows.location_windows(forecast, [5, 6], k=10, allow_overlap=True)
+    assert sorted(start for start, _, _ in window_summary(forecast, results[5])) == [0, 5]
+    assert results[6] == []
+
+def test_window_end_is_after_the_last_hour():
+    forecast = random_forecast(13, hours=6, gaps=False)
+    forecast.rating[:] = calculations.RATING_GOOD
+    window, = trip_windows.location_windows(forecast, [6])[6]
+    assert window["start"] == forecast_result.format_hour(int(forecast.time[0]))
+    assert window["end"] == forecast_result.format_hour(int(forecast.time[-1]) + 3600)
+
+def test_edge_cases_return_no_windows():
+    forecast = random_forecast(14, hours=30)
+    forecast.rating[:] = calculations.RATING_MEDIOCRE
+    assert trip_windows.location_windows(forecast, [2, 3]) == {2: [], 3: []}
+
+    # Longer than the forecast, or an empty forecast
+    assert trip_windows.location_windows(random_forecast(15, hours=5), [6]) == {6: []}
+    assert trip_windows.location_windows(forecast_result.LocationForecast.empty(), [2]) == {2: []}
+    assert trip_windows.location_windows({}, [2]) == {2: []}
+
+    with pytest.raises(ValueError):
+        trip_windows.location_windows(forecast, [2], score="waves")
+
+def test_best_windows_leave_out_locations_without_windows():
+    good = random_forecast(16, hours=150)
+    bad = random_forecast(17, hours=30)
+    bad.rating[:] = calculations.RATING_BAD
+    found = trip_windows.best_windows({"Good": good, "Bad": bad}, 4, k=2, score="gust")
+    assert list(found) == ["Good"]
+    assert found["Good"] == trip_windows.location_windows(good, [4], 2, "gust")[4]
+
+    swept = trip_windows.sweep_windows({"Good": good, "Bad": bad}, [2, 4])
+    assert swept["Bad"] == {2: [], 4: []}
+    assert swept["Good"][4] == trip_windows.location_windows(good, [4])[4]
@@ -0,0 +1,161 @@
+"""
+Lightweight tracing for the forecast pipeline.
+
+Stages wrap their work in spans:
+
+    with tracing.span("fetch", api="marine") as s:
+        ...
+        s.set(rows=len(df), cache_hits=hits)
+
+Every finished span is written as one log line with its duration and
+attributes: a JSON object, or a CloudWatch Embedded Metric Format (EMF)
+record when running in Lambda, so numeric attributes become metrics without
+extra API calls. When tracing is disabled span() returns a shared no-op
+object, so instrumented code costs only a function call.
+
+Configured with environment variables:
+    TRACING          '1' to enable (default: disabled)
+    TRACING_FORMAT   'json' or 'emf' (default: 'emf' in Lambda, else 'json')
+    TRACING_FILE     file to append lines to (default: stdout)
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+# Tracing is off unless explicitly enabled
+TRACING_ENABLED = os.environ.get("TRACING", "").strip().lower() in ("1", "true", "yes", "on")
+
+# JSON lines locally; EMF when running in Lambda (CloudWatch turns it into metrics)
+TRACING_FORMAT = os.environ.get(
+    "TRACING_FORMAT",
+    "emf" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "json"
+).strip().lower()
+
+# Optional file for trace lines instead of stdout
+TRACING_FILE = os.environ.get("TRACING_FILE")
+
+# CloudWatch namespace of EMF metrics
+EMF_NAMESPACE = "BoatingConditions"
+
+# EMF units for known numeric attributes (others are reported as Count)
+EMF_UNITS = {
+    "duration_ms": "Milliseconds",
+    "bytes": "Bytes"
+}
+
+_write_lock = threading.Lock()
+
+class _NoopSpan:
+    """Span stand-in used while tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, name, amount=1):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """
+    One timed pipeline stage.
+
+    Args:
+        name (str): Stage name (fetch, decode, merge, analyze, render, email, ...)
+        attributes (dict): Initial attributes
+    """
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self.start) * 1000.0
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _emit(self.name, self.started_at, duration_ms, self.attributes)
+        return False
+
+    def set(self, **attributes):
+        """Set attributes (rows, bytes, cache_hits, ...)."""
+        self.attributes.update(attributes)
+
+    def add(self, name, amount=1):
+        """Increase a numeric attribute."""
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+def enabled():
+    """Return True when spans are recorded."""
+    return TRACING_ENABLED
+
+def span(name, **attributes):
+    """
+    Start a span for a pipeline stage.
+
+    Args:
+        name (str): Stage name
+        **attributes: Initial attributes (e.g. api='marine')
+
+    Returns:
+        Span: Context manager; a shared no-op object when tracing is disabled
+    """
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+def _emf_record(name, started_at, duration_ms, attributes):
+    """Build a CloudWatch Embedded Metric Format record for a span."""
+    metrics = {"duration_ms": duration_ms}
+    properties = {}
+    for key, value in attributes.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[key] = value
+        else:
+            properties[key] = value
+
+    record = {
+        "_aws": {
+            "Timestamp": int(started_at * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": EMF_NAMESPACE,
+                "Dimensions": [["stage"]],
+                "Metrics": [
+                    {"Name": key, "Unit": EMF_UNITS.get(key, "Count")} for key in metrics
+                ]
+            }]
+        },
+        "stage": name
+    }
+    record.update(properties)
+    record.update(metrics)
+    return record
+
+def _emit(name, started_at, duration_ms, attributes):
+    """Write one finished span as a log line."""
+    if TRACING_FORMAT == "emf":
+        record = _emf_record(name, started_at, duration_ms, attributes)
+    else:
+        record = {"span": name, "start": started_at, "duration_ms": round(duration_ms, 3)}
+        record.update(attributes)
+    line = json.dumps(record, default=str)
+
+    with _write_lock:
+        if TRACING_FILE:
+            with open(TRACING_FILE, "a") as f:
+                f.write(line + "\n")
+        else:
+            sys.stdout.write(line + "\n")
@@ -0,0 +1,192 @@
+"""
+Module for finding the best departure windows.
+
+A day counts as GOOD when it has enough GOOD hours anywhere in it; a trip
+needs them back to back. This module finds the top-k contiguous windows of
+a requested length per location across the whole forecast horizon, ranked
+by a score:
+
+    margin   smallest relative margin to the GOOD wave/wind and gust limits
+             over the window (higher is better)
+    gust     strongest gust over the window (lower is better)
+
+Window validity comes from cumulative sums (a window is valid when every
+hour in it is rated well enough and follows the previous hour), and window
+minima/maxima are extended one hour at a time, so sweeping every spot and
+every length from 2 to 10 hours costs a few array operations per length.
+"""
+import numpy as np
+import calculations
+import forecast_result
+
+# Window lengths (hours) covered by sweep_windows
+WINDOW_LENGTHS = range(2, 11)
+
+# Number of windows returned per location
+TOP_WINDOWS = 3
+
+SCORES = ("margin", "gust")
+
+def hour_margins(forecast):
+    """
+    Compute each hour's relative margin to the rating limits.
+
+    The margin is the smallest of the wave height and wind speed margins to
+    the GOOD limits and the gust margin to the MEDIOCRE gust limit, each as
+    a fraction of its limit (0 at the limit, negative beyond it).
+
+    Args:
+        forecast (LocationForecast): Analyzed forecast
+
+    Returns:
+        np.ndarray: float64 margin per hour
+    """
+    wave_height_ft = forecast.metrics["wave_height_ft"].astype(np.float64)
+    wind_speed_mph = forecast.metrics["wind_speed_mph"].astype(np.float64)
+    wind_gust_mph = forecast.metrics["wind_gust_mph"].astype(np.float64)
+    return np.minimum.reduce([
+        1.0 - wave_height_ft / calculations.GOOD_WAVE_HEIGHT_MAX_FT,
+        1.0 - wind_speed_mph / calculations.GOOD_WIND_SPEED_MAX_MPH,
+        1.0 - wind_gust_mph / calculations.MEDIOCRE_WIND_GUST_MAX_MPH
+    ])
+
+def _window_arrays(forecast, min_rating):
+    """Precompute the per-hour arrays every window length is derived from."""
+    acceptable = forecast.rating >= min_rating
+    follows_previous = np.r_[False, np.diff(forecast.time) == 3600]
+    return {
+        "acceptable": np.r_[0, np.cumsum(acceptable)],
+        "follows": np.r_[0, np.cumsum(follows_previous)],
+        "margin": hour_margins(forecast),
+        "gust": forecast.metrics["wind_gust_mph"].astype(np.float64)
+    }
+
+def _valid_starts(arrays, length):
+    """Boolean mask over window starts: all hours acceptable and contiguous."""
+    acceptable, follows = arrays["acceptable"], arrays["follows"]
+    count = len(acceptable) - length
+    return (
+        (acceptable[length:] - acceptable[:count] == length) &
+        (follows[length:] - follows[1:count + 1] == length - 1)
+    )
+
+def _top_windows(forecast, valid, window_margin, window_gust, length, k, score, allow_overlap):
+    """Rank the valid windows of one length and build the top-k window dicts."""
+    starts = np.flatnonzero(valid)
+    if len(starts) == 0:
+        return []
+    scores = window_margin[starts] if score == "margin" else -window_gust[starts]
+
+    # Best score first, earlier start on ties
+    order = starts[np.lexsort((starts, -scores))]
+    if allow_overlap:
+        chosen = order[:k].tolist()
+    else:
+        # Greedily keep the best windows that share no hour with a better one
+        chosen = []
+        for start in order.tolist():
+            if all(abs(start - other) >= length for other in chosen):
+                chosen.append(start)
+                if len(chosen) == k:
+                    break
+
+    windows = []
+    for start in chosen:
+        first_epoch = int(forecast.time[start])
+        windows.append({
+            "date": forecast_result.format_date(first_epoch // 86400),
+            "start": forecast_result.format_hour(first_epoch),
+            "end": forecast_result.format_hour(first_epoch + length * 3600),
+            "hours": length,
+            "min_margin": round(float(window_margin[start]), 3),
+            "max_gust_mph": round(float(window_gust[start]), 1)
+        })
+    return windows
+
+def location_windows(location_results, lengths=WINDOW_LENGTHS, k=TOP_WINDOWS, score="margin",
+                     min_rating=calculations.RATING_GOOD, allow_overlap=False):
+    """
+    Find the top-k windows of each length for one location.
+
+    Args:
+        location_results (LocationForecast or dict): Analyzed forecast
+        lengths (iterable): Window lengths in hours
+        k (int): Number of windows per length
+        score (str): Ranking score, 'margin' or 'gust' (see module docstring)
+        min_rating (int): Lowest rating code allowed inside a window
+        allow_overlap (bool): Allow returned windows to share hours
+
+    Returns:
+        dict: Window length to a list of window dicts (date, start, end,
+            hours, min_margin, max_gust_mph), best first
+
+    Raises:
+        ValueError: if the score is unknown
+    """
+    if score not in SCORES:
+        raise ValueError(f"Unknown window score {score!r}; use one of {SCORES}")
+    forecast = forecast_result.as_location_forecast(location_results)
+    lengths = sorted(lengths)
+    hours = len(forecast.time)
+    if hours == 0:
+        return {length: [] for length in lengths}
+    arrays = _window_arrays(forecast, min_rating)
+
+    # Window minima/maxima grow one hour at a time: length L from length L - 1
+    results = {}
+    window_margin = arrays["margin"]
+    window_gust = arrays["gust"]
+    current = 1
+    for length in lengths:
+        if length > hours:
+            results[length] = []
+            continue
+        while current < length:
+            current += 1
+            window_margin = np.minimum(window_margin[:-1], arrays["margin"][current - 1:])
+            window_gust = np.maximum(window_gust[:-1], arrays["gust"][current - 1:])
+        results[length] = _top_windows(
+            forecast, _valid_starts(arrays, length), window_margin, window_gust,
+            length, k, score, allow_overlap
+        )
+    return results
+
+def best_windows(all_results, length, k=TOP_WINDOWS, score="margin", **options):
+    """
+    Find the top-k windows of one length for every location.
+
+    Args:
+        all_results (dict): Location names to analyzed forecasts
+        length (int): Window length in hours
+        k (int): Number of windows per location
+        score (str): Ranking score, 'margin' or 'gust'
+        **options: Passed to location_windows (min_rating, allow_overlap)
+
+    Returns:
+        dict: Location names to window lists; locations without a window are left out
+    """
+    found = {}
+    for location_name, location_results in all_results.items():
+        windows = location_windows(location_results, [length], k, score, **options)[length]
+        if windows:
+            found[location_name] = windows
+    return found
+
+def sweep_windows(all_results, lengths=WINDOW_LENGTHS, k=TOP_WINDOWS, score="margin", **options):
+    """
+    Find the top-k windows of every length for every location.
+
+    Args:
+        all_results (dict): Location names to analyzed forecasts
+        lengths (iterable): Window lengths in hours (default 2 to 10)
+        k (int): Number of windows per location and length
+        score (str): Ranking score, 'margin' or 'gust'
+        **options: Passed to location_windows (min_rating, allow_overlap)
+
+    Returns:
+        dict: Location names to {length: window list}
+    """
+    return {
+        location_name: location_windows(location_results, lengths, k, score, **options)
+        for location_name, location_results in all_results.items()
+    }